@@ -1,43 +1,160 @@
 import argparse
+import hashlib
+import json
 import os
 import random
+import time
+from typing import Dict, Tuple
 
-from src.Assigner import Assigner
-
+from src.Assigner import VERIFY_MODES
+from src.AssignmentState import AssignmentState
+from src.BatchRunner import BatchRunner
+from src.CrossTalkReport import CrossTalkReport
 from src.ExtendedDNAOrigami import ExtendedDNAOrigami
-from src.Extractor import Extractor
 from src.Generator import Generator
+from src.Profiler import Profiler, profile_stage
+from src.ResultWriter import EXPORT_FORMATS
 
 import logging
 
 logger = logging.getLogger(__name__)
 
 
+def state_path(args: argparse.Namespace) -> str:
+    """
+    Assignment state of one design exported to one place.
+    :param args: argument namespace
+    :return: path of the state file
+    """
+    design_id = f"{os.path.abspath(args.config)}|{os.path.abspath(args.save_path)}|{args.save_name}|{args.added}"
+
+    return os.path.join(".cache", "state", f"{hashlib.sha256(design_id.encode('utf-8')).hexdigest()[:16]}.json")
+
+
 def run(args: argparse.Namespace) -> None:
     # TODO: (feat) Provide customerised option to assign bases for staples
-    if args.non_random:
-        # random
-        random.seed(42)
+    # assignment of the previous run, only origami with changed inputs are assigned again
+    state = AssignmentState.load(state_path(args)) if args.incremental or args.watch else None
+
+    if args.seed is not None:
+        seed = args.seed
+    elif args.non_random:
+        # fixed random bases
+        seed = 42
+    elif state is not None and state.get_seed() is not None:
+        # random bases of unchanged origami stay as they are
+        seed = state.get_seed()
     else:
-        random.seed(random.randint(1, 1000))
+        seed = random.SystemRandom().getrandbits(32)
+
+    logger.info(f"Random seed: {seed}")
 
     if not os.path.exists(args.save_path):
         os.mkdir(args.save_path)
 
-    # load configuration file containing design information
-    extended_origami = ExtendedDNAOrigami.load_design(args)
+    # time and memory of each stage
+    profiler = Profiler() if args.profile is not None else None
 
-    # Assign bases for the design
-    assigner = Assigner()
-    assigner.assign_bases(Extractor.extract(extended_origami), extended_origami.get_origami_position())
+    try:
+        # load configuration file containing design information
+        with profile_stage(profiler, "load_design"):
+            extended_origami = ExtendedDNAOrigami.load_design(args, profiler)
 
-    # Create Generator to produce readable results and also export bases
-    generator = Generator.load_data(assigner, extended_origami)
+        # Assign bases for the design
+        assigner = BatchRunner.assign_design(extended_origami, seed, workers=args.workers, state=state,
+                                             verify=args.verify, profiler=profiler)
 
-    if args.added:
-        generator.export_only_bases_added(args)
-    else:
-        generator.export_bases_in_original_csv(args)
+        # Create Generator to produce readable results and also export bases
+        generator = Generator.load_data(assigner, extended_origami, profiler)
+
+        with profile_stage(profiler, "export"):
+            if args.added:
+                generator.export_only_bases_added(args)
+            else:
+                generator.export_bases_in_original_csv(args)
+
+        if args.crosstalk is not None:
+            # overhangs partially pairing with overhangs other than their partners
+            with profile_stage(profiler, "crosstalk"):
+                crosstalk_df = CrossTalkReport.load_data(assigner, extended_origami).analyse(
+                    min_run=args.crosstalk, top=args.crosstalk_top, workers=args.workers)
+                crosstalk_path = os.path.join(args.save_path, f"crosstalk_{args.save_name}.csv")
+                crosstalk_df.to_csv(crosstalk_path, index=False)
+
+            logger.info(f"Cross-talk report of {len(crosstalk_df)} overhang pairs saved to {crosstalk_path}")
+    finally:
+        if profiler is not None:
+            profiler.stop()
+
+    if profiler is not None:
+        profiler.count("origami", len(extended_origami.get_origami_position()))
+        profiler.save(args.profile, args.profile_trace)
+        logger.info(f"Profile of {profiler.report()['total_time']:.3f} s saved to {args.profile}")
+
+    if state is not None:
+        state.set_seed(seed)
+        state.save()
+
+
+def design_snapshot(config_path: str) -> Dict[str, Tuple[int, int]]:
+    """
+    Modification time and size of the configuration file and of every file in its csv root path.
+    :param config_path: configuration file path
+    :return: file path: (modification time, size)
+    """
+    paths = [config_path]
+
+    try:
+        with open(config_path, "r") as f:
+            csv_root_path = json.load(f).get("csv_root_path", "")
+    except Exception:
+        # half-written configuration, compared again at the next poll
+        csv_root_path = ""
+
+    if csv_root_path and os.path.isdir(csv_root_path):
+        paths += [entry.path for entry in os.scandir(csv_root_path) if entry.is_file()]
+
+    snapshot = dict()
+
+    for path in paths:
+        try:
+            stat = os.stat(path)
+            snapshot[path] = (stat.st_mtime_ns, stat.st_size)
+        except FileNotFoundError:
+            continue
+
+    return snapshot
+
+
+def watch(args: argparse.Namespace) -> None:
+    """
+    Run once, and run again incrementally whenever the configuration or a file in the csv root path changes.
+    :param args: argument namespace
+    :return: None
+    """
+    snapshot = design_snapshot(args.config)
+    run(args)
+
+    logger.info(f"Watching {args.config} and its csv root path for changes, press Ctrl+C to stop")
+
+    try:
+        while True:
+            time.sleep(args.watch_interval)
+            new_snapshot = design_snapshot(args.config)
+
+            if new_snapshot == snapshot:
+                continue
+
+            snapshot = new_snapshot
+            logger.info("Design changed, assign bases again")
+
+            try:
+                run(args)
+            except Exception as e:
+                # keep watching, the design may be fixed in the next edit
+                logger.error(f"{e}")
+    except KeyboardInterrupt:
+        logger.info("Stop watching")
 
 
 if __name__ == "__main__":
@@ -55,9 +172,64 @@ if __name__ == "__main__":
     parser.add_argument("--non_random",
                         action="store_true",
                         help="Generate real random bases for overhangs or fixed random bases by chosing the same seed")
+    parser.add_argument("--seed",
+                        type=int,
+                        default=None,
+                        help="Seed from which random bases of every overhang are derived; overrides --non_random")
     parser.add_argument("--modified",
                         action="store_true",
                         help="Include staples not overhangs but modified inactive ones between scaffolds")
+    parser.add_argument("--workers",
+                        type=int,
+                        default=1,
+                        help="Number of worker processes to load, extract and assign origami tiles in parallel")
+    parser.add_argument("--no-cache",
+                        dest="no_cache",
+                        action="store_true",
+                        help="Parse every origami tile again instead of loading parsed tiles from .cache/tiles")
+    parser.add_argument("--incremental",
+                        action="store_true",
+                        help="Reuse assigned bases of origami whose inputs are unchanged since the previous run, and "
+                             "only assign changed origami and the origami paired with them")
+    parser.add_argument("--watch",
+                        action="store_true",
+                        help="Run incrementally again whenever the configuration or a csv file changes")
+    parser.add_argument("--watch_interval",
+                        type=float,
+                        default=1.0,
+                        help="Seconds between checks for changes in watch mode")
+    parser.add_argument("--format",
+                        type=str,
+                        choices=EXPORT_FORMATS,
+                        default="csv",
+                        help="Export a csv, a gzip-compressed csv or an npz file of columns per origami, or one combined "
+                             "csv of all origami with a Tile column")
+    parser.add_argument("--crosstalk",
+                        type=int,
+                        default=None,
+                        metavar="MIN_RUN",
+                        help="Report overhang pairs other than designed partners with at least MIN_RUN consecutive "
+                             "complementary bases")
+    parser.add_argument("--crosstalk_top",
+                        type=int,
+                        default=None,
+                        help="Number of riskiest overhang pairs kept in the cross-talk report")
+    parser.add_argument("--verify",
+                        choices=VERIFY_MODES,
+                        default="fast",
+                        help="Check assigned bases: off, fast for origami assigned in this run and their neighbours, "
+                             "or full for every origami and the exported sequences; all violations are reported")
+    parser.add_argument("--profile",
+                        type=str,
+                        default=None,
+                        metavar="REPORT_PATH",
+                        help="Write wall time and peak memory of each stage, time of each tile and counts of staples "
+                             "and overhangs to a JSON report; memory tracing slows the run down")
+    parser.add_argument("--profile_trace",
+                        type=str,
+                        default=None,
+                        metavar="TRACE_PATH",
+                        help="Also write the stages and tiles of --profile as a Chrome trace, viewable in Perfetto")
     parser.add_argument("--added",
                         action="store_true",
                         help="Export results with staples and overhangs with bases assigned or all staples including"
@@ -65,4 +237,7 @@ if __name__ == "__main__":
 
     args = parser.parse_args()
 
-    run(args)
+    if args.watch:
+        watch(args)
+    else:
+        run(args)
@@ -1,11 +1,23 @@
+import hashlib
 from collections import defaultdict
-from typing import Tuple, Dict, List
-import random
+from concurrent.futures import ProcessPoolExecutor
+from typing import Tuple, Dict, List, Set
 
+import numpy as np
+import pandas as pd
+
+from src.AssignmentState import AssignmentState
 from src.DNAOrigami import DNAOrigami
-from src.Staple import Staple
-from src.constants import ASSIGNED, UNASSIGNED, NOT_EXIST, COMPLEMENTARY_MAP, HELIX_COMPLEMENTARY_BASE_LEFT_DICT, \
-    HELIX_COMPLEMENTARY_BASE_RIGHT_DICT
+from src.GridIndex import GridIndex
+from src.Profiler import Profiler, profile_tile, timed_call
+from src.OverhangGenerator import OverhangGenerator
+from src.ScaffoldMap import ScaffoldMap
+from src.Scheduler import Scheduler
+from src.StapleTable import StapleTable
+from src.random_bases import overhang_seeds, random_overhang_bases
+from src.sequence_kernels import complement, complement_batch, complement_bytes, mismatched_rows, pack_sequences, \
+    reverse, unpack_sequences
+from src.constants import ASSIGNED, UNASSIGNED, NOT_EXIST
 
 import logging
 
@@ -14,25 +26,31 @@ from src.utils import config_logging
 config_logging()
 logger = logging.getLogger(__name__)
 
+# off, checks of origami assigned in the run and their neighbours, or checks of every origami and the csv copies
+VERIFY_MODES = ["off", "fast", "full"]
+
 
 class Assigner:
     """
     Assign bases to overhangs for connecting origami components.
+
+    All state belongs to the instance and is reset at the start of every assign_bases, so one assigner can run many
+    designs in a long-running process without results of one design leaking into the next.
     """
-    __finished_origami_staples: Dict[Tuple, Dict[str, List[str]]] = dict()  # results of assigned staples
-    __input_origami_staples: Dict[Tuple, Dict[str, List[Staple]]] = dict()  # input
+    __finished_origami_staples: Dict[Tuple, Dict[str, List[str]]] = None  # results of assigned staples
+    __input_origami_staples: Dict[Tuple, Dict[str, StapleTable]] = None  # input
 
     # store assigned bases for further complementary base-pairing
-    # Origami chip: staple positions: ((location info), sequence)
+    # Origami chip: location: csv row of the overhang: sequence, in sorted order of the overhangs
     # sequence always from smaller base index to larger one (8 -> 16)
     # NOTE: not complete sequence but only assigned one
-    __origami_bases_assigned: Dict[Tuple, Dict[str, Dict[Tuple, str]]] = dict()
+    __origami_bases_assigned: Dict[Tuple, Dict[str, Dict[int, str]]] = None
 
     # tuple position and its corresponding DNA origami object
-    __origami_position: Dict[Tuple[int, int], DNAOrigami] = dict()
+    __origami_position: Dict[Tuple[int, int], DNAOrigami] = None
 
-    # temporary dict to store location: overhang position: sequence
-    __loc_overhang_sequence_dict: Dict[str, Dict[Tuple, str]] = None
+    # temporary dict to store location: csv row of the overhang: sequence
+    __loc_overhang_sequence_dict: Dict[str, Dict[int, str]] = None
 
     # temporary dict to store location: list of finished assigning sequence
     __processed_loc_staples: Dict[str, List[str]] = None
@@ -43,160 +61,461 @@ class Assigner:
         "t": "b"
     }
 
-    # Processed origami chip; for assigning bottom and top overhangs
-    # Left and right overhangs currently only attach with scaffolds so not require this
-    __job_record: Dict[Tuple, int] = dict()
+    # positions of origami in the design
+    __grid_index: GridIndex = None
+
+    # temporary dict to store location: state of the neighbour origami paired with overhangs in this location
+    __top_bottom_state: Dict[str, int] = None
+
+    # temporary list of bases assigned to bottom overhangs of the origami above, in sorted order of the overhangs
+    __paired_bases: List[str] = None
+
+    # temporary seed of the run and position of the origami being assigned, for random overhang bases
+    __seed: int = None
+    __origami_pos: Tuple[int, int] = None
+
+    # staple bases complementary to the scaffold for left and right overhangs
+    __scaffold_map: ScaffoldMap = None
+
+    # temporary bases drawn under overhang constraints for bottom overhangs of the origami being assigned
+    __random_bases: List[str] = None
+
+    # origami assigned in this run, and origami whose assignment is reused from the persisted state
+    __reassigned_origami: List[Tuple[int, int]] = None
+    __reused_origami: List[Tuple[int, int]] = None
+
+    def __init__(self) -> None:
+        self.reset()
+
+    def reset(self) -> None:
+        """
+        Forget the design and the results of the previous assignment.
+        :return: None
+        """
+        self.__finished_origami_staples = dict()
+        self.__input_origami_staples = dict()
+        self.__origami_bases_assigned = dict()
+        self.__origami_position = dict()
+        self.__grid_index = None
+        self.__scaffold_map = None
+        self.__reassigned_origami = []
+        self.__reused_origami = []
+        self.__release_origami_state()
+
+    def release(self) -> None:
+        """
+        Drop every reference to the design and the results, e.g. once they are exported, so that they can be freed
+        while the assigner is kept for the next design.
+        :return: None
+        """
+        self.reset()
+
+    def __release_origami_state(self) -> None:
+        """
+        Forget the temporary state of the origami assigned last.
+        :return: None
+        """
+        self.__loc_overhang_sequence_dict = None
+        self.__processed_loc_staples = None
+        self.__top_bottom_state = None
+        self.__paired_bases = None
+        self.__seed = None
+        self.__origami_pos = None
+        self.__random_bases = None
+
+    def assign_bases(self, all_origami_loc_staples_dict: Dict[Tuple, Dict[str, StapleTable]],
+                     origami_position: Dict[Tuple[int, int], DNAOrigami],
+                     seed: int = 0,
+                     workers: int = 1,
+                     grid_index: GridIndex = None,
+                     scaffold_map: ScaffoldMap = None,
+                     state: AssignmentState = None,
+                     overhang_constraints: Dict = None,
+                     verify: str = "fast",
+                     profiler: Profiler = None) -> None:
+        """
+        Assign bases to overhangs of all origami in wavefronts.
+        :param all_origami_loc_staples_dict: staples of each origami by location
+        :param origami_position: position: DNA origami
+        :param seed: seed of the run
+        :param workers: number of worker processes
+        :param grid_index: grid index of the design
+        :param scaffold_map: staple bases complementary to the scaffold
+        :param state: assignment of the previous run; only origami whose inputs changed are assigned again if provided
+        :param overhang_constraints: constraints of random overhang bases; uniformly random bases if not provided
+        :param verify: off, fast to check origami assigned in this run and their neighbours, or full to check every
+        origami and the assigned sequences written back to the csv copies
+        :param profiler: profiler timing each assigned origami
+        :return: None
+        """
+        if verify not in VERIFY_MODES:
+            raise Exception(f"Error: Unknown verification mode {verify}, choose from {', '.join(VERIFY_MODES)}.")
 
-    def assign_bases(self, all_origami_loc_staples_dict: Dict[Tuple, Dict[str, List[Staple]]],
-                     origami_position: Dict[Tuple[int, int], DNAOrigami]) -> None:
-        # Initialisation
+        # Initialisation, nothing is kept from the previous design
+        self.reset()
         self.__input_origami_staples = all_origami_loc_staples_dict
-        self.__job_record = dict.fromkeys(list(self.__input_origami_staples.keys()), UNASSIGNED)
         self.__origami_position = origami_position
-
-        # Based on the staple sequence, position and p8064 scaffolds to assign bases
-        # Connection between DNA origami will be achieved by complementary base-pairing
-        for origami_pos, six_type_staples_dict in self.__input_origami_staples.items():
-            # origami chip : top, right, bottom, and left processed staples / overhangs, modified staples
-            self.__processed_loc_staples = defaultdict(list)
-
-            # location of staples: list of finished-assigning sequences
-            self.__loc_overhang_sequence_dict = defaultdict(dict)
-
-            for staple_type, staples_list in six_type_staples_dict.items():
-                # staple type : list of staples
-                # Top and bottom overhangs do not depend on scaffold bases
-                if staple_type in ["t", "b"]:
-                    self.__assign_top_bottom(staples_list, origami_pos)
-                elif staple_type in ["l", "r"]:
-                    # left and right overhangs depend on scaffold bases
-                    self.__assign_left_right(staples_list, list(six_type_staples_dict.keys()), origami_pos)
+        self.__grid_index = grid_index if grid_index is not None \
+            else GridIndex.from_positions(list(self.__input_origami_staples.keys()))
+        self.__scaffold_map = scaffold_map if scaffold_map is not None else ScaffoldMap.from_windows()
+        scheduler = Scheduler.from_grid(self.__grid_index)
+        scaffold_digest = self.__scaffold_map.digest() if state is not None else None
+
+        # random bases under constraints depend on every overhang drawn before, so they are drawn up front in a fixed
+        # order rather than in parallel jobs
+        random_bases_dict = self.__draw_constrained_bases(overhang_constraints, seed, scheduler) \
+            if overhang_constraints is not None else dict()
+
+        executor = ProcessPoolExecutor(max_workers=workers) if workers > 1 else None
+
+        try:
+            # Based on the staple sequence, position and p8064 scaffolds to assign bases
+            # Connection between DNA origami will be achieved by complementary base-pairing
+            for wave in scheduler.get_waves():
+                # origami in one wave only depend on origami in the previous waves
+                jobs = {origami_pos: (self.__input_origami_staples[origami_pos],
+                                      self.__find_top_bottom_state(origami_pos, scheduler),
+                                      self.__find_paired_bases(origami_pos, scheduler),
+                                      seed,
+                                      origami_pos,
+                                      self.__scaffold_map,
+                                      random_bases_dict.get(origami_pos, None))
+                        for origami_pos in wave}
+
+                results = dict()
+                job_keys = dict()
+
+                if state is not None:
+                    # reuse origami whose inputs, including bases of the origami they pair with, are unchanged
+                    for origami_pos, job in jobs.items():
+                        job_keys[origami_pos] = self.__job_key(job, self.__origami_position[origami_pos],
+                                                               scaffold_digest)
+                        reused_result = state.lookup(origami_pos, job_keys[origami_pos])
+
+                        if reused_result is not None:
+                            results[origami_pos] = reused_result
+                            self.__reused_origami.append(origami_pos)
+
+                jobs = {origami_pos: job for origami_pos, job in jobs.items() if origami_pos not in results}
+
+                if executor is None:
+                    for origami_pos, job in jobs.items():
+                        with profile_tile(profiler, "assign_bases", origami_pos):
+                            results[origami_pos] = Assigner().assign_origami(*job)
+                elif profiler is None:
+                    futures = {origami_pos: executor.submit(Assigner().assign_origami, *job)
+                               for origami_pos, job in jobs.items()}
+                    results.update({origami_pos: future.result() for origami_pos, future in futures.items()})
                 else:
-                    # normal staples do not need assignment of bases
-                    # modified staples are actually inactive staples between scaffolds
-                    self.__processed_loc_staples[staple_type] = Staple.extract_staples_sequences(staples_list)
+                    # timed in the worker processes
+                    futures = {origami_pos: executor.submit(timed_call, Assigner().assign_origami, *job)
+                               for origami_pos, job in jobs.items()}
+
+                    for origami_pos, future in futures.items():
+                        results[origami_pos], start, duration, pid = future.result()
+                        profiler.add_tile("assign_bases", origami_pos, start, duration, pid)
+
+                for origami_pos in jobs:
+                    self.__reassigned_origami.append(origami_pos)
+
+                    if state is not None:
+                        state.record(origami_pos, job_keys[origami_pos], *results[origami_pos])
+
+                for origami_pos in wave:
+                    self.__store_origami(origami_pos, *results[origami_pos])
+        finally:
+            if executor is not None:
+                executor.shutdown()
+
+        if state is not None:
+            state.retain(list(self.__input_origami_staples.keys()))
+            logger.info(f"Reassigned {len(self.__reassigned_origami)} origami and reused "
+                        f"{len(self.__reused_origami)} origami from {state.get_state_path()}")
+
+        if profiler is not None:
+            profiler.count("assigned_origami", len(self.__reassigned_origami))
+            profiler.count("reused_origami", len(self.__reused_origami))
+
+        if verify == "off":
+            return
 
-            if not list(self.__processed_loc_staples.keys()):
-                # no assignment at all
-                logger.info("Single origami chip is passed, and no base assignment is done for it.")
+        if verify == "full":
+            # every origami, including the ones reused as they are, and their csv copies
+            checked_origami = set(self.__input_origami_staples.keys())
+        else:
+            # reassigned origami and the origami paired with them
+            checked_origami = set(self.__reassigned_origami)
+            for origami_pos in self.__reassigned_origami:
+                checked_origami.update(self.__grid_index.neighbours(origami_pos).values())
+
+        self.__correctness_check(checked_origami, verify == "full")
+
+    @staticmethod
+    def __job_key(job: Tuple, origami: DNAOrigami, scaffold_digest: str) -> str:
+        """
+        Hash everything assign_origami reads for one origami, and the original csv that assigned bases are written
+        back to.
+        :param job: arguments of assign_origami
+        :param origami: DNA origami
+        :param scaffold_digest: hash of the scaffold map
+        :return: hex digest
+        """
+        six_type_staples_dict, top_bottom_state, paired_bases, seed, origami_pos, _, random_bases = job
+
+        digest = hashlib.sha256()
+        digest.update(f"{scaffold_digest}|{seed}|{origami_pos}|{sorted(top_bottom_state.items())}".encode("ascii"))
+        digest.update("|".join(paired_bases).encode("ascii"))
+        digest.update(f"|{random_bases}".encode("ascii"))
+        digest.update(pd.util.hash_pandas_object(origami.csv_df_copy, index=True).to_numpy().tobytes())
+
+        for staple_type, staple_table in six_type_staples_dict.items():
+            digest.update(f"|{staple_type}|".encode("ascii"))
+            staple_table.update_digest(digest)
+
+        return digest.hexdigest()
+
+    def assign_origami(self,
+                       six_type_staples_dict: Dict[str, StapleTable],
+                       top_bottom_state: Dict[str, int],
+                       paired_bases: List[str],
+                       seed: int,
+                       origami_pos: Tuple[int, int],
+                       scaffold_map: ScaffoldMap,
+                       random_bases: List[str] = None) -> Tuple[Dict[str, List[str]], Dict[str, Dict[int, str]]]:
+        """
+        Assign bases to overhangs of one origami. Only data of this origami and the bases of its paired neighbour are
+        used, so origami in one wave can be assigned in parallel.
+        :param six_type_staples_dict: staples of the origami by location
+        :param top_bottom_state: state of the neighbour origami paired with top and bottom overhangs
+        :param paired_bases: bases of bottom overhangs of the origami above
+        :param seed: seed of the run, from which the random bases of each overhang are derived
+        :param origami_pos: position of the origami
+        :param scaffold_map: staple bases complementary to the scaffold
+        :param random_bases: bases of bottom overhangs drawn under constraints, drawn here uniformly if not provided
+        :return: assigned sequences by location and assigned bases by location and csv row of the overhang
+        """
+        # origami chip : top, right, bottom, and left processed staples / overhangs
+        self.__processed_loc_staples = defaultdict(list)
+
+        # location of staples: list of finished-assigning sequences
+        self.__loc_overhang_sequence_dict = defaultdict(dict)
+
+        self.__top_bottom_state = top_bottom_state
+        self.__paired_bases = paired_bases
+        self.__seed = seed
+        self.__origami_pos = origami_pos
+        self.__scaffold_map = scaffold_map
+        self.__random_bases = random_bases
+
+        for staple_type, staple_table in six_type_staples_dict.items():
+            # staple type : table of staples
+            # Top and bottom overhangs do not depend on scaffold bases
+            if staple_type in ["t", "b"]:
+                self.__assign_top_bottom(staple_table, staple_type)
+            elif staple_type in ["l", "r"]:
+                # left and right overhangs depend on scaffold bases
+                self.__assign_left_right(staple_table, staple_type, list(six_type_staples_dict.keys()))
+
+        result = dict(self.__processed_loc_staples), dict(self.__loc_overhang_sequence_dict)
+        self.__release_origami_state()
+
+        return result
+
+    def __store_origami(self,
+                        origami_pos: Tuple[int, int],
+                        processed_loc_staples: Dict[str, List[str]],
+                        loc_overhang_sequence_dict: Dict[str, Dict[int, str]]) -> None:
+        """
+        Store the assignment of one origami and update its staples and the copy of its csv.
+        :param origami_pos: position of the origami
+        :param processed_loc_staples: assigned sequences by location
+        :param loc_overhang_sequence_dict: assigned bases by location and csv row of the overhang
+        :return: None
+        """
+        six_type_staples_dict = self.__input_origami_staples[origami_pos]
+
+        for staple_type, staple_table in six_type_staples_dict.items():
+            if staple_type in processed_loc_staples:
+                staple_table.set_sequences(processed_loc_staples[staple_type])
+
+                # keep the pooled sequences instead of the copies returned by the job
+                processed_loc_staples[staple_type] = staple_table.get_sequences()
+
+                if staple_type in loc_overhang_sequence_dict:
+                    # e.g. side overhangs binding the same scaffold window share their bases
+                    loc_overhang_sequence_dict[staple_type] = {
+                        row_id: staple_table.get_pool().share(bases)
+                        for row_id, bases in loc_overhang_sequence_dict[staple_type].items()}
+            elif staple_type not in ["t", "b", "l", "r"]:
+                # normal staples do not need assignment of bases
+                # modified staples are actually inactive staples between scaffolds
+                processed_loc_staples[staple_type] = StapleTable.extract_staples_sequences(staple_table)
+
+        if not list(processed_loc_staples.keys()):
+            # no assignment at all
+            logger.info("Single origami chip is passed, and no base assignment is done for it.")
 
-            self.__finished_origami_staples[origami_pos] = self.__processed_loc_staples
-            self.__origami_bases_assigned[origami_pos] = self.__loc_overhang_sequence_dict.copy()
-            self.__job_record[origami_pos] = ASSIGNED
+        self.__write_back(origami_pos, six_type_staples_dict)
 
-        # check correctness
-        self.__correctness_check()
+        self.__finished_origami_staples[origami_pos] = processed_loc_staples
+        self.__origami_bases_assigned[origami_pos] = loc_overhang_sequence_dict
+
+    def __write_back(self, origami_pos: Tuple[int, int], six_type_staples_dict: Dict[str, StapleTable]) -> None:
+        """
+        Replace the sequences of all assigned overhangs in the copy of the original csv at once, addressed by the rows
+        the overhangs were extracted from.
+        :param origami_pos: position of the origami
+        :param six_type_staples_dict: staples of the origami by location
+        :return: None
+        """
+        assigned_tables = [staple_table for staple_type, staple_table in six_type_staples_dict.items()
+                           if staple_type in ["t", "b", "l", "r"]]
+
+        if not assigned_tables:
+            return
+
+        row_ids = np.concatenate([staple_table.get_row_id() for staple_table in assigned_tables])
+        sequences = [sequence for staple_table in assigned_tables for sequence in staple_table.get_sequences()]
+
+        self.__origami_position[origami_pos].update_sequences(row_ids, sequences)
 
     def __assign_top_bottom(self,
-                            unassigned_overhangs_list: List[Staple],
-                            origami_pos: Tuple):
+                            unassigned_overhangs: StapleTable,
+                            staples_loc: str):
         """
 
-        :param unassigned_overhangs_list:
-        :param origami_pos:
+        :param unassigned_overhangs:
+        :param staples_loc: these staples' location
         :return:
         """
-        staples_loc = unassigned_overhangs_list[0].get_position()  # these staples' location
-        paired_origami_pos = (origami_pos[0], origami_pos[-1] + 1) if staples_loc == "t" \
-            else (origami_pos[0], origami_pos[-1] - 1)  # deduce paired staples' location
-        top_bottom_state = self.__find_complementary_tb_origami(origami_pos, staples_loc)  # check neighbour origami
+        top_bottom_state = self.__top_bottom_state[staples_loc]  # state of neighbour origami
 
         if top_bottom_state == ASSIGNED:
             # assigned: simply assign by complementary base-pairing
-            self.__simple_base_pairing(unassigned_overhangs_list, self.__processed_loc_staples, paired_origami_pos,
-                                       origami_pos)
+            self.__simple_base_pairing(unassigned_overhangs, staples_loc, self.__processed_loc_staples)
         elif top_bottom_state == UNASSIGNED:
             # unassigned: randomly generate bases for the overhang
-            self.__assign_randomly(unassigned_overhangs_list, self.__processed_loc_staples, origami_pos)
+            self.__assign_randomly(unassigned_overhangs, staples_loc, self.__processed_loc_staples)
         else:
             # not exit
             pass
 
-    def __find_complementary_tb_origami(self, orig_pos: Tuple, staple_loc: str) -> int:
-        if staple_loc == "t":
-            potential_paired_origami = (orig_pos[0], orig_pos[-1] + 1)
-        else:
-            potential_paired_origami = (orig_pos[0], orig_pos[-1] - 1)
+    def __find_top_bottom_state(self, orig_pos: Tuple, scheduler: Scheduler) -> Dict[str, int]:
+        """
+        Find whether overhangs at the top and bottom pair with an origami assigned before this one, an origami assigned
+        after it, or no origami at all.
+        :param orig_pos: position of the origami
+        :param scheduler: scheduler of the design
+        :return: dict of location and state
+        """
+        top_bottom_state = dict()
 
-        state = ASSIGNED  # default: paired origami has been assigned
+        for staple_loc in ["t", "b"]:
+            potential_paired_origami = self.__grid_index.neighbour(orig_pos, staple_loc)
 
-        if potential_paired_origami in list(self.__input_origami_staples.keys()):
-            # require base pairing
-            if self.__job_record[potential_paired_origami] == UNASSIGNED:
-                # paired origami has not been assigned bases
-                state = UNASSIGNED  # this origami required to be assigned manually
-        else:
-            # not available for base pairing
-            state = NOT_EXIST
+            if potential_paired_origami is None:
+                # not available for base pairing
+                top_bottom_state[staple_loc] = NOT_EXIST
+            elif potential_paired_origami in scheduler.get_dependencies(orig_pos):
+                # paired origami has been assigned bases
+                top_bottom_state[staple_loc] = ASSIGNED
+            else:
+                # paired origami depends on this one, which is required to be assigned manually
+                top_bottom_state[staple_loc] = UNASSIGNED
 
-        return state
+        return top_bottom_state
 
-    def __simple_base_pairing(self, staples_list: List[Staple],
-                              store_dict: Dict[str, List[str]],
-                              paired_origami_pos: Tuple[int, int],
-                              this_origami_pos: Tuple[int, int]):
+    def __find_paired_bases(self, orig_pos: Tuple, scheduler: Scheduler) -> List[str]:
+        """
+        Bases assigned to the bottom overhangs of the origami above, which the top overhangs of this origami pair with.
+        :param orig_pos: position of the origami
+        :param scheduler: scheduler of the design
+        :return: list of bases in sorted order of the overhangs
         """
+        paired_origami_pos = self.__grid_index.neighbour(orig_pos, "t")
+
+        if paired_origami_pos is None or paired_origami_pos not in scheduler.get_dependencies(orig_pos):
+            return []
+
+        paired_table = self.__input_origami_staples[paired_origami_pos].get("b", None)
+
+        if paired_table is None:
+            return []
 
-        :param staples_list:
+        # bases of every overhang, including overhangs sharing their base indexes, in sorted order
+        paired_bases_dict = self.__origami_bases_assigned[paired_origami_pos]["b"]
+
+        return [paired_bases_dict[row_id] for row_id in paired_table.get_row_id().tolist()]
+
+    def __simple_base_pairing(self, staple_table: StapleTable,
+                              unassigned_staples_loc: str,
+                              store_dict: Dict[str, List[str]]):
+        """
+
+        :param staple_table:
+        :param unassigned_staples_loc:
         :param store_dict:
-        :param paired_origami_pos:
-        :param this_origami_pos:
         :return:
         """
-        unassigned_staples_loc = staples_list[0].get_position()
         paired_staples_loc = self.__unassigned_paired_loc_converter[unassigned_staples_loc]
-        pairing_staples = self.__input_origami_staples[paired_origami_pos][paired_staples_loc]
 
         # Sanity check
-        if len(staples_list) != len(pairing_staples):
+        if len(staple_table) != len(self.__paired_bases):
             raise Exception("Error: Cannot properly form complementary base-pairing due to different number "
                             "of overhangs on two origami")
 
-        for unassigned_staple, assigned_staple in zip(staples_list, pairing_staples):
-            # Find corresponding overhang on the other chip with the same base position
-            # This is achieved just by 1 - 1 mapping due to the sorted staple lists
-            # TODO: not deal with overhangs to scaffolds directly
-            paired_bases = self.__origami_bases_assigned[paired_origami_pos][paired_staples_loc][
-                assigned_staple.get_base_index()]
-            complementary_bases = Assigner.complementary_converter(paired_bases)
+        # helix with even index
+        even_arr = self.__at_even(paired_staples_loc, staple_table)
 
-            # For further simple base-pairing
-            self.__loc_overhang_sequence_dict[unassigned_staples_loc][
-                unassigned_staple.get_base_index()] = complementary_bases
+        # Find corresponding overhang on the other chip with the same base position
+        # This is achieved just by 1 - 1 mapping due to the sorted staple lists
+        # TODO: not deal with overhangs to scaffolds directly
+        complementary_bases_list = complement_batch(self.__paired_bases)
 
-            replace_sequence = unassigned_staple.get_sequence()
+        for idx, (row_id, complementary_bases, even) in enumerate(zip(
+                staple_table.get_row_id().tolist(),
+                complementary_bases_list,
+                even_arr.tolist())):
+            # For further simple base-pairing
+            self.__loc_overhang_sequence_dict[unassigned_staples_loc][row_id] = complementary_bases
 
-            # helix with even index
-            even = self.__at_even(paired_staples_loc, unassigned_staple)
+            replace_sequence = staple_table.get_sequence(idx)
 
             # replace unassigned sequences
             assigned_sequence = self.__replace_unassigned_bases(complementary_bases, replace_sequence, even)
 
-            # replace the corresponding sequence in the copy of the original csv
-            csv_replaced = self.__origami_position[this_origami_pos].csv_df_copy
-            unassigned_sequence_str = "".join(replace_sequence)
-            csv_replaced.loc[csv_replaced["Sequence"] == unassigned_sequence_str, "Sequence"] = assigned_sequence
-
-            unassigned_staple.set_sequence(assigned_sequence)  # update sequence of this overhang
-
             store_dict[unassigned_staples_loc].append(assigned_sequence)
 
     @staticmethod
-    def __at_even(paired_staples_loc: str, this_staple: Staple):
+    def __at_even(paired_staples_loc: str, staple_table: StapleTable) -> np.ndarray:
+        start_helix_idx, end_helix_idx = staple_table.get_helix_index()
+
         if paired_staples_loc == "b":
             # connect with top origami
             # the end out of the scaffold has the least helix index
-            even = True if min(this_staple.get_helix_index()) % 2 == 0 else False
+            out_scaffold_helix_idx = np.minimum(start_helix_idx, end_helix_idx)
         elif paired_staples_loc == "t":
             # with bottom
-            even = True if max(this_staple.get_helix_index()) % 2 == 0 else False
+            out_scaffold_helix_idx = np.maximum(start_helix_idx, end_helix_idx)
         else:
             raise Exception("Error: Unknown pairing staple locations provided")
 
-        return even
+        return out_scaffold_helix_idx % 2 == 0
+
+    @staticmethod
+    def __out_scaffold_end_helix(staple_table: StapleTable) -> np.ndarray:
+        """
+        Helix index of the end with the larger base index, which is the end out of the scaffold for side overhangs.
+        :param staple_table: side overhangs
+        :return: helix indexes
+        """
+        start_helix_idx, end_helix_idx = staple_table.get_helix_index()
+        start_base_idx, end_base_idx = staple_table.get_base_index()
+
+        return np.where(start_base_idx >= end_base_idx, start_helix_idx, end_helix_idx)
 
     @staticmethod
-    def __replace_unassigned_bases(fill_bases: str, replace_sequence: List[str], even: bool) -> str:
+    def __replace_unassigned_bases(fill_bases: str, replace_sequence: str, even: bool) -> str:
         if replace_sequence.count('?') != len(fill_bases):
             raise Exception("Error: Cannot properly form complementary base-pairing due to different number "
                             "of bases on two overhangs")
@@ -204,10 +523,9 @@ class Assigner:
         # rule in Cadnano: staples on the even indexed (include 0) scaffold have sequence from larger base to smaller
         # one; staples on the old indexed-scaffold have sequence from smaller base to larger one.
         if even:
-            fill_bases = fill_bases[::-1]
+            fill_bases = reverse(fill_bases)
 
         start_index = replace_sequence.index("?")
-        replace_sequence = "".join(replace_sequence)
         replace_sequence = replace_sequence[:start_index] + fill_bases + replace_sequence[
                                                                          start_index + len(fill_bases):]
 
@@ -215,166 +533,296 @@ class Assigner:
 
     @staticmethod
     def complementary_converter(sequence: str) -> str:
-        return "".join(map(lambda c: COMPLEMENTARY_MAP.get(c, c), sequence))
+        return complement(sequence)
 
     def __assign_randomly(self,
-                          staple_list: List[Staple],
-                          store_dict: Dict[str, List[str]],
-                          this_origami_pos: Tuple[int, int]):
+                          staple_table: StapleTable,
+                          unassigned_staples_loc: str,
+                          store_dict: Dict[str, List[str]]):
         """
 
-        :param staple_list:
+        :param staple_table:
+        :param unassigned_staples_loc:
         :param store_dict:
-        :param this_origami_pos:
         :return:
         """
-        unassigned_staples_loc = staple_list[0].get_position()
         paired_overhang_loc = self.__unassigned_paired_loc_converter[unassigned_staples_loc]
+        even_arr = self.__at_even(paired_overhang_loc, staple_table)
 
-        for staple in staple_list:
-            unassigned_sequence = staple.get_sequence()
-            unassigned_sequence = "".join(unassigned_sequence)
-            start_index = unassigned_sequence.find("?")
-            end_index = unassigned_sequence.rfind("?")
+        unassigned_sequences = staple_table.get_sequences()
+        start_indexes, end_indexes = self.__unassigned_spans(unassigned_sequences)
 
+        if self.__random_bases is not None and unassigned_staples_loc == "b":
+            # drawn under constraints before the assignment
+            fill_bases_list = self.__random_bases
+        else:
+            # draw random bases for all overhangs at once, each overhang from its own seed
+            seeds = overhang_seeds(self.__seed, self.__origami_pos, unassigned_staples_loc,
+                                   staple_table.get_base_index(), staple_table.get_helix_index())
+            lengths = [end_index - start_index + 1 for start_index, end_index in zip(start_indexes, end_indexes)]
+            fill_bases_list = random_overhang_bases(seeds, lengths)
+
+        for row_id, even, unassigned_sequence, start_index, end_index, fill_bases in zip(
+                staple_table.get_row_id().tolist(), even_arr.tolist(),
+                unassigned_sequences, start_indexes, end_indexes, fill_bases_list):
             # replace unassigned bases with randomly generated bases
-            length = end_index - start_index + 1
-            bases = list(COMPLEMENTARY_MAP.keys())
-            fill_bases = "".join(random.choice(bases) for _ in range(length))
             assigned_sequence = unassigned_sequence[:start_index] + fill_bases + unassigned_sequence[end_index + 1:]
 
-            # replace the corresponding sequence in the copy of the original csv
-            csv_replaced = self.__origami_position[this_origami_pos].csv_df_copy
-            unassigned_sequence_str = "".join(staple.get_sequence())
-            csv_replaced.loc[csv_replaced["Sequence"] == unassigned_sequence_str, "Sequence"] = assigned_sequence
-
-            staple.set_sequence(assigned_sequence)
             store_dict[unassigned_staples_loc].append(assigned_sequence)
 
             # write in dynamic storage
-            even = self.__at_even(paired_overhang_loc, staple)
             if even:
-                fill_bases = fill_bases[::-1]
+                fill_bases = reverse(fill_bases)
+
+            self.__loc_overhang_sequence_dict[unassigned_staples_loc][row_id] = fill_bases
+
+    @staticmethod
+    def __unassigned_spans(sequences: List[str]) -> Tuple[List[int], List[int]]:
+        """
+        First and last unassigned bases of each sequence.
+        :param sequences: sequences with unassigned bases "?"
+        :return: start and end indexes
+        """
+        return [sequence.find("?") for sequence in sequences], [sequence.rfind("?") for sequence in sequences]
+
+    def __draw_constrained_bases(self,
+                                 overhang_constraints: Dict,
+                                 seed: int,
+                                 scheduler: Scheduler) -> Dict[Tuple[int, int], List[str]]:
+        """
+        Draw bases of all bottom overhangs which get random bases, origami by origami in sorted order of positions.
+        Candidates are checked against every sequence in the design, the scaffold and overhangs drawn before.
+        :param overhang_constraints: "overhang_constraints" section of the configuration file
+        :param seed: seed of the run
+        :param scheduler: scheduler of the design
+        :return: position: bases of its bottom overhangs
+        """
+        generator = OverhangGenerator.from_setting(overhang_constraints)
+
+        # every sequence already in the design and the scaffold on both strands
+        generator.add_sequences([sequence for origami in self.__origami_position.values()
+                                 for sequence in origami.get_csv_df()["Sequence"].tolist()])
+        generator.add_sequences([row.tobytes().decode("ascii").replace("\0", "|")
+                                 for row in self.__scaffold_map.get_bases()])
+
+        random_bases_dict = dict()
+
+        for origami_pos in sorted(self.__input_origami_staples.keys()):
+            staple_table = self.__input_origami_staples[origami_pos].get("b", None)
+
+            if staple_table is None or self.__find_top_bottom_state(origami_pos, scheduler)["b"] != UNASSIGNED:
+                continue
 
-            self.__loc_overhang_sequence_dict[unassigned_staples_loc][staple.get_base_index()] = fill_bases
+            start_indexes, end_indexes = self.__unassigned_spans(staple_table.get_sequences())
+            seeds = overhang_seeds(seed, origami_pos, "b", staple_table.get_base_index(),
+                                   staple_table.get_helix_index())
+            lengths = [end_index - start_index + 1 for start_index, end_index in zip(start_indexes, end_indexes)]
+
+            random_bases_dict[origami_pos] = generator.generate(seeds, lengths)
+
+        return random_bases_dict
 
     def __assign_left_right(self,
-                            staples_list: List[Staple],
-                            has_staples_loc_list: List[str],
-                            this_origami_pos: Tuple[int, int]):
+                            staple_table: StapleTable,
+                            staple_loc: str,
+                            has_staples_loc_list: List[str]):
         """
 
-        :param staples_list:
+        :param staple_table:
+        :param staple_loc:
         :param has_staples_loc_list:
-        :param this_origami_pos:
         :return:
         """
-        staple_loc = staples_list[0].get_position()
-
         # if this origami has top overhangs -> the old design shifts 2 helices down
         if "t" in has_staples_loc_list:
             shift = 2
         else:
             shift = 0
 
-        self.__bind_origami(staples_list, staple_loc, shift, this_origami_pos)
+        self.__bind_origami(staple_table, staple_loc, shift)
 
     def __bind_origami(self,
-                       staples_list: List[Staple],
+                       staple_table: StapleTable,
                        staple_loc: str,
-                       shift: int,
-                       this_origami_pos: Tuple[int, int]):
+                       shift: int):
         """
 
-        :param staples_list:
+        :param staple_table:
         :param staple_loc:
         :param shift:
-        :param this_origami_pos:
         :return:
         """
-        if staple_loc == "r":
-            converter = HELIX_COMPLEMENTARY_BASE_LEFT_DICT
-        else:
-            converter = HELIX_COMPLEMENTARY_BASE_RIGHT_DICT
+        out_scaffold_end_helix_arr = self.__out_scaffold_end_helix(staple_table)
+        lengths = np.array([sequence.count("?") for sequence in staple_table.get_sequences()], dtype=np.int64)
 
-        for staple in staples_list:
-            out_scaffold_end_helix_idx = staple.get_helix_index()[
-                staple.get_base_index().index(max(staple.get_base_index()))]
+        # shift for different designs with empty helices above the origami
+        complementary_bases_list = self.__scaffold_bases(staple_loc, out_scaffold_end_helix_arr - shift, lengths)
 
+        for idx, (row_id, out_scaffold_end_helix_idx, complementary_bases) in enumerate(zip(
+                staple_table.get_row_id().tolist(),
+                out_scaffold_end_helix_arr.tolist(),
+                complementary_bases_list)):
             even = True if out_scaffold_end_helix_idx % 2 == 0 else False
 
-            # shift for different designs with empty helices above the origami
-            complementary_bases = converter[out_scaffold_end_helix_idx - shift]
+            self.__loc_overhang_sequence_dict[staple_loc][row_id] = complementary_bases
+
+            unassigned_sequence = staple_table.get_sequence(idx)
+            assigned_sequence = self.__replace_unassigned_bases(complementary_bases, unassigned_sequence, even)
+
+            self.__processed_loc_staples[staple_loc].append(assigned_sequence)
 
-            self.__loc_overhang_sequence_dict[staple_loc][staple.get_helix_index()] = complementary_bases[::-1]
+    def __scaffold_bases(self, staple_loc: str, scaffold_helix_arr: np.ndarray, lengths: np.ndarray) -> List[str]:
+        """
+        Bases of side overhangs complementary to the scaffold of the neighbour origami, from the smaller base index to
+        the larger one. Right overhangs bind the left edge of the scaffold and left overhangs bind the right edge.
+        :param staple_loc: r or l
+        :param scaffold_helix_arr: helix of the scaffold each overhang binds
+        :param lengths: number of bases of each overhang
+        :return: list of bases
+        """
+        side = "l" if staple_loc == "r" else "r"
+        complementary_bases_list = [""] * len(lengths)
 
-            # FIXME: assigned bases store from left to right but scaffold complementary bases from right to left
-            # now we leave it
-            assigned_sequence = self.__replace_unassigned_bases(complementary_bases[::-1], staple.get_sequence(), even)
+        # one vectorized window per overhang length
+        for length in np.unique(lengths).tolist():
+            idx_arr = np.flatnonzero(lengths == length)
 
-            # replace the corresponding sequence in the copy of the original csv
-            csv_replaced = self.__origami_position[this_origami_pos].csv_df_copy
-            unassigned_sequence_str = "".join(staple.get_sequence())
-            csv_replaced.loc[csv_replaced["Sequence"] == unassigned_sequence_str, "Sequence"] = assigned_sequence
+            for idx, bases in zip(idx_arr.tolist(),
+                                  self.__scaffold_map.window(scaffold_helix_arr[idx_arr], side, length)):
+                complementary_bases_list[idx] = bases
 
-            staple.set_sequence(assigned_sequence)
+        return complementary_bases_list
 
-            self.__processed_loc_staples[staple_loc].append(assigned_sequence)
+    def __correctness_check(self, checked_origami: Set[Tuple[int, int]], check_csv: bool = False):
+        """
+        Check complementary base-pairing of all overhangs of the checked origami in one vectorized comparison, and
+        report every violation at once.
+        :param checked_origami: positions of the origami to check
+        :param check_csv: whether assigned sequences written back to the csv copies are checked as well
+        :return: None
+        """
+        assigned_list, expected_list = [], []
+        # compared tables: staple table, paired table or None if compared with the scaffold, scaffold helix indexes
+        tables, paired_tables, scaffold_helix_arrs = [], [], []
+        # parallel arrays over compared overhangs: index into the compared tables and row in that table
+        table_id_list, row_list = [], []
+        violations = []
 
-    def __correctness_check(self):
         # for each origami chip -> top, bottom, left, right,
-        for origami_pos, tbrlnm_staples_dict in self.__input_origami_staples.items():
+        for origami_pos in sorted(checked_origami):
+            tbrlnm_staples_dict = self.__input_origami_staples[origami_pos]
             shift = 0 if "t" not in list(tbrlnm_staples_dict.keys()) else 2
 
-            for staples_loc, staples_list in tbrlnm_staples_dict.items():
+            for staples_loc, staple_table in tbrlnm_staples_dict.items():
                 if staples_loc in ["r", "l"]:
                     # simply compare with the bases from scaffolds
-                    for staple in staples_list:
-                        if staples_loc == "r":
-                            converter = HELIX_COMPLEMENTARY_BASE_LEFT_DICT
-                        else:
-                            converter = HELIX_COMPLEMENTARY_BASE_RIGHT_DICT
-
-                        out_scaffold_end_helix_idx = staple.get_helix_index()[
-                            staple.get_base_index().index(max(staple.get_base_index()))]
-                        assigned_bases = self.__origami_bases_assigned[origami_pos][staples_loc][
-                            staple.get_helix_index()]
-                        complementary_scaffold_bases = converter[out_scaffold_end_helix_idx - shift][::-1]
-
-                        if assigned_bases != complementary_scaffold_bases:
-                            raise Exception("Error: Not satisfy complementary base-pair role for \n"
-                                            f"{staple} \n"
-                                            f"Assigned bases: {assigned_bases} \n"
-                                            f"Scaffold helix: {out_scaffold_end_helix_idx - shift} \n"
-                                            f"Scaffold bases: {self.complementary_converter(complementary_scaffold_bases)}")
+                    out_scaffold_end_helix_arr = self.__out_scaffold_end_helix(staple_table)
+                    assigned_bases_list = [self.__origami_bases_assigned[origami_pos][staples_loc][row_id]
+                                           for row_id in staple_table.get_row_id().tolist()]
+                    complementary_scaffold_bases_list = self.__scaffold_bases(
+                        staples_loc, out_scaffold_end_helix_arr - shift,
+                        np.fromiter(map(len, assigned_bases_list), dtype=np.int64, count=len(assigned_bases_list)))
+
+                    assigned_list += assigned_bases_list
+                    expected_list += complementary_scaffold_bases_list
+                    table_id_list.append(np.full(len(staple_table), len(tables), dtype=np.int64))
+                    row_list.append(np.arange(len(staple_table), dtype=np.int64))
+                    tables.append(staple_table)
+                    paired_tables.append(None)
+                    scaffold_helix_arrs.append(out_scaffold_end_helix_arr - shift)
 
                 elif staples_loc in ["t", "b"]:
                     paired_staples_loc = self.__unassigned_paired_loc_converter[staples_loc]
-                    paired_origami_pos = (origami_pos[0], origami_pos[-1] + 1) if staples_loc == "t" \
-                        else (origami_pos[0], origami_pos[-1] - 1)
-                    origami_loc_sequences_list = list(self.__origami_bases_assigned[origami_pos][staples_loc].values())
-                    paired_list = list(self.__origami_bases_assigned[paired_origami_pos][paired_staples_loc].values())
-
-                    counter = 0
-
-                    for staple, paired_one in zip(staples_list,
-                                                  self.__input_origami_staples[paired_origami_pos][paired_staples_loc]):
-                        assigned_bases = origami_loc_sequences_list[counter]
-                        paired_bases = self.complementary_converter(paired_list[counter])
-
-                        if assigned_bases != paired_bases:
-                            raise Exception(
-                                f"Error: Not satisfy complementary base-pair role for \n"
-                                f"{staple} \n"
-                                f"Assigned bases: {assigned_bases} \n"
-                                f"{paired_one} \n"
-                                f"Paired bases:   {paired_bases}")
-
-                        counter += 1
+                    paired_origami_pos = self.__grid_index.neighbour(origami_pos, staples_loc)
+
+                    if paired_origami_pos is None:
+                        # no origami to pair with
+                        continue
+
+                    paired_table = self.__input_origami_staples[paired_origami_pos][paired_staples_loc]
+                    pair_count = min(len(staple_table), len(paired_table))
+
+                    # overhangs pair in the sorted order of the tables, bases are looked up by csv row
+                    loc_bases_dict = self.__origami_bases_assigned[origami_pos][staples_loc]
+                    paired_bases_dict = self.__origami_bases_assigned[paired_origami_pos][paired_staples_loc]
+                    origami_loc_sequences_list = [loc_bases_dict[row_id]
+                                                  for row_id in staple_table.get_row_id()[:pair_count].tolist()]
+                    paired_list = [paired_bases_dict[row_id]
+                                   for row_id in paired_table.get_row_id()[:pair_count].tolist()]
+
+                    if len(staple_table) != len(paired_table):
+                        violations.append(f"{len(staple_table)} overhangs at {staples_loc} of origami {origami_pos} "
+                                          f"but {len(paired_table)} at {paired_staples_loc} of origami "
+                                          f"{paired_origami_pos}")
+
+                    assigned_list += origami_loc_sequences_list
+                    expected_list += paired_list
+                    table_id_list.append(np.full(pair_count, len(tables), dtype=np.int64))
+                    row_list.append(np.arange(pair_count, dtype=np.int64))
+                    tables.append(staple_table)
+                    paired_tables.append(paired_table)
+                    scaffold_helix_arrs.append(None)
                 else:
                     # normal or modified staples
                     pass
 
+        if assigned_list:
+            # bases paired with other overhangs are compared with their complements, all in one batch
+            table_id_arr, row_arr = np.concatenate(table_id_list), np.concatenate(row_list)
+            complemented = np.array([paired_table is not None for paired_table in paired_tables])[table_id_arr]
+            expected_buffer, expected_offsets = pack_sequences(expected_list)
+            byte_complemented = np.repeat(complemented, np.diff(expected_offsets))
+            expected_buffer = np.where(byte_complemented, complement_bytes(expected_buffer), expected_buffer)
+            expected_list = unpack_sequences(expected_buffer, expected_offsets)
+
+            # messages are only built for the violations
+            for idx in np.flatnonzero(mismatched_rows(assigned_list, expected_list)).tolist():
+                table_id, row = int(table_id_arr[idx]), int(row_arr[idx])
+
+                if paired_tables[table_id] is None:
+                    violations.append(f"{tables[table_id][row]} \n"
+                                      f"Assigned bases: {assigned_list[idx]} \n"
+                                      f"Scaffold helix: {scaffold_helix_arrs[table_id][row]} \n"
+                                      f"Scaffold bases: {complement(expected_list[idx])}")
+                else:
+                    violations.append(f"{tables[table_id][row]} \n"
+                                      f"Assigned bases: {assigned_list[idx]} \n"
+                                      f"{paired_tables[table_id][row]} \n"
+                                      f"Paired bases:   {expected_list[idx]}")
+
+        if check_csv:
+            violations += self.__csv_violations(checked_origami)
+
+        if violations:
+            raise Exception(f"Error: {len(violations)} violations of the complementary base-pair role \n" +
+                            "\n".join(violations))
+
+    def __csv_violations(self, checked_origami: Set[Tuple[int, int]]) -> List[str]:
+        """
+        Compare the sequences of assigned staples with the rows written back to the csv copies.
+        :param checked_origami: positions of the origami to check
+        :return: description of every row differing from its staple
+        """
+        violations = []
+
+        for origami_pos in sorted(checked_origami):
+            assigned_tables = [staple_table for staple_type, staple_table
+                               in self.__input_origami_staples[origami_pos].items()
+                               if staple_type in ["t", "b", "l", "r"]]
+
+            if not assigned_tables:
+                continue
+
+            row_ids = np.concatenate([staple_table.get_row_id() for staple_table in assigned_tables])
+            sequences = [sequence for staple_table in assigned_tables for sequence in staple_table.get_sequences()]
+            written_sequences = self.__origami_position[origami_pos].csv_df_copy.loc[row_ids, "Sequence"].tolist()
+
+            for idx in np.flatnonzero(mismatched_rows(written_sequences, sequences)).tolist():
+                violations.append(f"Row {row_ids[idx]} of the csv copy of origami {origami_pos} holds "
+                                  f"{written_sequences[idx]} instead of {sequences[idx]}")
+
+        return violations
+
     def get_finished_origami_staples(self):
         return self.__finished_origami_staples
 
@@ -384,5 +832,11 @@ class Assigner:
     def get_unassigned_paired_loc_converter(self) -> Dict[str, str]:
         return self.__unassigned_paired_loc_converter
 
-    def get_input_origami_staples(self) -> Dict[Tuple, Dict[str, List[Staple]]]:
+    def get_reassigned_origami(self) -> List[Tuple[int, int]]:
+        return self.__reassigned_origami
+
+    def get_reused_origami(self) -> List[Tuple[int, int]]:
+        return self.__reused_origami
+
+    def get_input_origami_staples(self) -> Dict[Tuple, Dict[str, StapleTable]]:
         return self.__input_origami_staples
@@ -0,0 +1,127 @@
+from __future__ import annotations
+
+import json
+import os
+from typing import Dict, List, Optional, Tuple
+
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Bump when the layout of the state file changes
+ASSIGNMENT_STATE_VERSION = 2
+
+
+class AssignmentState:
+    """
+    Assignment of every origami from the previous run, keyed by a hash of everything the assignment of the origami
+    reads: its staples, the bases of the origami it pairs with, the seed and the scaffold. An origami whose key is
+    unchanged reuses its assigned bases instead of being assigned again.
+    """
+    __state_path: str = None
+    __entries: Dict[str, Dict] = None  # "x,y": key, assigned sequences and assigned bases
+    __seed: Optional[int] = None  # seed of the previous run, kept so random bases of unchanged origami stay valid
+
+    @classmethod
+    def load(cls, state_path: str) -> AssignmentState:
+        """
+        Load the state persisted by the previous run; a missing or unreadable file gives an empty state.
+        :param state_path: path of the state file
+        :return: cls()
+        """
+        state = cls()
+        state.__state_path = state_path
+        state.__entries = dict()
+
+        if os.path.exists(state_path):
+            try:
+                with open(state_path, "r") as f:
+                    state_data = json.load(f)
+
+                if state_data.get("version") == ASSIGNMENT_STATE_VERSION:
+                    state.__entries = state_data["origami"]
+                    state.__seed = state_data.get("seed")
+            except Exception as e:
+                logger.warning(f"Ignore unreadable assignment state {state_path} with {e}")
+
+        return state
+
+    def lookup(self,
+               origami_pos: Tuple[int, int],
+               key: str) -> Optional[Tuple[Dict[str, List[str]], Dict[str, Dict[int, str]]]]:
+        """
+        Find the assignment of an origami from the previous run.
+        :param origami_pos: position of the origami
+        :param key: hash of the inputs of the assignment
+        :return: assigned sequences by location and assigned bases by location and csv row of the overhang, or None if
+        the inputs changed
+        """
+        entry = self.__entries.get(self.__pos_name(origami_pos))
+
+        if entry is None or entry["key"] != key:
+            return None
+
+        processed_loc_staples = {loc: list(sequences) for loc, sequences in entry["staples"].items()}
+        loc_overhang_sequence_dict = {loc: {int(row_id): bases for row_id, bases in overhang_bases}
+                                      for loc, overhang_bases in entry["bases"].items()}
+
+        return processed_loc_staples, loc_overhang_sequence_dict
+
+    def record(self,
+               origami_pos: Tuple[int, int],
+               key: str,
+               processed_loc_staples: Dict[str, List[str]],
+               loc_overhang_sequence_dict: Dict[str, Dict[int, str]]) -> None:
+        """
+        Record the assignment of an origami. Order of the overhangs is kept, since complementary overhangs are paired
+        one by one in sorted order.
+        :param origami_pos: position of the origami
+        :param key: hash of the inputs of the assignment
+        :param processed_loc_staples: assigned sequences by location
+        :param loc_overhang_sequence_dict: assigned bases by location and csv row of the overhang
+        :return: None
+        """
+        self.__entries[self.__pos_name(origami_pos)] = {
+            "key": key,
+            "staples": {loc: list(sequences) for loc, sequences in processed_loc_staples.items()},
+            "bases": {loc: [[int(row_id), bases] for row_id, bases in overhang_bases.items()]
+                      for loc, overhang_bases in loc_overhang_sequence_dict.items()}
+        }
+
+    def retain(self, origami_positions: List[Tuple[int, int]]) -> None:
+        """
+        Forget origami removed from the design.
+        :param origami_positions: positions of origami in the design
+        :return: None
+        """
+        pos_names = {self.__pos_name(origami_pos) for origami_pos in origami_positions}
+        self.__entries = {pos_name: entry for pos_name, entry in self.__entries.items() if pos_name in pos_names}
+
+    def save(self) -> None:
+        """
+        Write the state atomically, so an interrupted run never leaves a broken state behind.
+        :return: None
+        """
+        state_dir = os.path.dirname(self.__state_path)
+        if state_dir:
+            os.makedirs(state_dir, exist_ok=True)
+
+        temp_path = f"{self.__state_path}.{os.getpid()}.tmp"
+
+        with open(temp_path, "w") as f:
+            json.dump({"version": ASSIGNMENT_STATE_VERSION, "seed": self.__seed, "origami": self.__entries}, f)
+
+        os.replace(temp_path, self.__state_path)
+
+    @staticmethod
+    def __pos_name(origami_pos: Tuple[int, int]) -> str:
+        return f"{origami_pos[0]},{origami_pos[-1]}"
+
+    def get_state_path(self) -> str:
+        return self.__state_path
+
+    def get_seed(self) -> Optional[int]:
+        return self.__seed
+
+    def set_seed(self, seed: int) -> None:
+        self.__seed = seed
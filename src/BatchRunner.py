@@ -0,0 +1,201 @@
+from __future__ import annotations
+
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Tuple
+
+import pandas as pd
+
+from src.AssignmentState import AssignmentState
+from src.Assigner import Assigner
+from src.DNAOrigami import DNAOrigami
+from src.ExtendedDNAOrigami import ExtendedDNAOrigami
+from src.Extractor import Extractor
+from src.Profiler import Profiler, profile_stage
+from src.SequencePool import SequencePool
+from src.TileCache import TileCache
+
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class BatchResult:
+    """
+    Assigned design of one job in a batch, kept in memory.
+    """
+    config_path: str = None
+    seed: int = None
+    extended_origami: ExtendedDNAOrigami = None
+    assigner: Assigner = None
+
+    def __init__(self, config_path: str, seed: int, extended_origami: ExtendedDNAOrigami, assigner: Assigner) -> None:
+        self.config_path = config_path
+        self.seed = seed
+        self.extended_origami = extended_origami
+        self.assigner = assigner
+
+    def get_assigned_csv(self) -> Dict[Tuple[int, int], pd.DataFrame]:
+        """
+        Copies of the original csv of each origami with assigned bases, as exported by run.py.
+        :return: position: dataframe
+        """
+        return {origami_pos: origami.csv_df_copy
+                for origami_pos, origami in self.extended_origami.get_origami_position().items()}
+
+    def get_origami_bases_assigned(self) -> Dict[Tuple, Dict[str, Dict[int, str]]]:
+        return self.assigner.get_origami_bases_assigned()
+
+    def release(self) -> None:
+        """
+        Drop the design and the assigned bases of this job once they are used.
+        :return: None
+        """
+        self.assigner.release()
+        self.extended_origami.release()
+
+
+class BatchRunner:
+    """
+    Run many assignments in one process. Tiles referenced by several configurations are parsed once and shared, and
+    jobs run concurrently on a bounded number of threads.
+    """
+    __workers: int = 1
+    __use_cache: bool = True  # whether tiles not loaded yet are read from the tile cache
+    # (tile path, modification time, size, scaffold sequence): parsed tile
+    __tiles: Dict[Tuple[str, int, int, Optional[str]], DNAOrigami] = None
+    __tile_locks: Dict[Tuple[str, int, int, Optional[str]], threading.Lock] = None
+    __sequence_pool: SequencePool = None  # staple sequences interned once for all jobs
+    __lock: threading.Lock = None
+
+    def __init__(self, workers: int = 1, use_cache: bool = True) -> None:
+        """
+        :param workers: maximum number of jobs running at the same time
+        :param use_cache: whether tiles not loaded yet are read from the tile cache
+        """
+        if workers < 1:
+            raise Exception("Error: At least one worker is required to run a batch.")
+
+        self.__workers = workers
+        self.__use_cache = use_cache
+        self.__tiles = dict()
+        self.__tile_locks = dict()
+        self.__sequence_pool = SequencePool()
+        self.__lock = threading.Lock()
+
+    def run(self, config_paths: List[str], seeds: List[int] = None) -> List[BatchResult]:
+        """
+        Assign bases for every combination of configuration and seed.
+        :param config_paths: configuration files
+        :param seeds: seeds of the runs; 42 as in --non_random if not provided
+        :return: results in the order of configurations, then seeds
+        """
+        jobs = [(config_path, seed) for config_path in config_paths for seed in (seeds if seeds else [42])]
+
+        if self.__workers == 1 or len(jobs) == 1:
+            return [self.run_job(config_path, seed) for config_path, seed in jobs]
+
+        with ThreadPoolExecutor(max_workers=min(self.__workers, len(jobs))) as executor:
+            futures = [executor.submit(self.run_job, config_path, seed) for config_path, seed in jobs]
+
+            return [future.result() for future in futures]
+
+    def run_job(self, config_path: str, seed: int) -> BatchResult:
+        """
+        Load one design from shared tiles and assign bases.
+        :param config_path: configuration file
+        :param seed: seed of the run
+        :return: result
+        """
+        extended_origami = ExtendedDNAOrigami.load_config(config_path, use_cache=self.__use_cache,
+                                                          tile_loader=self.__load_tile,
+                                                          sequence_pool=self.__sequence_pool)
+        assigner = self.assign_design(extended_origami, seed)
+
+        return BatchResult(config_path, seed, extended_origami, assigner)
+
+    @staticmethod
+    def assign_design(extended_origami: ExtendedDNAOrigami,
+                      seed: int,
+                      workers: int = 1,
+                      state: AssignmentState = None,
+                      verify: str = "fast",
+                      profiler: Profiler = None) -> Assigner:
+        """
+        Extract staples of a loaded design and assign bases.
+        :param extended_origami: loaded design
+        :param seed: seed of the run
+        :param workers: number of worker processes to assign origami
+        :param state: assignment of the previous run for incremental assignment
+        :param verify: verification of the assigned bases, one of off, fast and full
+        :param profiler: profiler timing the extract and assign_bases stages
+        :return: assigner holding the results
+        """
+        with profile_stage(profiler, "extract"):
+            all_origami_loc_staples_dict = Extractor.extract(extended_origami, profiler)
+
+        assigner = Assigner()
+
+        with profile_stage(profiler, "assign_bases"):
+            assigner.assign_bases(all_origami_loc_staples_dict, extended_origami.get_origami_position(),
+                                  seed=seed, workers=workers, grid_index=extended_origami.get_grid_index(),
+                                  scaffold_map=extended_origami.get_scaffold_map(), state=state,
+                                  overhang_constraints=extended_origami.get_overhang_constraints(), verify=verify,
+                                  profiler=profiler)
+
+        return assigner
+
+    def __load_tile(self,
+                    name: str,
+                    origami_data: Dict,
+                    csv_root: str,
+                    scaffold_sequence: Optional[str],
+                    tile_cache: Optional[TileCache]) -> DNAOrigami:
+        """
+        Parse a tile the first time it is referenced and place a fork of it in the design.
+        :param name: origami name
+        :param origami_data: origami data in the configuration file
+        :param csv_root: root path of design files
+        :param scaffold_sequence: scaffold sequence applied to Cadnano 2 json designs
+        :param tile_cache: cache of parsed tiles of the design
+        :return: DNA origami
+        """
+        tile_path = os.path.abspath(os.path.join(csv_root, origami_data["path"]))
+        # a tile edited between runs is parsed again
+        tile_stat = os.stat(tile_path)
+        tile_key = (tile_path, tile_stat.st_mtime_ns, tile_stat.st_size, scaffold_sequence)
+
+        with self.__lock:
+            tile_lock = self.__tile_locks.setdefault(tile_key, threading.Lock())
+
+        # one job parses the tile while the others referencing it wait
+        with tile_lock:
+            if tile_key not in self.__tiles:
+                self.__tiles[tile_key] = DNAOrigami(name, origami_data, csv_root, scaffold_sequence, tile_cache)
+
+        return self.__tiles[tile_key].fork(name, origami_data)
+
+    def release(self) -> None:
+        """
+        Drop all shared tiles and sequences.
+        :return: None
+        """
+        with self.__lock:
+            self.__tiles = dict()
+            self.__tile_locks = dict()
+            self.__sequence_pool = SequencePool()
+
+    def get_tiles(self) -> Dict[Tuple[str, int, int, Optional[str]], DNAOrigami]:
+        return self.__tiles
+
+
+def run_batch(config_paths: List[str], seeds: List[int] = None, workers: int = 1) -> List[BatchResult]:
+    """
+    Assign bases for every combination of configuration and seed in this process.
+    :param config_paths: configuration files
+    :param seeds: seeds of the runs
+    :param workers: maximum number of jobs running at the same time
+    :return: results in the order of configurations, then seeds
+    """
+    return BatchRunner(workers).run(config_paths, seeds)
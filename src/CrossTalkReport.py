@@ -0,0 +1,308 @@
+from __future__ import annotations
+
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional, Set, Tuple
+
+import numpy as np
+import pandas as pd
+
+from src.Assigner import Assigner
+from src.ExtendedDNAOrigami import ExtendedDNAOrigami
+from src.GridIndex import GridIndex
+from src.coordinates import format_helix_base
+
+import logging
+
+from src.utils import config_logging
+
+config_logging()
+logger = logging.getLogger(__name__)
+
+# Longest overhang packed into one 64-bit word at 2 bits per base
+MAX_PACKED_LENGTH = 32
+
+# 2-bit codes of bases, chosen so that the complement of a code is 3 - code
+_CODE_LUT = np.full(256, 255, dtype=np.uint8)
+for _code, _base in enumerate("ACGT"):
+    _CODE_LUT[ord(_base)] = _code
+
+# Overhangs compared with all others at once in one block
+_BLOCK_SIZE = 256
+
+
+def pack_2bit(sequences: List[str]) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Pack sequences into one uint64 each, base p at bits 2p and 2p + 1.
+    :param sequences: sequences of at most 32 bases; other characters than A, C, G and T never pair
+    :return: packed words and validity masks with bit 2p set for every base p that can pair
+    """
+    words = np.zeros(len(sequences), dtype=np.uint64)
+    valid = np.zeros(len(sequences), dtype=np.uint64)
+
+    if not sequences:
+        return words, valid
+
+    lengths = np.fromiter(map(len, sequences), dtype=np.int64, count=len(sequences))
+
+    if lengths.max() > MAX_PACKED_LENGTH:
+        raise Exception(f"Error: Cross-talk report supports overhangs of at most {MAX_PACKED_LENGTH} bases.")
+
+    # sequences padded into a matrix of codes, padding never pairs
+    codes = np.full((len(sequences), MAX_PACKED_LENGTH), 255, dtype=np.uint8)
+    joined = np.frombuffer("".join(sequences).encode("ascii"), dtype=np.uint8)
+    rows = np.repeat(np.arange(len(sequences)), lengths)
+    cols = np.arange(len(joined)) - np.repeat(np.cumsum(lengths) - lengths, lengths)
+    codes[rows, cols] = _CODE_LUT[joined]
+
+    is_base = codes < 4
+    shifts = (2 * np.arange(MAX_PACKED_LENGTH)).astype(np.uint64)
+
+    np.bitwise_or.reduce(np.where(is_base, codes, 0).astype(np.uint64) << shifts, axis=1, out=words)
+    np.bitwise_or.reduce(is_base.astype(np.uint64) << shifts, axis=1, out=valid)
+
+    return words, valid
+
+
+def reverse_complement_2bit(words: np.ndarray, valid: np.ndarray, lengths: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Reverse complement packed sequences without unpacking them.
+    :param words: packed words
+    :param valid: validity masks
+    :param lengths: number of bases of each sequence
+    :return: packed words and validity masks of the reverse complements
+    """
+    reversed_words = np.zeros_like(words)
+    reversed_valid = np.zeros_like(valid)
+    lengths = np.asarray(lengths, dtype=np.int64)
+
+    for position in range(MAX_PACKED_LENGTH):
+        has_position = position < lengths
+        # base p moves to length - 1 - p
+        target = np.where(has_position, lengths - 1 - position, 0).astype(np.uint64) * np.uint64(2)
+        code = (words >> np.uint64(2 * position)) & np.uint64(3)
+        bit = (valid >> np.uint64(2 * position)) & np.uint64(1)
+
+        reversed_words |= np.where(has_position, (np.uint64(3) - code) * bit, 0).astype(np.uint64) << target
+        reversed_valid |= np.where(has_position, bit, 0).astype(np.uint64) << target
+
+    return reversed_words, reversed_valid
+
+
+def max_complementary_runs(words: np.ndarray,
+                           valid: np.ndarray,
+                           rc_words: np.ndarray,
+                           rc_valid: np.ndarray) -> np.ndarray:
+    """
+    Longest run of consecutive base pairs between every sequence of one block and every reverse complement of another
+    block, over all alignments of the antiparallel strands.
+    :param words: packed sequences of the first block
+    :param valid: validity masks of the first block
+    :param rc_words: packed reverse complements of the second block
+    :param rc_valid: validity masks of the reverse complements
+    :return: (first block, second block) uint8 array of run lengths
+    """
+    words = words[:, None]
+    valid = valid[:, None]
+    rc_words = rc_words[None, :]
+    rc_valid = rc_valid[None, :]
+    best = np.zeros((words.shape[0], rc_words.shape[1]), dtype=np.uint8)
+
+    for shift in range(-(MAX_PACKED_LENGTH - 1), MAX_PACKED_LENGTH):
+        # base p of the sequence against base p - shift of the reverse complement
+        if shift >= 0:
+            shifted_words, shifted_valid = rc_words << np.uint64(2 * shift), rc_valid << np.uint64(2 * shift)
+        else:
+            shifted_words, shifted_valid = rc_words >> np.uint64(-2 * shift), rc_valid >> np.uint64(-2 * shift)
+
+        # bit 2p is set where both bases exist and are equal, i.e. the original bases pair
+        diff = words ^ shifted_words
+        matches = ~(diff | (diff >> np.uint64(1))) & valid & shifted_valid
+
+        # each step removes the last base of every run, so the number of steps is the longest run
+        run = np.zeros(best.shape, dtype=np.uint8)
+        while True:
+            has_run = matches != 0
+            if not has_run.any():
+                break
+
+            run += has_run
+            matches &= matches >> np.uint64(2)
+
+        np.maximum(best, run, out=best)
+
+    return best
+
+
+def _risky_pairs(block_start: int,
+                 block_end: int,
+                 words: np.ndarray,
+                 valid: np.ndarray,
+                 rc_words: np.ndarray,
+                 rc_valid: np.ndarray,
+                 min_run: int) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Pairs (i, j) with i in the block and i < j whose longest complementary run reaches the threshold.
+    :return: first indexes, second indexes and run lengths
+    """
+    runs = max_complementary_runs(words[block_start: block_end], valid[block_start: block_end],
+                                  rc_words[block_start:], rc_valid[block_start:])
+
+    # upper triangle only, every pair once
+    first, second = np.nonzero(runs >= min_run)
+    upper = block_start + first < block_start + second
+    first, second = first[upper], second[upper]
+
+    return block_start + first, block_start + second, runs[first, second]
+
+
+class CrossTalkReport:
+    """
+    Ranked report of overhang pairs which partially hybridize with each other although they are not meant to pair.
+    Overhangs are packed 2 bits per base into one 64-bit word, so all pairs are compared with word operations in
+    blocks instead of base by base.
+    """
+    __origami_pos: List[Tuple[int, int]] = None  # origami of each overhang
+    __locations: List[str] = None  # t, b, l or r of each overhang
+    __order: List[int] = None  # index of each overhang in its location of the origami
+    __start: np.ndarray = None  # helix[base] of both ends of each overhang
+    __end: np.ndarray = None
+    __sequences: List[str] = None  # assigned bases of each overhang from 5' to 3'
+    __partners: Set[Tuple[int, int]] = None  # pairs of overhangs designed to pair with each other
+
+    @classmethod
+    def load_data(cls, assigner: Assigner, extended_dna_origami: ExtendedDNAOrigami) -> CrossTalkReport:
+        """
+        Collect the assigned overhangs of every origami. The bases of an overhang are the ones unassigned in the
+        original csv, read from the assigned staple from 5' to 3'.
+        :param assigner: assigner after assign_bases
+        :param extended_dna_origami: loaded design
+        :return: cls()
+        """
+        report = cls()
+        report.__origami_pos, report.__locations, report.__order, report.__sequences = [], [], [], []
+        start_helix, start_base, end_helix, end_base = [], [], [], []
+        overhang_ids: Dict[Tuple[Tuple[int, int], str], List[int]] = dict()
+
+        origami_position = extended_dna_origami.get_origami_position()
+
+        for origami_pos, tbrlnm_staples_dict in sorted(assigner.get_input_origami_staples().items()):
+            original_sequences = origami_position[origami_pos].get_csv_df()["Sequence"].to_numpy()
+
+            for staples_loc in ["t", "b", "l", "r"]:
+                staple_table = tbrlnm_staples_dict.get(staples_loc, None)
+
+                if staple_table is None:
+                    continue
+
+                overhang_ids[(origami_pos, staples_loc)] = list(range(len(report.__sequences),
+                                                                      len(report.__sequences) + len(staple_table)))
+
+                for order, (original_sequence, assigned_sequence) in enumerate(zip(
+                        original_sequences[staple_table.get_row_id()].tolist(), staple_table.get_sequences())):
+                    report.__origami_pos.append(origami_pos)
+                    report.__locations.append(staples_loc)
+                    report.__order.append(order)
+                    report.__sequences.append(
+                        assigned_sequence[original_sequence.find("?"): original_sequence.rfind("?") + 1])
+
+                start_helix.append(staple_table.get_helix_index()[0])
+                start_base.append(staple_table.get_base_index()[0])
+                end_helix.append(staple_table.get_helix_index()[1])
+                end_base.append(staple_table.get_base_index()[1])
+
+        if report.__sequences:
+            report.__start = format_helix_base(np.concatenate(start_helix), np.concatenate(start_base))
+            report.__end = format_helix_base(np.concatenate(end_helix), np.concatenate(end_base))
+        else:
+            report.__start = report.__end = np.zeros(0, dtype=object)
+
+        report.__partners = cls.__find_partners(overhang_ids, extended_dna_origami.get_grid_index())
+
+        return report
+
+    @staticmethod
+    def __find_partners(overhang_ids: Dict[Tuple[Tuple[int, int], str], List[int]],
+                        grid_index: GridIndex) -> Set[Tuple[int, int]]:
+        """
+        Top overhangs pair one by one in sorted order with bottom overhangs of the origami above.
+        :param overhang_ids: (position, location): ids of its overhangs
+        :param grid_index: grid index of the design
+        :return: pairs of ids, smaller id first
+        """
+        partners = set()
+
+        for (origami_pos, staples_loc), ids in overhang_ids.items():
+            if staples_loc != "t":
+                continue
+
+            paired_ids = overhang_ids.get((grid_index.neighbour(origami_pos, "t"), "b"), [])
+
+            partners.update((min(overhang_id, paired_id), max(overhang_id, paired_id))
+                            for overhang_id, paired_id in zip(ids, paired_ids))
+
+        return partners
+
+    def analyse(self, min_run: int = 6, top: Optional[int] = None, workers: int = 1) -> pd.DataFrame:
+        """
+        Find overhang pairs, other than designed partners, with at least min_run consecutive complementary bases.
+        :param min_run: shortest run of complementary bases reported
+        :param top: number of riskiest pairs kept; all pairs if not provided
+        :param workers: number of worker processes comparing blocks of overhangs
+        :return: report ranked by the longest complementary run
+        """
+        words, valid = pack_2bit(self.__sequences)
+        rc_words, rc_valid = reverse_complement_2bit(
+            words, valid, np.fromiter(map(len, self.__sequences), dtype=np.int64, count=len(self.__sequences)))
+
+        blocks = [(block_start, min(block_start + _BLOCK_SIZE, len(self.__sequences)))
+                  for block_start in range(0, len(self.__sequences), _BLOCK_SIZE)]
+        block_args = [(block_start, block_end, words, valid, rc_words, rc_valid, min_run)
+                      for block_start, block_end in blocks]
+
+        if workers > 1 and len(blocks) > 1:
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                results = list(executor.map(_risky_pairs, *zip(*block_args)))
+        else:
+            results = [_risky_pairs(*args) for args in block_args]
+
+        first = np.concatenate([result[0] for result in results]) if results else np.zeros(0, dtype=np.int64)
+        second = np.concatenate([result[1] for result in results]) if results else np.zeros(0, dtype=np.int64)
+        runs = np.concatenate([result[2] for result in results]) if results else np.zeros(0, dtype=np.uint8)
+
+        not_partner = np.array([(i, j) not in self.__partners for i, j in zip(first.tolist(), second.tolist())],
+                               dtype=bool)
+        first, second, runs = first[not_partner], second[not_partner], runs[not_partner]
+
+        # longest runs first, ties in the order of the overhangs
+        rank = np.lexsort((second, first, -runs.astype(np.int64)))
+        if top is not None:
+            rank = rank[:top]
+
+        first, second, runs = first[rank], second[rank], runs[rank]
+
+        logger.info(f"Found {len(rank)} overhang pairs with at least {min_run} complementary bases among "
+                    f"{len(self.__sequences)} overhangs")
+
+        return pd.DataFrame({
+            "Run": runs.astype(np.int64),
+            **self.__describe(first, "1"),
+            **self.__describe(second, "2")
+        })
+
+    def __describe(self, ids: np.ndarray, suffix: str) -> Dict[str, List]:
+        origami_pos = [self.__origami_pos[overhang_id] for overhang_id in ids.tolist()]
+
+        return {
+            f"Origami_{suffix}": [f"{pos[0]},{pos[-1]}" for pos in origami_pos],
+            f"Location_{suffix}": [self.__locations[overhang_id] for overhang_id in ids.tolist()],
+            f"Index_{suffix}": [self.__order[overhang_id] for overhang_id in ids.tolist()],
+            f"Start_{suffix}": self.__start[ids].tolist(),
+            f"End_{suffix}": self.__end[ids].tolist(),
+            f"Sequence_{suffix}": [self.__sequences[overhang_id] for overhang_id in ids.tolist()]
+        }
+
+    def get_sequences(self) -> List[str]:
+        return self.__sequences
+
+    def get_partners(self) -> Set[Tuple[int, int]]:
+        return self.__partners
@@ -1,10 +1,18 @@
+from __future__ import annotations
+
+import copy
 import os.path
-import re
-from typing import Dict, Tuple, List
+from typing import Dict, Tuple, List, Optional, TYPE_CHECKING
 
 import numpy as np
 import pandas as pd
 
+from src.cadnano_json import read_cadnano_json
+from src.coordinates import parse_helix_base, narrowest_int_dtype, format_helix_base
+
+if TYPE_CHECKING:
+    from src.TileCache import TileCache
+
 
 class DNAOrigami:
     """
@@ -16,14 +24,46 @@ class DNAOrigami:
     origami_name: str = None
     position: Tuple  # Position of the origami component in the whole design
     helix_shift: int = 0  # scaffold bases recorded from helix indexed from 0 but other design may shift this down
+    scaffold_path: Optional[np.ndarray] = None  # (helix, base) of scaffold nucleotides, only from Cadnano designs
 
-    def __init__(self, name: str, origami_data: Dict, csv_root: str = "") -> None:
+    def __init__(self,
+                 name: str,
+                 origami_data: Dict,
+                 csv_root: str = "",
+                 scaffold_sequence: str = None,
+                 tile_cache: TileCache = None) -> None:
+        """
+        :param name: origami name
+        :param origami_data: origami data in the configuration file, with either a csv or a Cadnano 2 json path
+        :param csv_root: root path of design files
+        :param scaffold_sequence: scaffold sequence applied to Cadnano 2 json designs
+        :param tile_cache: cache of parsed tiles, no caching if not provided
+        """
         csv_path = os.path.join(csv_root, origami_data["path"])
-        self.__csv_df = pd.read_csv(csv_path, delimiter=",")
-        self.csv_df_copy = self.__csv_df.copy()
+        is_cadnano = os.path.splitext(csv_path)[1].lower() == ".json"
+
+        cache_key = tile_cache.key(csv_path, scaffold_sequence) if tile_cache is not None else None
+        cached_tile = tile_cache.load(cache_key) if cache_key is not None else None
+
+        if cached_tile is not None:
+            # parsed before, no parsing at all
+            self.__csv_df, self.csv_df_copy, self.scaffold_path = cached_tile
+        elif is_cadnano:
+            # staples are read with split helix and base indexes directly
+            self.__csv_df, self.scaffold_path = read_cadnano_json(csv_path, scaffold_sequence)
+            self.csv_df_copy = pd.DataFrame({
+                "Start": format_helix_base(self.__csv_df["Start"], self.__csv_df["Start_base"]),
+                "End": format_helix_base(self.__csv_df["End"], self.__csv_df["End_base"]),
+                "Sequence": self.__csv_df["Sequence"],
+                "Length": self.__csv_df["Length"],
+                "Color": self.__csv_df["Color"]
+            })
+        else:
+            self.__csv_df = pd.read_csv(csv_path, delimiter=",", dtype={"Color": "category"})
+            self.csv_df_copy = self.__csv_df.copy()
 
         try:
-            assert len(self.__csv_df.columns) == 5  # integrity of the csv file
+            assert len(self.csv_df_copy.columns) == 5  # integrity of the csv file
             test_random_sequence = self.__csv_df.loc[0, "Sequence"]
         except Exception as e:
             raise Exception(f"Error: Incorrect data in CSV file with {e}")
@@ -31,6 +71,27 @@ class DNAOrigami:
         if test_random_sequence == "?" * len(test_random_sequence):
             raise Exception("Error: Sequences have not been assigned for the origami design")
 
+        self.__place(name, origami_data)
+
+        if cached_tile is None and not is_cadnano:
+            # Split the helix and base information into two columns
+            self.__split_helix_base("Start")
+            self.__split_helix_base("End")
+
+            # Lengths are small numbers, so keep them in the narrowest type as well
+            lengths = self.__csv_df["Length"].to_numpy()
+            self.__csv_df["Length"] = lengths.astype(narrowest_int_dtype(lengths))
+
+        if cache_key is not None and cached_tile is None:
+            tile_cache.store(cache_key, self.__csv_df, self.csv_df_copy, self.scaffold_path)
+
+    def __place(self, name: str, origami_data: Dict) -> None:
+        """
+        Load the name, position and helix shift of the origami in the design.
+        :param name: origami name
+        :param origami_data: origami data in the configuration file
+        :return: None
+        """
         try:
             # Helix shift due to the redesign of the pre-determined origami
             self.helix_shift = origami_data["shift"]
@@ -43,35 +104,52 @@ class DNAOrigami:
         # Name
         self.origami_name = name
 
-        # Split the helix and base information into two columns
-        _delimiter = ["[", "]"]
-        self.__split_helix_base(_delimiter, "Start")
-        self.__split_helix_base(_delimiter, "End")
+    def fork(self, name: str, origami_data: Dict) -> DNAOrigami:
+        """
+        Place the same tile in another design. The parsed staples are only read during assignment, so they are shared;
+        the copy of the original csv receives assigned bases and is copied.
+        :param name: origami name
+        :param origami_data: origami data in the configuration file
+        :return: new DNA origami
+        """
+        origami = copy.copy(self)
+        origami.csv_df_copy = self.csv_df_copy.copy()
+        origami.__place(name, origami_data)
+
+        return origami
 
-    def __split_helix_base(self, delimiters: List[str], column_name: str):
+    def __split_helix_base(self, column_name: str):
         """
         Split helix and base indexes from column Start and End in the form of helix_idx[base_idx]
-        :param delimiters: list of delimiters of column Start and End
         :param column_name: Start or End
         :return: None
         """
         # split helix and base index
-        _helix_arr, _base_arr = \
-            zip(*[
-                re.split('|'.join(map(re.escape, delimiters)), s)[:2] for s in
-                self.__csv_df.loc[:, column_name].values
-            ])
+        _helix_arr, _base_arr = parse_helix_base(self.__csv_df[column_name].to_numpy(), column_name)
 
         # replace helix index
-        self.__csv_df[column_name] = np.array(list(map(int, _helix_arr)), dtype=np.int8)
+        self.__csv_df[column_name] = _helix_arr
 
         # insert base index column
         self.__csv_df.insert(
             1 if column_name == "Start" else 3,
             f"{column_name}_base",
-            np.array(list(map(int, _base_arr)), dtype=np.int16),
+            _base_arr,
             allow_duplicates=True
         )
 
+    def update_sequences(self, row_ids: np.ndarray, sequences: List[str]) -> None:
+        """
+        Write assigned sequences back to the copy of the original csv in one update.
+        :param row_ids: rows of the staples in the csv
+        :param sequences: assigned sequences in the same order
+        :return: None
+        """
+        if len(row_ids) != len(sequences):
+            raise Exception("Error: Number of assigned sequences does not match the number of rows to update.")
+
+        if len(row_ids):
+            self.csv_df_copy.loc[row_ids, "Sequence"] = sequences
+
     def get_csv_df(self) -> pd.DataFrame:
         return self.__csv_df
@@ -2,9 +2,16 @@ from __future__ import annotations
 
 import argparse
 import json
-from typing import Tuple, Dict
+from typing import Tuple, Dict, Callable, Optional
 
 from src.DNAOrigami import DNAOrigami
+from src.GridIndex import GridIndex
+from src.Profiler import Profiler, profile_tile
+from src.ScaffoldMap import ScaffoldMap
+from src.SequencePool import SequencePool
+from src.StapleTable import StapleTable
+from src.TileCache import TileCache
+from src.tile_pool import load_origami_in_pool
 
 import logging
 
@@ -20,24 +27,107 @@ class ExtendedDNAOrigami:
     """
     __size: Tuple  # Dimension of the design
     __color_setting: Dict[str, str]  # color setting for all staples
-    __origami_position_dict: Dict[Tuple[int, int], DNAOrigami] = dict()  # each origami chip and its position
+    __origami_position_dict: Dict[Tuple[int, int], DNAOrigami]  # each origami chip and its position
     __csv_root_path: str  # root path of csv files for each origami in design
+    __scaffold_setting: Dict  # optional scaffold sequence and path files
+    __overhang_constraints: Dict  # optional constraints of random overhang bases
+    __extracted_staples_dict: Dict[Tuple[int, int], Dict[str, StapleTable]]  # staples extracted in a process pool
+    __grid_index: GridIndex  # index of origami positions for neighbour queries
+    __scaffold_map: ScaffoldMap  # staple bases complementary to the scaffold
+    __sequence_pool: SequencePool  # interned staple sequences of all origami
 
     @classmethod
-    def load_design(cls, args: argparse.Namespace) -> ExtendedDNAOrigami:
+    def load_design(cls, args: argparse.Namespace, profiler: Profiler = None) -> ExtendedDNAOrigami:
         """
         Factory method to load data from the configuration file.
         :param args: argument namespace containing configuration file and csv file root path, saving file name
+        :param profiler: profiler timing each origami
+        :return: cls()
+        """
+        return cls.load_config(args.config,
+                               workers=getattr(args, "workers", 1) or 1,
+                               use_cache=not getattr(args, "no_cache", False),
+                               profiler=profiler)
+
+    @classmethod
+    def load_config(cls,
+                    config_path: str,
+                    workers: int = 1,
+                    use_cache: bool = True,
+                    tile_loader: Callable[[str, Dict, str, Optional[str], Optional[TileCache]], DNAOrigami] = None,
+                    sequence_pool: SequencePool = None,
+                    profiler: Profiler = None) -> ExtendedDNAOrigami:
+        """
+        Factory method to load data from the configuration file without command line arguments.
+        :param config_path: configuration file path
+        :param workers: number of worker processes to load origami
+        :param use_cache: whether parsed tiles are loaded from and stored in the tile cache
+        :param tile_loader: function of origami name, origami data, csv root path, scaffold sequence and tile cache
+        returning the DNA origami, e.g. to share tiles between designs; origami are parsed from their files if not
+        provided
+        :param sequence_pool: pool staple sequences are interned in, e.g. to share them between designs; a pool of this
+        design if not provided
+        :param profiler: profiler timing each origami
         :return: cls()
         """
         ext_dns_ori = cls()
+        ext_dns_ori.__extracted_staples_dict = dict()
+        ext_dns_ori.__origami_position_dict = dict()
+        ext_dns_ori.__sequence_pool = sequence_pool if sequence_pool is not None else SequencePool()
 
         # Load configuration file
-        origami_data = ext_dns_ori.__load_configuration(args.config)
-
-        for name, data in origami_data.items():
-            temp_origami = DNAOrigami(name, data, ext_dns_ori.__csv_root_path)
-            ext_dns_ori.__origami_position_dict[temp_origami.position] = temp_origami
+        origami_data = ext_dns_ori.__load_configuration(config_path)
+
+        # Scaffold sequence applied to Cadnano 2 json designs
+        scaffold_sequence = None
+        if ext_dns_ori.__scaffold_setting is not None and "sequence" in ext_dns_ori.__scaffold_setting:
+            scaffold_sequence = ScaffoldMap.read_scaffold_sequence(ext_dns_ori.__scaffold_setting["sequence"])
+
+        # Parsed tiles are reused unless disabled
+        tile_cache = TileCache(ext_dns_ori.__color_setting) if use_cache else None
+
+        positions = []
+
+        if tile_loader is not None:
+            for name, data in origami_data.items():
+                with profile_tile(profiler, "load_design", (data.get("x"), data.get("y"))):
+                    temp_origami = tile_loader(name, data, ext_dns_ori.__csv_root_path, scaffold_sequence, tile_cache)
+
+                ext_dns_ori.__origami_position_dict[temp_origami.position] = temp_origami
+                positions.append(temp_origami.position)
+        elif workers > 1:
+            # parse, validate and extract origami in a process pool
+            for temp_origami, location_staples in load_origami_in_pool(origami_data, ext_dns_ori.__csv_root_path,
+                                                                       ext_dns_ori.__color_setting, workers,
+                                                                       scaffold_sequence, tile_cache, profiler):
+                ext_dns_ori.__origami_position_dict[temp_origami.position] = temp_origami
+                ext_dns_ori.__extracted_staples_dict[temp_origami.position] = location_staples
+
+                # identical sequences of different origami are shared again after crossing process boundaries
+                for staple_table in location_staples.values():
+                    staple_table.rebind(ext_dns_ori.__sequence_pool)
+
+                positions.append(temp_origami.position)
+        else:
+            for name, data in origami_data.items():
+                with profile_tile(profiler, "load_design", (data.get("x"), data.get("y"))):
+                    temp_origami = DNAOrigami(name, data, ext_dns_ori.__csv_root_path, scaffold_sequence, tile_cache)
+
+                ext_dns_ori.__origami_position_dict[temp_origami.position] = temp_origami
+                positions.append(temp_origami.position)
+
+        # Sanity check of positions against the size of the design
+        ext_dns_ori.__grid_index = GridIndex.from_positions(positions, ext_dns_ori.__size)
+
+        # Scaffold threaded through the origami; the pre-determined scaffold windows if not configured
+        if ext_dns_ori.__scaffold_setting is not None:
+            # origami share the scaffold layout, so the path of any Cadnano 2 design can be used
+            cadnano_paths = [ext_dns_ori.__origami_position_dict[origami_pos].scaffold_path for origami_pos in positions
+                             if ext_dns_ori.__origami_position_dict[origami_pos].scaffold_path is not None]
+            ext_dns_ori.__scaffold_map = ScaffoldMap.from_files(ext_dns_ori.__scaffold_setting,
+                                                                cadnano_paths[0] if cadnano_paths else None)
+        else:
+            ext_dns_ori.__scaffold_map = ScaffoldMap.from_windows()
 
         return ext_dns_ori
 
@@ -58,12 +148,25 @@ class ExtendedDNAOrigami:
             self.__size = (config_data["size_x"], config_data["size_y"])
             self.__color_setting = config_data["colors"]
             self.__csv_root_path = config_data["csv_root_path"]
+            self.__scaffold_setting = config_data.get("scaffold", None)
+            self.__overhang_constraints = config_data.get("overhang_constraints", None)
             assert config_data["DNA_origami"] is not None
         except Exception as e:
             raise Exception(f"Error: Incorrect data in JSON with {e}")
 
         return config_data["DNA_origami"]
 
+    def release(self) -> None:
+        """
+        Drop the origami, their staples and the scaffold map of the design so that they can be freed.
+        :return: None
+        """
+        self.__origami_position_dict = dict()
+        self.__extracted_staples_dict = dict()
+        self.__grid_index = GridIndex.from_positions([])
+        self.__scaffold_map = None
+        self.__sequence_pool = SequencePool()
+
     def get_color_setting(self) -> Dict[str, str]:
         return self.__color_setting
 
@@ -72,3 +175,18 @@ class ExtendedDNAOrigami:
 
     def get_origami_position(self) -> Dict[Tuple[int, int], DNAOrigami]:
         return self.__origami_position_dict
+
+    def get_grid_index(self) -> GridIndex:
+        return self.__grid_index
+
+    def get_extracted_staples(self) -> Dict[Tuple[int, int], Dict[str, StapleTable]]:
+        return self.__extracted_staples_dict
+
+    def get_scaffold_map(self) -> ScaffoldMap:
+        return self.__scaffold_map
+
+    def get_overhang_constraints(self) -> Dict:
+        return self.__overhang_constraints
+
+    def get_sequence_pool(self) -> SequencePool:
+        return self.__sequence_pool
@@ -1,10 +1,17 @@
-from collections import defaultdict
-from typing import List, Dict, Tuple
+from __future__ import annotations
 
+from typing import Dict, Tuple, TYPE_CHECKING
+
+import numpy as np
 import pandas as pd
 
-from src.ExtendedDNAOrigami import ExtendedDNAOrigami
-from src.Staple import Staple
+from src.DNAOrigami import DNAOrigami
+from src.Profiler import Profiler, profile_tile
+from src.SequencePool import SequencePool
+from src.StapleTable import StapleTable
+
+if TYPE_CHECKING:
+    from src.ExtendedDNAOrigami import ExtendedDNAOrigami
 
 pd.set_option('display.width', 400)
 pd.set_option('display.max_columns', 10)
@@ -16,81 +23,119 @@ class Extractor:
     """
 
     @classmethod
-    def extract(cls, extended_origami: ExtendedDNAOrigami) -> Dict[Tuple, Dict[str, List[Staple]]]:
+    def extract(cls,
+                extended_origami: ExtendedDNAOrigami,
+                profiler: Profiler = None) -> Dict[Tuple, Dict[str, StapleTable]]:
         """
         Extract overhangs and normal staples.
         :param cls: class
         :param extended_origami: Extended DNA origami
+        :param profiler: profiler timing each origami and counting its staples and overhangs
         :return: five types of staples (left, right, top, bottom, normal) for each origami
         """
         origami_loc_staples_dict = dict()
-        side_color = extended_origami.get_color_setting()["side_overhang"]
-        other_color = extended_origami.get_color_setting()["other_overhang"]
-        modified_color = extended_origami.get_color_setting()["modified_staples"]
-
-        for origami_pos, origami_chip in extended_origami.get_origami_position().items():
-            # Group the dataframe by colors, and find overhangs
-            csv_df_copy = origami_chip.get_csv_df().copy()
-            grouped_df = csv_df_copy.groupby("Color")
 
-            location_staples = defaultdict(list)  # store locations and associated staples for each origami
+        # origami loaded in a process pool have been extracted there already
+        extracted_staples = extended_origami.get_extracted_staples()
 
-            for loc, color in enumerate([other_color, side_color, modified_color]):
-                if color in grouped_df.groups.keys():
-                    # origami possibly has overhangs and modified inactive staples
-                    color_group = grouped_df.get_group(color)  # staples in this color
-                    color_group = Extractor.sort_staples_for_output(color_group, loc)  # Sort the staples for output
-                    cls.filter_staple_by_location(color_group, location_staples, extended_origami)
+        for origami_pos, origami_chip in extended_origami.get_origami_position().items():
+            if origami_pos in extracted_staples:
+                location_staples = extracted_staples[origami_pos]
+            else:
+                with profile_tile(profiler, "extract", origami_pos):
+                    location_staples = cls.extract_origami(origami_chip, extended_origami.get_color_setting(),
+                                                           extended_origami.get_sequence_pool())
 
             origami_loc_staples_dict[origami_chip.position] = location_staples
 
+            if profiler is not None:
+                profiler.count("staples", len(origami_chip.get_csv_df()))
+                profiler.count("overhangs", sum(len(staple_table) for loc, staple_table in location_staples.items()
+                                                if loc in ["t", "b", "l", "r"]))
+
         return origami_loc_staples_dict
 
+    @classmethod
+    def extract_origami(cls,
+                        origami_chip: DNAOrigami,
+                        color_setting: Dict[str, str],
+                        pool: SequencePool = None) -> Dict[str, StapleTable]:
+        """
+        Extract overhangs and normal staples of one origami.
+        :param origami_chip: DNA origami
+        :param color_setting: color for different staples such as overhangs, pre-determined staples.
+        :param pool: pool staple sequences are interned in
+        :return: location and associated staples
+        """
+        side_color = color_setting["side_overhang"]
+        other_color = color_setting["other_overhang"]
+        modified_color = color_setting["modified_staples"]
+
+        # Group the dataframe by colors, and find overhangs
+        csv_df = origami_chip.get_csv_df()
+        grouped_df = csv_df.groupby("Color", observed=True)
+
+        sorted_rows = []  # rows of the staples in output order
+
+        for loc, color in enumerate([other_color, side_color, modified_color]):
+            if color in grouped_df.groups.keys():
+                # origami possibly has overhangs and modified inactive staples
+                color_group = grouped_df.get_group(color)  # staples in this color
+                sorted_rows.append(color_group.index[Extractor.staple_sort_order(color_group, loc)])
+
+        if not sorted_rows:
+            return dict()
+
+        staple_table = StapleTable.from_dataframe(csv_df.loc[np.concatenate(sorted_rows)], color_setting, pool)
+
+        return cls.filter_staple_by_location(staple_table)
+
     @staticmethod
-    def sort_staples_for_output(groupby_obj: pd.DataFrame, side: int) -> pd.DataFrame:
+    def staple_sort_order(groupby_obj: pd.DataFrame, side: int) -> np.ndarray:
         """
-        Sort grouped-by-color dataframe from left to right based on base index and from top to bottom based on helix
-        index.
+        Order of grouped-by-color staples from left to right based on base index and from top to bottom based on helix
+        index. Ties on the sort key are broken by the other index of the same end, and the sort is stable.
         :param groupby_obj: grouped dataframe object with one color
         :param side: condition (0 for top or bottom staples and 1 for sided staples)
-        :return: sorted dataframe
+        :return: positions of the staples in the group in sorted order
         """
-        groupby_obj_copy = groupby_obj.copy()
+        start_helix = groupby_obj["Start"].to_numpy()
+        start_base = groupby_obj["Start_base"].to_numpy()
+        end_helix = groupby_obj["End"].to_numpy()
+        end_base = groupby_obj["End_base"].to_numpy()
 
         # find the end out of the scaffold and use it to sort
         # TODO: two ends both out of the scaffold
         if side == 1:
             # right or left
-            groupby_obj_copy["compare"] = groupby_obj_copy.apply(
-                lambda row: row["Start"] if row["Start_base"] > row["End_base"] else row["End"], axis=1)
+            use_start = start_base > end_base
+            compare = np.where(use_start, start_helix, end_helix)
+            tie_breaker = np.where(use_start, start_base, end_base)
         else:
             # top or bottom or modified staples
-            groupby_obj_copy["compare"] = groupby_obj_copy.apply(
-                lambda row: row["Start_base"] if row["Start"] > row["End"] else row["End_base"], axis=1)
+            use_start = start_helix > end_helix
+            compare = np.where(use_start, start_base, end_base)
+            tie_breaker = np.where(use_start, start_helix, end_helix)
 
-        groupby_obj_copy = groupby_obj_copy.sort_values(by="compare", ascending=True)
-        del groupby_obj_copy["compare"]
+        # the last key is the primary one
+        return np.lexsort((tie_breaker, compare))
 
-        return groupby_obj_copy
+    @staticmethod
+    def sort_staples_for_output(groupby_obj: pd.DataFrame, side: int) -> pd.DataFrame:
+        """
+        Sort grouped-by-color dataframe from left to right based on base index and from top to bottom based on helix
+        index.
+        :param groupby_obj: grouped dataframe object with one color
+        :param side: condition (0 for top or bottom staples and 1 for sided staples)
+        :return: sorted dataframe
+        """
+        return groupby_obj.iloc[Extractor.staple_sort_order(groupby_obj, side)]
 
     @staticmethod
-    def filter_staple_by_location(group_df: pd.DataFrame,
-                                  location_staples: Dict[str, List[Staple]],
-                                  extended_origami: ExtendedDNAOrigami) -> None:
+    def filter_staple_by_location(staple_table: StapleTable) -> Dict[str, StapleTable]:
         """
         Classify staples by their locations determined before.
-        :param group_df: grouped staple dataframe by the color
-        :param location_staples: dict to store staples of different locations
-        :param extended_origami: extended origami object
-        :return: None
+        :param staple_table: sorted staples of the overhang and modified colors
+        :return: dict of locations and associated staples
         """
-        for idx, row in group_df.iterrows():
-            staple = Staple(row, extended_origami.get_color_setting())
-            staple_location = staple.get_position()
-
-            if staple.is_overhang:
-                location_staples[staple_location].append(staple)
-            elif staple_location == "modified":
-                location_staples["modified"].append(staple)
-            else:
-                location_staples["normal"].append(staple)
+        return staple_table.split_by_location()
@@ -1,15 +1,18 @@
 from __future__ import annotations
 
-import csv
 import glob
 import os
 from copy import copy
-from typing import Tuple, Dict, List
+from typing import Tuple, Dict, Set
+
+import pandas as pd
 
 from src.Assigner import Assigner
 from src.DNAOrigami import DNAOrigami
 from src.ExtendedDNAOrigami import ExtendedDNAOrigami
-from src.Staple import Staple
+from src.Profiler import Profiler
+from src.ResultWriter import ResultWriter
+from src.StapleTable import StapleTable
 
 import logging
 
@@ -21,8 +24,10 @@ logger = logging.getLogger(__name__)
 
 class Generator:
     __config_name: str
-    __origami_loc_staples_dict: Dict[Tuple, Dict[str, List[Staple]]] = dict()
-    __origami_position_dict: Dict[Tuple, DNAOrigami] = dict()
+    __origami_loc_staples_dict: Dict[Tuple, Dict[str, StapleTable]] = None
+    __origami_position_dict: Dict[Tuple, DNAOrigami] = None
+    __reused_origami: Set[Tuple] = None  # origami whose assignment is unchanged since the previous run
+    __profiler: Profiler = None  # profiler timing the export of each origami
 
     __notation_equal = "=" * 64
     __notation_larger = ">" * 3
@@ -36,8 +41,12 @@ class Generator:
     }
 
     @classmethod
-    def load_data(cls, assigner: Assigner, extended_dna_origami: ExtendedDNAOrigami) -> Generator:
+    def load_data(cls,
+                  assigner: Assigner,
+                  extended_dna_origami: ExtendedDNAOrigami,
+                  profiler: Profiler = None) -> Generator:
         generator = cls()
+        generator.__profiler = profiler
 
         # load origami positions
         generator.__origami_position_dict = extended_dna_origami.get_origami_position()
@@ -45,8 +54,21 @@ class Generator:
         # load assigned overhangs and added normal staples
         generator.__origami_loc_staples_dict = assigner.get_input_origami_staples()
 
+        # origami reused from the previous run keep their exported csv
+        generator.__reused_origami = set(assigner.get_reused_origami())
+
         return generator
 
+    def release(self) -> None:
+        """
+        Drop references to the assigned design once it is exported.
+        :return: None
+        """
+        self.__origami_loc_staples_dict = dict()
+        self.__origami_position_dict = dict()
+        self.__reused_origami = set()
+        self.__profiler = None
+
     def export_only_bases_added(self, args):
         result_name = self.__generate_results_name(args.save_path)
         tags = ["Start", "End", "Sequence", "Length", "Color"]
@@ -57,25 +79,24 @@ class Generator:
 
         save_folder_path = self.__check_save_dir(args.save_path, result_name)
 
-        for origami_pos, tbrlnm_staples_dict in self.__origami_loc_staples_dict.items():
-            logger.info(f"Origami:  {self.__origami_position_dict[origami_pos].origami_name} \n"
-                        f"Position: {origami_pos}")
-            logger.info(f"{self.__notation_larger} Create new csv file")
+        def build_table(tbrlnm_staples_dict: Dict[str, StapleTable]) -> pd.DataFrame:
+            # all locations of the origami in one table
+            location_tables = [pd.DataFrame(staple_table.read_staple_data(), columns=tags)
+                               for staples_loc, staple_table in tbrlnm_staples_dict.items()
+                               if staples_loc != "modified" or args.modified]
 
-            with open(os.path.join(save_folder_path, f'{args.save_name}_{origami_pos}.csv'), 'w',
-                      newline='') as csvfile:
-                writer = csv.DictWriter(csvfile, fieldnames=tags)
-                writer.writeheader()
+            return pd.concat(location_tables, ignore_index=True) if location_tables else pd.DataFrame(columns=tags)
 
-                for staples_loc, staples_list in tbrlnm_staples_dict.items():
-                    if staples_loc == "modified" and not args.modified:
-                        continue
+        # rows end as written by csv.DictWriter before
+        writer = self.__result_writer(args, save_folder_path, line_terminator="\r\n")
+        file_paths = writer.write_tables({
+            origami_pos: (f"{args.save_name}_{origami_pos}",
+                          lambda tbrlnm_staples_dict=tbrlnm_staples_dict: build_table(tbrlnm_staples_dict))
+            for origami_pos, tbrlnm_staples_dict in self.__origami_loc_staples_dict.items()
+        }, f"{args.save_name}_all")
 
-                    logger.info(f"{self.__notation_larger} Write in {self.__location_filler[staples_loc]} data")
-                    for data in zip(*Staple.read_staple_data(staples_list).values()):
-                        writer.writerow(dict(zip(tags, data)))
-
-                    logger.info(f"{self.__notation_larger} Finish writing and save csv file")
+        logger.info(f">>> Finish writing bases added to {len(self.__origami_loc_staples_dict)} origami in "
+                    f"{len(file_paths)} {writer.get_export_format()} files to {save_folder_path}")
 
     def export_bases_in_original_csv(self, args):
         if not args.save_name:
@@ -88,20 +109,33 @@ class Generator:
                     f"{self.__notation_equal}=============={self.__notation_equal}")
 
         save_folder_path = self.__check_save_dir(args.save_path, result_name)
+        writer = self.__result_writer(args, save_folder_path)
+        tables = dict()
 
         for origami_pos, dna_origami in self.__origami_position_dict.items():
             # position (a, b) : DNAOrigami
-            origami_name = dna_origami.origami_name
+            file_name = f"all_staples_{origami_pos}_{result_name}"
+
+            if writer.get_export_format() != "combined" and origami_pos in self.__reused_origami \
+                    and os.path.exists(writer.file_path(file_name)):
+                # same file as written in the previous run
+                logger.info(f"{self.__notation_larger} Keep the unchanged copy of {dna_origami.origami_name} "
+                            f"at {origami_pos}")
+                continue
+
+            tables[origami_pos] = (file_name, lambda dna_origami=dna_origami: dna_origami.csv_df_copy)
 
-            logger.info(f"Origami:  {origami_name} \n"
-                        f"Position: {origami_pos}")
-            logger.info(f"{self.__notation_larger} Create a copy of {origami_name} csv file")
+        file_paths = writer.write_tables(tables, f"all_staples_{result_name}")
 
-            dna_origami.csv_df_copy.to_csv(f"{save_folder_path}/all_staples_{origami_pos}_{result_name}.csv",
-                                           index=False)
+        logger.info(f">>> Finish writing and save all {len(self.__origami_position_dict)} origami in "
+                    f"{len(file_paths)} {writer.get_export_format()} files to {save_folder_path}")
 
-        logger.info(f">>> Finish writing and save all {len(self.__origami_position_dict)} csv files to "
-                    f"{save_folder_path}")
+    def __result_writer(self, args, save_folder_path: str, line_terminator: str = "\n") -> ResultWriter:
+        return ResultWriter(save_folder_path,
+                            export_format=getattr(args, "format", "csv") or "csv",
+                            workers=getattr(args, "workers", 1) or 1,
+                            line_terminator=line_terminator,
+                            profiler=self.__profiler)
 
     @staticmethod
     def __check_save_dir(save_path: str, result_name: str) -> str:
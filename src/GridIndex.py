@@ -0,0 +1,101 @@
+from __future__ import annotations
+
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+# Offsets of the neighbour origami in each direction
+DIRECTION_OFFSETS = {
+    "t": (0, 1),
+    "b": (0, -1),
+    "l": (-1, 0),
+    "r": (1, 0),
+}
+
+
+class GridIndex:
+    """
+    Dense index of origami positions in the design. Each cell of the size_x x size_y grid holds the id of the origami at
+    that position, so neighbour queries take constant time.
+    """
+    __size: Tuple[int, int] = None
+    __origin: Tuple[int, int] = None  # smallest x and y of all positions
+    __positions: List[Tuple[int, int]] = None  # origami id: position
+    __cells: np.ndarray = None  # origami id in each cell, -1 for empty cells
+
+    @classmethod
+    def from_positions(cls, positions: List[Tuple[int, int]], size: Optional[Tuple[int, int]] = None) -> GridIndex:
+        """
+        Build the grid index and validate the positions against the size of the design.
+        :param positions: positions of all origami in the design
+        :param size: dimension of the design; the bounding box of the positions is used if not provided
+        :return: cls()
+        """
+        grid_index = cls()
+        grid_index.__positions = [(int(x), int(y)) for x, y in positions]
+
+        if len(set(grid_index.__positions)) != len(grid_index.__positions):
+            raise Exception("Error: Several origami are placed at the same position.")
+
+        if grid_index.__positions:
+            xs, ys = zip(*grid_index.__positions)
+            grid_index.__origin = (min(xs), min(ys))
+            span = (max(xs) - min(xs) + 1, max(ys) - min(ys) + 1)
+        else:
+            grid_index.__origin = (0, 0)
+            span = (0, 0)
+
+        if size is None:
+            size = span
+
+        if span[0] > size[0] or span[1] > size[1]:
+            raise Exception(f"Error: Origami positions span {span[0]} x {span[1]} which does not fit in the design of "
+                            f"size {size[0]} x {size[1]}.")
+
+        grid_index.__size = (int(size[0]), int(size[1]))
+        grid_index.__cells = np.full(grid_index.__size, -1, dtype=np.int64)
+
+        for origami_id, (x, y) in enumerate(grid_index.__positions):
+            grid_index.__cells[x - grid_index.__origin[0], y - grid_index.__origin[1]] = origami_id
+
+        return grid_index
+
+    def has_origami(self, origami_pos: Tuple[int, int]) -> bool:
+        x = origami_pos[0] - self.__origin[0]
+        y = origami_pos[-1] - self.__origin[1]
+
+        return 0 <= x < self.__size[0] and 0 <= y < self.__size[1] and self.__cells[x, y] >= 0
+
+    def neighbour(self, origami_pos: Tuple[int, int], direction: str) -> Optional[Tuple[int, int]]:
+        """
+        Find the neighbour origami in one direction.
+        :param origami_pos: position of the origami
+        :param direction: t, b, l or r
+        :return: position of the neighbour, or None if there is no origami
+        """
+        dx, dy = DIRECTION_OFFSETS[direction]
+        neighbour_pos = (origami_pos[0] + dx, origami_pos[-1] + dy)
+
+        return neighbour_pos if self.has_origami(neighbour_pos) else None
+
+    def neighbours(self, origami_pos: Tuple[int, int]) -> Dict[str, Tuple[int, int]]:
+        """
+        Find neighbour origami in all four directions.
+        :param origami_pos: position of the origami
+        :return: dict of direction and neighbour position, only for existing neighbours
+        """
+        neighbour_dict = dict()
+
+        for direction in DIRECTION_OFFSETS:
+            neighbour_pos = self.neighbour(origami_pos, direction)
+
+            if neighbour_pos is not None:
+                neighbour_dict[direction] = neighbour_pos
+
+        return neighbour_dict
+
+    def get_positions(self) -> List[Tuple[int, int]]:
+        return self.__positions
+
+    def get_size(self) -> Tuple[int, int]:
+        return self.__size
@@ -0,0 +1,187 @@
+from __future__ import annotations
+
+from collections import defaultdict
+from typing import Dict, List, Set, Tuple
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+from src.random_bases import attempt_seeds, random_overhang_bases
+from src.sequence_kernels import reverse_complement
+
+# 2-bit codes of bases; other characters such as "?" break k-mers
+_CODE_LUT = np.full(256, 255, dtype=np.uint8)
+for _code, _base in enumerate("ACGT"):
+    _CODE_LUT[ord(_base)] = _code
+
+_GC_LUT = np.zeros(256, dtype=np.int64)
+_GC_LUT[ord("G")] = _GC_LUT[ord("C")] = 1
+
+# Candidates drawn for one overhang at once
+_ATTEMPT_BATCH = 64
+
+
+def kmer_hashes(sequence: str, k: int) -> np.ndarray:
+    """
+    Pack every k-mer made of A, C, G and T into an integer of 2 bits per base.
+    :param sequence: sequence, or sequences joined by any other character
+    :param k: length of k-mers, at most 31
+    :return: int64 hashes
+    """
+    codes = _CODE_LUT[np.frombuffer(sequence.encode("ascii"), dtype=np.uint8)]
+
+    if len(codes) < k:
+        return np.zeros(0, dtype=np.int64)
+
+    windows = sliding_window_view(codes, k)
+    valid = (windows < 4).all(axis=1)
+
+    return windows[valid].astype(np.int64) @ (4 ** np.arange(k - 1, -1, -1, dtype=np.int64))
+
+
+class OverhangGenerator:
+    """
+    Draw random overhang bases under constraints: GC content in a range, no homopolymer runs longer than a limit, a
+    minimum Hamming distance to other generated overhangs of the same length and no k-mer shared with any sequence in
+    the design on either strand. K-mers are looked up in a hash set and near matches in a positional segment index,
+    so each candidate costs O(k) lookups however large the design is.
+    """
+    __gc_range: Tuple[float, float] = (0.0, 1.0)
+    __max_homopolymer: int = None
+    __min_hamming: int = 1
+    __k: int = 10
+    __max_attempts: int = 1000
+
+    __kmers: Set[int] = None  # k-mers of sequences in the design and their reverse complements
+
+    # Two sequences of the same length closer than min_hamming share at least one of min_hamming segments at the same
+    # position (pigeonhole), so only overhangs sharing a segment are compared base by base.
+    __segments: Dict[Tuple[int, int, str], List[int]] = None  # (length, segment, bases): generated overhangs
+    __generated: List[str] = None
+
+    def __init__(self,
+                 gc_range: Tuple[float, float] = (0.0, 1.0),
+                 max_homopolymer: int = None,
+                 min_hamming: int = 1,
+                 k: int = 10,
+                 max_attempts: int = 1000) -> None:
+        if not 0 < k <= 31:
+            raise Exception("Error: Length of k-mers in overhang constraints must be between 1 and 31.")
+
+        if gc_range[0] > gc_range[1]:
+            raise Exception("Error: GC range of overhang constraints is empty.")
+
+        self.__gc_range = gc_range
+        self.__max_homopolymer = max_homopolymer
+        self.__min_hamming = max(min_hamming, 1)
+        self.__k = k
+        self.__max_attempts = max_attempts
+        self.__kmers = set()
+        self.__segments = defaultdict(list)
+        self.__generated = []
+
+    @classmethod
+    def from_setting(cls, constraint_setting: Dict) -> OverhangGenerator:
+        """
+        Create the generator from the "overhang_constraints" section of the configuration file.
+        :param constraint_setting: dict of gc_min, gc_max, max_homopolymer, min_hamming, k and max_attempts
+        :return: cls()
+        """
+        try:
+            return cls(gc_range=(constraint_setting.get("gc_min", 0.0), constraint_setting.get("gc_max", 1.0)),
+                       max_homopolymer=constraint_setting.get("max_homopolymer", None),
+                       min_hamming=constraint_setting.get("min_hamming", 1),
+                       k=constraint_setting.get("k", 10),
+                       max_attempts=constraint_setting.get("max_attempts", 1000))
+        except AttributeError as e:
+            raise Exception(f"Error: Incorrect overhang constraints with {e}")
+
+    def add_sequences(self, sequences: List[str]) -> None:
+        """
+        Index k-mers of sequences and of their reverse complements, so candidates neither repeat nor bind them.
+        :param sequences: sequences, possibly with unassigned bases "?"
+        :return: None
+        """
+        joined = "|".join(sequences)
+
+        self.__kmers.update(kmer_hashes(joined, self.__k).tolist())
+        self.__kmers.update(kmer_hashes(reverse_complement(joined), self.__k).tolist())
+
+    def generate(self, seeds: np.ndarray, lengths: np.ndarray) -> List[str]:
+        """
+        Draw bases for overhangs one after another; each accepted overhang is indexed before the next one is drawn.
+        Candidates of an overhang come from its own seed stream.
+        :param seeds: seed of each overhang
+        :param lengths: number of bases of each overhang
+        :return: bases of each overhang
+        """
+        return [self.__generate_one(seed, length)
+                for seed, length in zip(np.asarray(seeds, dtype=np.uint64), np.asarray(lengths).tolist())]
+
+    def __generate_one(self, seed: np.uint64, length: int) -> str:
+        for first_attempt in range(0, self.__max_attempts, _ATTEMPT_BATCH):
+            attempts = np.arange(first_attempt, min(first_attempt + _ATTEMPT_BATCH, self.__max_attempts))
+            candidates = random_overhang_bases(attempt_seeds(seed, attempts), [length] * len(attempts))
+
+            # composition filters for the whole batch at once
+            for index in np.flatnonzero(self.__passes_composition(candidates, length)).tolist():
+                if self.__is_unique(candidates[index]):
+                    self.__accept(candidates[index])
+                    return candidates[index]
+
+        raise Exception(f"Error: Cannot generate a {length}-nt overhang satisfying the constraints in "
+                        f"{self.__max_attempts} attempts; loosen the overhang constraints.")
+
+    def __passes_composition(self, candidates: List[str], length: int) -> np.ndarray:
+        """
+        Check GC content and homopolymer runs of candidates of the same length.
+        :param candidates: candidate bases
+        :param length: length of the candidates
+        :return: boolean array
+        """
+        matrix = np.frombuffer("".join(candidates).encode("ascii"), dtype=np.uint8).reshape(len(candidates), length)
+
+        gc_fraction = _GC_LUT[matrix].sum(axis=1) / max(length, 1)
+        passes = (gc_fraction >= self.__gc_range[0]) & (gc_fraction <= self.__gc_range[1])
+
+        if self.__max_homopolymer is not None and length:
+            run = np.ones(len(candidates), dtype=np.int64)
+            longest_run = run.copy()
+
+            for col in range(1, length):
+                run = np.where(matrix[:, col] == matrix[:, col - 1], run + 1, 1)
+                np.maximum(longest_run, run, out=longest_run)
+
+            passes &= longest_run <= self.__max_homopolymer
+
+        return passes
+
+    def __is_unique(self, candidate: str) -> bool:
+        if any(kmer in self.__kmers for kmer in kmer_hashes(candidate, self.__k).tolist()):
+            return False
+
+        if self.__min_hamming > 1:
+            near_overhangs = {overhang_id for segment_key in self.__segment_keys(candidate)
+                              for overhang_id in self.__segments.get(segment_key, [])}
+
+            for overhang_id in near_overhangs:
+                other = self.__generated[overhang_id]
+                if sum(base != other_base for base, other_base in zip(candidate, other)) < self.__min_hamming:
+                    return False
+
+        return True
+
+    def __accept(self, candidate: str) -> None:
+        self.add_sequences([candidate])
+
+        if self.__min_hamming > 1:
+            for segment_key in self.__segment_keys(candidate):
+                self.__segments[segment_key].append(len(self.__generated))
+
+        self.__generated.append(candidate)
+
+    def __segment_keys(self, candidate: str) -> List[Tuple[int, int, str]]:
+        bounds = np.linspace(0, len(candidate), self.__min_hamming + 1).astype(int).tolist()
+
+        return [(len(candidate), segment, candidate[bounds[segment]: bounds[segment + 1]])
+                for segment in range(self.__min_hamming)]
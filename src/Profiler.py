@@ -0,0 +1,238 @@
+from __future__ import annotations
+
+import json
+import os
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager, nullcontext
+from typing import Any, Callable, ContextManager, Dict, Iterator, List, Optional, Tuple
+
+
+def timed_call(function: Callable, *args) -> Tuple[Any, float, float, int]:
+    """
+    Call a function and time it, e.g. in a worker process whose time cannot be measured by the profiler.
+    :param function: function, picklable if called in a worker process
+    :param args: arguments of the function
+    :return: result, wall clock time at the start, duration in seconds and id of the process
+    """
+    start = time.time()
+    counter = time.perf_counter()
+    result = function(*args)
+
+    return result, start, time.perf_counter() - counter, os.getpid()
+
+
+def profile_tile(profiler: Optional[Profiler], stage: str, origami_pos: Tuple, **counts: int) -> ContextManager:
+    """
+    Time the work of one tile if a profiler is given.
+    :param profiler: profiler or None
+    :param stage: stage the work belongs to
+    :param origami_pos: position of the tile
+    :param counts: counts recorded with the tile, e.g. number of staples
+    :return: context manager
+    """
+    return profiler.tile(stage, origami_pos, **counts) if profiler is not None else nullcontext()
+
+
+def profile_stage(profiler: Optional[Profiler], stage: str) -> ContextManager:
+    """
+    Time one stage if a profiler is given.
+    :param profiler: profiler or None
+    :param stage: stage name
+    :return: context manager
+    """
+    return profiler.stage(stage) if profiler is not None else nullcontext()
+
+
+class Profiler:
+    """
+    Wall time and peak memory of the stages of a run, wall time of every tile in each stage and counts of the staples
+    and overhangs processed. Stages run one after another and do not nest; tiles of a stage may be timed on several
+    threads or in worker processes. Peak memory is traced by tracemalloc, so it covers this process only and slows the
+    run down while profiling.
+    """
+    __events: List[Dict] = None  # completed stages and tiles in the order they finished
+    __counts: Dict[str, int] = None  # name: count accumulated over the run
+    __origin: float = 0.0  # wall clock time the profiler was created at
+    __trace_memory: bool = True
+    __started_tracing: bool = False  # whether tracemalloc was started by this profiler
+    __lock: threading.Lock = None
+
+    def __init__(self, trace_memory: bool = True) -> None:
+        """
+        :param trace_memory: whether peak memory of stages is traced
+        """
+        self.__events = []
+        self.__counts = dict()
+        self.__origin = time.time()
+        self.__trace_memory = trace_memory
+        self.__lock = threading.Lock()
+
+        if trace_memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self.__started_tracing = True
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        """
+        Time one stage and trace its peak memory.
+        :param name: stage name
+        :return: context manager
+        """
+        if self.__trace_memory:
+            tracemalloc.reset_peak()
+
+        start = time.time()
+        counter = time.perf_counter()
+
+        try:
+            yield
+        finally:
+            duration = time.perf_counter() - counter
+            event = {"name": name, "category": "stage", "start": start - self.__origin, "duration": duration,
+                     "pid": os.getpid(), "tid": threading.get_ident()}
+
+            if self.__trace_memory:
+                event["peak_memory"] = tracemalloc.get_traced_memory()[1]
+
+            self.__record(event)
+
+    @contextmanager
+    def tile(self, stage: str, origami_pos: Tuple, **counts: int) -> Iterator[None]:
+        """
+        Time the work of one tile in this process.
+        :param stage: stage the work belongs to
+        :param origami_pos: position of the tile
+        :param counts: counts recorded with the tile
+        :return: context manager
+        """
+        start = time.time()
+        counter = time.perf_counter()
+
+        try:
+            yield
+        finally:
+            self.add_tile(stage, origami_pos, start, time.perf_counter() - counter, **counts)
+
+    def add_tile(self,
+                 stage: str,
+                 origami_pos: Tuple,
+                 start: float,
+                 duration: float,
+                 pid: int = None,
+                 **counts: int) -> None:
+        """
+        Record the work of one tile timed elsewhere, e.g. by timed_call in a worker process.
+        :param stage: stage the work belongs to
+        :param origami_pos: position of the tile
+        :param start: wall clock time at the start
+        :param duration: duration in seconds
+        :param pid: id of the process the work ran in; this process if not provided
+        :param counts: counts recorded with the tile
+        :return: None
+        """
+        self.__record({"name": stage, "category": "tile", "tile": str(origami_pos), "start": start - self.__origin,
+                       "duration": duration, "pid": pid if pid is not None else os.getpid(),
+                       "tid": threading.get_ident() if pid is None else 0, "counts": counts})
+
+    def count(self, name: str, value: int = 1) -> None:
+        """
+        Add to a count of the run.
+        :param name: count name, e.g. staples
+        :param value: value added
+        :return: None
+        """
+        with self.__lock:
+            self.__counts[name] = self.__counts.get(name, 0) + value
+
+    def __record(self, event: Dict) -> None:
+        with self.__lock:
+            self.__events.append(event)
+
+    def stop(self) -> None:
+        """
+        Stop tracing memory if it was started by this profiler.
+        :return: None
+        """
+        if self.__started_tracing:
+            tracemalloc.stop()
+            self.__started_tracing = False
+
+    def report(self) -> Dict:
+        """
+        Summary of the run: time and peak memory of each stage, time of each tile in each stage and counts.
+        :return: report of plain types
+        """
+        stages = dict()
+        tiles = dict()
+
+        for event in self.__events:
+            if event["category"] == "stage":
+                stage = stages.setdefault(event["name"], {"time": 0.0, "tiles": 0})
+                stage["time"] += event["duration"]
+
+                if "peak_memory" in event:
+                    stage["peak_memory"] = max(stage.get("peak_memory", 0), event["peak_memory"])
+            else:
+                stage_tiles = tiles.setdefault(event["name"], dict())
+                stage_tiles[event["tile"]] = stage_tiles.get(event["tile"], 0.0) + event["duration"]
+
+        for name, stage_tiles in tiles.items():
+            stages.setdefault(name, {"time": 0.0, "tiles": 0})["tiles"] = len(stage_tiles)
+
+        report = {"total_time": sum(stage["time"] for stage in stages.values()),
+                  "stages": stages,
+                  "tiles": tiles,
+                  "counts": dict(self.__counts)}
+
+        if self.__trace_memory:
+            report["peak_memory"] = max([stage.get("peak_memory", 0) for stage in stages.values()], default=0)
+
+        return report
+
+    def chrome_trace(self) -> Dict:
+        """
+        Stages and tiles as complete events of the Chrome trace event format, viewable in chrome://tracing or Perfetto.
+        :return: trace of plain types
+        """
+        trace_events = []
+
+        for event in self.__events:
+            args = dict(event.get("counts", dict()))
+
+            if "tile" in event:
+                args["tile"] = event["tile"]
+            if "peak_memory" in event:
+                args["peak_memory"] = event["peak_memory"]
+
+            trace_events.append({"name": f"{event['name']} {event['tile']}" if "tile" in event else event["name"],
+                                 "cat": event["category"],
+                                 "ph": "X",
+                                 "ts": round(event["start"] * 1e6),
+                                 "dur": round(event["duration"] * 1e6),
+                                 "pid": event["pid"],
+                                 "tid": event["tid"],
+                                 "args": args})
+
+        return {"traceEvents": trace_events, "displayTimeUnit": "ms"}
+
+    def save(self, report_path: str, trace_path: str = None) -> None:
+        """
+        Write the report, and the Chrome trace if a path is given, as JSON.
+        :param report_path: report file path
+        :param trace_path: Chrome trace file path
+        :return: None
+        """
+        with open(report_path, "w") as f:
+            json.dump(self.report(), f, indent=2)
+
+        if trace_path is not None:
+            with open(trace_path, "w") as f:
+                json.dump(self.chrome_trace(), f)
+
+    def get_events(self) -> List[Dict]:
+        return self.__events
+
+    def get_counts(self) -> Dict[str, int]:
+        return self.__counts
@@ -0,0 +1,234 @@
+from __future__ import annotations
+
+import gzip
+import io
+import os
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, IO, List, Tuple
+
+import numpy as np
+import pandas as pd
+
+from src.Profiler import Profiler, profile_tile
+from src.sequence_kernels import pack_sequences, unpack_sequences
+
+import logging
+
+from src.utils import config_logging
+
+config_logging()
+logger = logging.getLogger(__name__)
+
+# csv per origami, gzip-compressed csv per origami, one csv of all origami with a tile column, npz per origami
+EXPORT_FORMATS = ["csv", "csv.gz", "combined", "npz"]
+
+# Bytes buffered before each write to disk
+DEFAULT_BUFFER_SIZE = 1 << 20
+
+# Column naming the origami of each row in the combined file
+TILE_COLUMN = "Tile"
+
+
+def read_npz_table(path: str) -> pd.DataFrame:
+    """
+    Read a table written in the npz format.
+    :param path: npz file path
+    :return: dataframe with the columns in their original order
+    """
+    with np.load(path, allow_pickle=False) as data:
+        arrays = {name: data[name] for name in data.files}
+
+    table = dict()
+
+    for column in [column.decode("utf-8") for column in arrays["columns"]]:
+        if f"{column}.buffer" in arrays:
+            buffer, offsets = arrays[f"{column}.buffer"], arrays[f"{column}.offsets"]
+            table[column] = pd.Series(unpack_sequences(buffer, offsets), dtype=object)
+        else:
+            table[column] = arrays[column]
+
+    return pd.DataFrame(table)
+
+
+class ResultWriter:
+    """
+    Write result tables of origami to disk in one of the export formats. Tables are formatted and written on a pool of
+    threads with large buffered writes, and every file is written to a temporary file first and renamed when complete,
+    so an interrupted export never leaves a partial file behind.
+    """
+    __save_folder_path: str = None
+    __export_format: str = "csv"
+    __workers: int = 1
+    __buffer_size: int = DEFAULT_BUFFER_SIZE
+    __line_terminator: str = "\n"
+    __profiler: Profiler = None
+
+    def __init__(self,
+                 save_folder_path: str,
+                 export_format: str = "csv",
+                 workers: int = 1,
+                 buffer_size: int = DEFAULT_BUFFER_SIZE,
+                 line_terminator: str = "\n",
+                 profiler: Profiler = None) -> None:
+        """
+        :param save_folder_path: folder the files are written to
+        :param export_format: one of EXPORT_FORMATS
+        :param workers: number of threads formatting and writing tables
+        :param buffer_size: bytes buffered before each write to disk
+        :param line_terminator: end of rows in csv files
+        :param profiler: profiler timing the table of each origami
+        """
+        if export_format not in EXPORT_FORMATS:
+            raise Exception(f"Error: Unknown export format {export_format}, choose from {', '.join(EXPORT_FORMATS)}.")
+
+        self.__save_folder_path = save_folder_path
+        self.__export_format = export_format
+        self.__workers = max(workers, 1)
+        self.__buffer_size = buffer_size
+        self.__line_terminator = line_terminator
+        self.__profiler = profiler
+
+    def file_path(self, file_name: str) -> str:
+        """
+        Path of the file holding one table.
+        :param file_name: file name without extension
+        :return: file path
+        """
+        return os.path.join(self.__save_folder_path, f"{file_name}.{self.__extension()}")
+
+    def write_tables(self,
+                     tables: Dict[Tuple, Tuple[str, Callable[[], pd.DataFrame]]],
+                     combined_name: str) -> List[str]:
+        """
+        Write one table per origami, or all of them in one file for the combined format. Tables are built lazily by
+        the writing threads, so only the tables being written are held in memory.
+        :param tables: position: file name without extension and function building the table of the origami
+        :param combined_name: file name without extension of the combined file
+        :return: paths of the written files
+        """
+        if self.__export_format == "combined":
+            file_paths = [self.__write_combined(tables, combined_name)]
+        else:
+            jobs = [(origami_pos, self.file_path(file_name), build_table)
+                    for origami_pos, (file_name, build_table) in tables.items()]
+
+            if self.__workers == 1 or len(jobs) <= 1:
+                file_paths = [self.__write_table(*job) for job in jobs]
+            else:
+                with ThreadPoolExecutor(max_workers=min(self.__workers, len(jobs))) as executor:
+                    file_paths = list(executor.map(lambda job: self.__write_table(*job), jobs))
+
+        if self.__profiler is not None:
+            self.__profiler.count("exported_files", len(file_paths))
+
+        return file_paths
+
+    def __write_table(self, origami_pos: Tuple, file_path: str, build_table: Callable[[], pd.DataFrame]) -> str:
+        with profile_tile(self.__profiler, "export", origami_pos):
+            self.__write_table_file(file_path, build_table())
+
+        return file_path
+
+    def __write_table_file(self, file_path: str, table: pd.DataFrame) -> None:
+        if self.__export_format == "npz":
+            self.__atomic_write(file_path, lambda f: self.__write_npz(f, table), binary=True)
+        elif self.__export_format == "csv.gz":
+            self.__atomic_write(file_path, lambda f: self.__write_gzip(f, table), binary=True)
+        else:
+            self.__atomic_write(file_path, lambda f: table.to_csv(f, index=False,
+                                                                  lineterminator=self.__line_terminator))
+
+    def __write_combined(self, tables: Dict[Tuple, Tuple[str, Callable[[], pd.DataFrame]]], combined_name: str) -> str:
+        """
+        Stream the tables of all origami into one csv with a tile column; tables are formatted in parallel and
+        appended in the order of the origami. At most two formatted tables per worker are held in memory.
+        :param tables: position: file name without extension and function building the table of the origami
+        :param combined_name: file name without extension
+        :return: file path
+        """
+        file_path = os.path.join(self.__save_folder_path, f"{combined_name}.csv")
+
+        def format_table(item: Tuple[Tuple, Tuple[str, Callable[[], pd.DataFrame]]], header: bool) -> str:
+            origami_pos, (_, build_table) = item
+
+            with profile_tile(self.__profiler, "export", origami_pos):
+                table = build_table().copy(deep=False)
+                # position as in the names of the files per origami
+                table.insert(0, TILE_COLUMN, str(origami_pos))
+
+                return table.to_csv(index=False, header=header, lineterminator=self.__line_terminator)
+
+        def write(f: IO) -> None:
+            window = deque()
+
+            with ThreadPoolExecutor(max_workers=self.__workers) as executor:
+                for index, item in enumerate(tables.items()):
+                    # write the oldest table before submitting more once the window is full
+                    if len(window) >= 2 * self.__workers:
+                        f.write(window.popleft().result())
+
+                    # only the first table writes the header
+                    window.append(executor.submit(format_table, item, index == 0))
+
+                while window:
+                    f.write(window.popleft().result())
+
+        self.__atomic_write(file_path, write)
+
+        return file_path
+
+    def __write_gzip(self, f: IO, table: pd.DataFrame) -> None:
+        with gzip.GzipFile(fileobj=f, mode="wb", mtime=0) as gzip_file:
+            with io.TextIOWrapper(gzip_file, encoding="utf-8", newline="") as text_file:
+                table.to_csv(text_file, index=False, lineterminator=self.__line_terminator)
+
+    @staticmethod
+    def __write_npz(f: IO, table: pd.DataFrame) -> None:
+        """
+        Columns of numbers are stored as they are and columns of strings as one byte buffer with offsets.
+        :param f: binary file
+        :param table: dataframe
+        :return: None
+        """
+        arrays = {"columns": np.array([str(column).encode("utf-8") for column in table.columns], dtype="S")}
+
+        for column in table.columns:
+            values = table[column]
+
+            if pd.api.types.is_numeric_dtype(values) and not isinstance(values.dtype, pd.CategoricalDtype):
+                arrays[str(column)] = values.to_numpy()
+            else:
+                arrays[f"{column}.buffer"], arrays[f"{column}.offsets"] = pack_sequences(values.astype(str).tolist())
+
+        np.savez(f, **arrays)
+
+    def __atomic_write(self, file_path: str, write: Callable[[IO], None], binary: bool = False) -> None:
+        """
+        Write a file through a temporary file in the same folder, renamed over the file once complete.
+        :param file_path: file path
+        :param write: function writing the content to the open file
+        :param binary: whether the file is opened in binary mode
+        :return: None
+        """
+        temp_path = os.path.join(os.path.dirname(file_path), f".{os.path.basename(file_path)}.{os.getpid()}.tmp")
+
+        try:
+            if binary:
+                with open(temp_path, "wb", buffering=self.__buffer_size) as f:
+                    write(f)
+            else:
+                with open(temp_path, "w", newline="", buffering=self.__buffer_size) as f:
+                    write(f)
+
+            os.replace(temp_path, file_path)
+        except BaseException:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+
+    def __extension(self) -> str:
+        return "csv" if self.__export_format == "combined" else self.__export_format
+
+    def get_export_format(self) -> str:
+        return self.__export_format
@@ -0,0 +1,203 @@
+from __future__ import annotations
+
+import hashlib
+import os
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from src.constants import HELIX_COMPLEMENTARY_BASE_LEFT_DICT, HELIX_COMPLEMENTARY_BASE_RIGHT_DICT, \
+    SCAFFOLD_LEFT_EDGE, SCAFFOLD_RIGHT_EDGE
+from src.sequence_kernels import complement_bytes
+
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Bump when the layout of cached arrays changes
+SCAFFOLD_MAP_VERSION = 1
+
+
+class ScaffoldMap:
+    """
+    Staple bases complementary to the scaffold, indexed by (helix, base). Overhangs at the left and right of an origami
+    bind the scaffold of the neighbouring origami, so their bases are read from windows at the scaffold edges.
+    """
+    __bases: np.ndarray = None  # ASCII staple base at [helix, base], 0 where there is no scaffold
+    __left_edge: int = SCAFFOLD_LEFT_EDGE  # first scaffold base on the left
+    __right_edge: int = SCAFFOLD_RIGHT_EDGE  # last scaffold base on the right
+
+    def __init__(self, bases: np.ndarray, left_edge: int, right_edge: int) -> None:
+        self.__bases = bases
+        self.__left_edge = left_edge
+        self.__right_edge = right_edge
+
+    @classmethod
+    def from_scaffold(cls,
+                      scaffold_sequence: str,
+                      scaffold_path: np.ndarray,
+                      left_edge: int,
+                      right_edge: int,
+                      cache_dir: Optional[str] = None) -> ScaffoldMap:
+        """
+        Thread the scaffold sequence along the scaffold path. The array is cached on disk, keyed by a hash of the
+        sequence and the path.
+        :param scaffold_sequence: scaffold sequence from its 5' end, e.g. p7249 or p8064
+        :param scaffold_path: (helix, base) of each scaffold nucleotide from the 5' end, shape (n, 2)
+        :param left_edge: first scaffold base on the left
+        :param right_edge: last scaffold base on the right
+        :param cache_dir: directory of cached arrays, no caching if not provided
+        :return: cls()
+        """
+        scaffold_path = np.asarray(scaffold_path, dtype=np.int64).reshape(-1, 2)
+        scaffold_sequence = scaffold_sequence.strip().upper()
+
+        if len(scaffold_path) > len(scaffold_sequence):
+            raise Exception(f"Error: Scaffold path has {len(scaffold_path)} bases but the scaffold sequence only has "
+                            f"{len(scaffold_sequence)}.")
+
+        cache_path = None
+
+        if cache_dir is not None:
+            digest = hashlib.sha256()
+            digest.update(f"{SCAFFOLD_MAP_VERSION}".encode("ascii"))
+            digest.update(scaffold_sequence.encode("ascii"))
+            digest.update(scaffold_path.tobytes())
+            cache_path = os.path.join(cache_dir, f"scaffold_{digest.hexdigest()}.npy")
+
+            if os.path.exists(cache_path):
+                return cls(np.load(cache_path), left_edge, right_edge)
+
+        bases = np.zeros((scaffold_path[:, 0].max() + 1, scaffold_path[:, 1].max() + 1), dtype=np.uint8) \
+            if len(scaffold_path) else np.zeros((0, 0), dtype=np.uint8)
+        scaffold_bytes = np.frombuffer(scaffold_sequence[:len(scaffold_path)].encode("ascii"), dtype=np.uint8)
+        bases[scaffold_path[:, 0], scaffold_path[:, 1]] = complement_bytes(scaffold_bytes)
+
+        if cache_path is not None:
+            os.makedirs(cache_dir, exist_ok=True)
+            temp_path = f"{cache_path}.{os.getpid()}.tmp.npy"
+            np.save(temp_path, bases)
+            os.replace(temp_path, cache_path)
+
+        return cls(bases, left_edge, right_edge)
+
+    @staticmethod
+    def read_scaffold_sequence(sequence_path: str) -> str:
+        """
+        Read a scaffold sequence from a plain text or FASTA file.
+        :param sequence_path: path of the sequence file
+        :return: scaffold sequence
+        """
+        try:
+            with open(sequence_path, "r") as f:
+                return "".join(line.strip() for line in f if not line.startswith(">"))
+        except Exception as e:
+            raise Exception(f"Error: Incorrect scaffold sequence with {e}")
+
+    @classmethod
+    def from_files(cls, scaffold_setting: Dict, scaffold_path: Optional[np.ndarray] = None) -> ScaffoldMap:
+        """
+        Load the scaffold from the "scaffold" section of the configuration file.
+        :param scaffold_setting: dict with sequence file, path csv (columns helix and base), edges and cache directory
+        :param scaffold_path: scaffold path read from a Cadnano 2 design, used if no path csv is configured
+        :return: cls()
+        """
+        scaffold_sequence = cls.read_scaffold_sequence(scaffold_setting.get("sequence"))
+
+        if "path" in scaffold_setting:
+            try:
+                scaffold_path = pd.read_csv(scaffold_setting["path"], usecols=["helix", "base"])[["helix", "base"]] \
+                    .to_numpy()
+            except Exception as e:
+                raise Exception(f"Error: Incorrect scaffold path with {e}")
+        elif scaffold_path is None:
+            raise Exception("Error: Scaffold path is required unless origami are loaded from Cadnano 2 designs.")
+
+        return cls.from_scaffold(scaffold_sequence,
+                                 scaffold_path,
+                                 scaffold_setting.get("left_edge", SCAFFOLD_LEFT_EDGE),
+                                 scaffold_setting.get("right_edge", SCAFFOLD_RIGHT_EDGE),
+                                 scaffold_setting.get("cache_dir", os.path.join(".cache", "scaffold")))
+
+    @classmethod
+    def from_windows(cls,
+                     left_windows: Dict[int, str] = None,
+                     right_windows: Dict[int, str] = None,
+                     left_edge: int = SCAFFOLD_LEFT_EDGE,
+                     right_edge: int = SCAFFOLD_RIGHT_EDGE) -> ScaffoldMap:
+        """
+        Build the map from tables of staple bases at the scaffold edges, listed from the inner base to the edge, i.e.
+        the tables in src/constants.py for the pre-determined origami and its scaffold.
+        :param left_windows: helix: bases ending at the left edge
+        :param right_windows: helix: bases starting at the right edge
+        :param left_edge: first scaffold base on the left
+        :param right_edge: last scaffold base on the right
+        :return: cls()
+        """
+        left_windows = HELIX_COMPLEMENTARY_BASE_LEFT_DICT if left_windows is None else left_windows
+        right_windows = HELIX_COMPLEMENTARY_BASE_RIGHT_DICT if right_windows is None else right_windows
+
+        n_helices = max(list(left_windows.keys()) + list(right_windows.keys())) + 1
+        bases = np.zeros((n_helices, right_edge + 1), dtype=np.uint8)
+
+        for helix, window in left_windows.items():
+            # listed from base left_edge + len - 1 down to left_edge
+            bases[helix, left_edge: left_edge + len(window)] = np.frombuffer(window[::-1].encode("ascii"), np.uint8)
+
+        for helix, window in right_windows.items():
+            # listed from base right_edge down to right_edge - len + 1
+            bases[helix, right_edge - len(window) + 1: right_edge + 1] = \
+                np.frombuffer(window[::-1].encode("ascii"), np.uint8)
+
+        return cls(bases, left_edge, right_edge)
+
+    def window(self, helices: np.ndarray, side: str, length: int) -> List[str]:
+        """
+        Staple bases complementary to the scaffold at one edge for many helices at once, from the smaller base index
+        to the larger one.
+        :param helices: helix indexes
+        :param side: "l" for the left edge or "r" for the right edge of the scaffold
+        :param length: number of bases from the edge
+        :return: list of bases for each helix
+        """
+        helices = np.asarray(helices, dtype=np.int64)
+
+        if side == "l":
+            first_base = self.__left_edge
+        elif side == "r":
+            first_base = self.__right_edge - length + 1
+        else:
+            raise Exception("Error: Unknown scaffold edge provided")
+
+        columns = np.arange(first_base, first_base + length)
+
+        if len(helices) and (helices.min() < 0 or helices.max() >= self.__bases.shape[0] or
+                             first_base < 0 or first_base + length > self.__bases.shape[1]):
+            raise Exception(f"Error: Scaffold does not cover helices {sorted(set(helices.tolist()))} at bases "
+                            f"{first_base} - {first_base + length - 1}")
+
+        window_bases = self.__bases[helices[:, None], columns[None, :]]
+
+        if not window_bases.all():
+            missing = sorted(set(helices[~window_bases.all(axis=1)].tolist()))
+            raise Exception(f"Error: No scaffold bases on helices {missing} at bases {first_base} - "
+                            f"{first_base + length - 1}")
+
+        joined = window_bases.tobytes().decode("ascii")
+
+        return [joined[i * length: (i + 1) * length] for i in range(len(helices))]
+
+    def digest(self) -> str:
+        """
+        Hash of the map, which identifies the scaffold in the persisted assignment state.
+        :return: hex digest
+        """
+        digest = hashlib.sha256()
+        digest.update(f"{self.__bases.shape}{self.__left_edge},{self.__right_edge}".encode("ascii"))
+        digest.update(np.ascontiguousarray(self.__bases).tobytes())
+
+        return digest.hexdigest()
+
+    def get_bases(self) -> np.ndarray:
+        return self.__bases
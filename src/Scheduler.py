@@ -0,0 +1,88 @@
+from __future__ import annotations
+
+from typing import Dict, List, Tuple
+
+from src.GridIndex import GridIndex
+
+
+class Scheduler:
+    """
+    Schedule origami for base assignment. Bottom overhangs of an origami get random bases, and top overhangs of the
+    origami below are complementary to them, so each origami depends on its upper neighbour. Origami are grouped into
+    wavefronts: sources without an upper neighbour come first, and origami in the same wavefront are independent.
+    """
+    __grid_index: GridIndex = None
+    __dependencies: Dict[Tuple[int, int], List[Tuple[int, int]]] = None  # origami: origami it depends on
+    __waves: List[List[Tuple[int, int]]] = None
+
+    @classmethod
+    def from_positions(cls, positions: List[Tuple[int, int]]) -> Scheduler:
+        """
+        Build the dependency graph of origami from their positions.
+        :param positions: positions of all origami in the design
+        :return: cls()
+        """
+        return cls.from_grid(GridIndex.from_positions(positions))
+
+    @classmethod
+    def from_grid(cls, grid_index: GridIndex) -> Scheduler:
+        """
+        Build the dependency graph of origami from the grid index of the design.
+        :param grid_index: grid index of the design
+        :return: cls()
+        """
+        scheduler = cls()
+        scheduler.__grid_index = grid_index
+        scheduler.__dependencies = dict()
+
+        for origami_pos in grid_index.get_positions():
+            # top overhangs pair with bottom overhangs of the origami above
+            upper_pos = grid_index.neighbour(origami_pos, "t")
+            scheduler.__dependencies[origami_pos] = [upper_pos] if upper_pos is not None else []
+
+        scheduler.__waves = scheduler.__build_waves()
+
+        return scheduler
+
+    def __build_waves(self) -> List[List[Tuple[int, int]]]:
+        """
+        Group origami by their depth in the dependency graph. Waves are sorted so that the schedule never depends on
+        the order of origami in the configuration file.
+        :return: list of wavefronts
+        """
+        dependents = {origami_pos: [] for origami_pos in self.__dependencies}
+        remaining = {origami_pos: len(depends_on) for origami_pos, depends_on in self.__dependencies.items()}
+
+        for origami_pos, depends_on in self.__dependencies.items():
+            for dependency in depends_on:
+                dependents[dependency].append(origami_pos)
+
+        waves = []
+        wave = sorted(origami_pos for origami_pos, count in remaining.items() if count == 0)
+
+        while wave:
+            waves.append(wave)
+            next_wave = []
+
+            for origami_pos in wave:
+                for dependent in dependents[origami_pos]:
+                    remaining[dependent] -= 1
+
+                    if remaining[dependent] == 0:
+                        next_wave.append(dependent)
+
+            wave = sorted(next_wave)
+
+        if sum(len(wave) for wave in waves) != len(self.__dependencies):
+            raise Exception("Error: Origami depend on each other in a cycle and cannot be scheduled.")
+
+        return waves
+
+    def get_waves(self) -> List[List[Tuple[int, int]]]:
+        return self.__waves
+
+    def get_dependencies(self, origami_pos: Tuple[int, int]) -> List[Tuple[int, int]]:
+        return self.__dependencies[origami_pos]
+
+    def get_grid_index(self) -> GridIndex:
+        return self.__grid_index
@@ -0,0 +1,170 @@
+from __future__ import annotations
+
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+# 2-bit codes of bases; other characters break seeds
+_CODE_LUT = np.full(256, 255, dtype=np.uint8)
+for _code, _base in enumerate("ACGT"):
+    _CODE_LUT[ord(_base)] = _code
+
+
+def seed_hashes(sequence: str, k: int) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Pack every k-mer made of A, C, G and T into an integer of 2 bits per base.
+    :param sequence: sequence
+    :param k: seed length, at most 31
+    :return: int64 hashes and offsets of the k-mers in the sequence
+    """
+    codes = _CODE_LUT[np.frombuffer(sequence.upper().encode("ascii"), dtype=np.uint8)]
+
+    if len(codes) < k:
+        return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64)
+
+    windows = sliding_window_view(codes, k)
+    offsets = np.flatnonzero((windows < 4).all(axis=1))
+
+    return windows[offsets].astype(np.int64) @ (4 ** np.arange(k - 1, -1, -1, dtype=np.int64)), offsets
+
+
+class SeedIndex:
+    """
+    Seed index of design sequences for matching vendor order sequences, which contain a design sequence together with
+    bases added to it, e.g. assigned overhang bases at one end. Every k-mer of the design is kept in one sorted array,
+    so candidates of an order sequence are found by binary search of its own k-mers, voted by alignment diagonal and
+    verified base by base along the best diagonals.
+    """
+    __sequences: List[str] = None  # design sequence id: sequence
+    __positions: List[List[str]] = None  # design sequence id: origami positions holding it
+    __exact: Dict[str, int] = None  # sequence: design sequence id
+    __min_seed: int = 12
+    __min_confidence: float = 0.8
+    __max_seed_hits: int = 256  # seeds repeated more often in the design are too ambiguous to vote
+
+    # k-mers of all design sequences sorted by hash
+    __seed_hash: np.ndarray = None
+    __seed_sequence: np.ndarray = None
+    __seed_offset: np.ndarray = None
+
+    def __init__(self,
+                 sequence_position: Dict[str, List[str]],
+                 min_seed: int = 12,
+                 min_confidence: float = 0.8,
+                 max_seed_hits: int = 256) -> None:
+        """
+        :param sequence_position: design sequence: origami positions holding it
+        :param min_seed: length of exact seeds an order sequence shares with a design sequence, at most 31
+        :param min_confidence: smallest fraction of a design sequence matched by an order sequence
+        :param max_seed_hits: seeds occurring more often in the design are ignored
+        """
+        if not 0 < min_seed <= 31:
+            raise Exception("Error: Minimum seed length must be between 1 and 31.")
+
+        self.__sequences = list(sequence_position.keys())
+        self.__positions = [list(positions) for positions in sequence_position.values()]
+        self.__exact = {sequence.upper(): seq_id for seq_id, sequence in enumerate(self.__sequences)}
+        self.__min_seed = min_seed
+        self.__min_confidence = min_confidence
+        self.__max_seed_hits = max_seed_hits
+
+        hashes, sequence_ids, offsets = [], [], []
+
+        for seq_id, sequence in enumerate(self.__sequences):
+            seed_hash, seed_offset = seed_hashes(sequence, min_seed)
+            hashes.append(seed_hash)
+            offsets.append(seed_offset)
+            sequence_ids.append(np.full(len(seed_hash), seq_id, dtype=np.int64))
+
+        seed_hash = np.concatenate(hashes) if hashes else np.zeros(0, dtype=np.int64)
+        order = np.argsort(seed_hash, kind="stable")
+
+        self.__seed_hash = seed_hash[order]
+        self.__seed_sequence = np.concatenate(sequence_ids)[order] if hashes else np.zeros(0, dtype=np.int64)
+        self.__seed_offset = np.concatenate(offsets)[order] if hashes else np.zeros(0, dtype=np.int64)
+
+    def match(self, order_sequence: str) -> Optional[Tuple[List[str], float, str]]:
+        """
+        Find the design sequence matching an order sequence best.
+        :param order_sequence: order sequence without white spaces
+        :return: origami positions holding the matched design sequence, confidence between 0 and 1 and the design
+        sequence, or None if no design sequence is matched with enough confidence
+        """
+        order_sequence = order_sequence.upper()
+
+        # identical sequences need no search
+        if order_sequence in self.__exact:
+            seq_id = self.__exact[order_sequence]
+            return self.__positions[seq_id], 1.0, self.__sequences[seq_id]
+
+        query_hash, query_offset = seed_hashes(order_sequence, self.__min_seed)
+
+        # range of equal design seeds of each query seed
+        lower = np.searchsorted(self.__seed_hash, query_hash, side="left")
+        upper = np.searchsorted(self.__seed_hash, query_hash, side="right")
+        hit_count = upper - lower
+        useful = (hit_count > 0) & (hit_count <= self.__max_seed_hits)
+
+        if not useful.any():
+            return None
+
+        lower, hit_count, query_offset = lower[useful], hit_count[useful], query_offset[useful]
+        hits = np.repeat(lower - np.cumsum(hit_count) + hit_count, hit_count) + np.arange(hit_count.sum())
+        hit_query_offset = np.repeat(query_offset, hit_count)
+
+        # votes of (design sequence, diagonal); seeds along the same alignment share the diagonal
+        hit_sequence = self.__seed_sequence[hits]
+        diagonal = hit_query_offset - self.__seed_offset[hits]
+        candidates, votes = np.unique(np.column_stack([hit_sequence, diagonal]), axis=0, return_counts=True)
+
+        best = None
+
+        # verify the most voted alignments, a few are enough since a true match gets a vote per shared seed
+        for seq_id, shift in candidates[np.argsort(-votes, kind="stable")[:8]].tolist():
+            confidence = self.__score(order_sequence, self.__sequences[seq_id].upper(), shift)
+
+            if best is None or confidence > best[1]:
+                best = (seq_id, confidence)
+
+        if best is None or best[1] < self.__min_confidence:
+            return None
+
+        return self.__positions[best[0]], best[1], self.__sequences[best[0]]
+
+    def match_all(self, order_sequences: List[str]) -> List[Optional[Tuple[List[str], float, str]]]:
+        """
+        Match many order sequences against the design.
+        :param order_sequences: order sequences without white spaces
+        :return: match of each order sequence
+        """
+        return [self.match(order_sequence) for order_sequence in order_sequences]
+
+    @staticmethod
+    def __score(order_sequence: str, design_sequence: str, shift: int) -> float:
+        """
+        Fraction of bases of the design sequence equal to the order sequence when base i of the design sequence is
+        aligned with base i + shift of the order sequence.
+        :param order_sequence: order sequence
+        :param design_sequence: design sequence
+        :param shift: offset of the design sequence in the order sequence
+        :return: confidence between 0 and 1
+        """
+        order_bytes = np.frombuffer(order_sequence.encode("ascii"), dtype=np.uint8)
+        design_bytes = np.frombuffer(design_sequence.encode("ascii"), dtype=np.uint8)
+
+        design_start = max(0, -shift)
+        design_end = min(len(design_bytes), len(order_bytes) - shift)
+
+        if design_end <= design_start:
+            return 0.0
+
+        equal = order_bytes[design_start + shift: design_end + shift] == design_bytes[design_start: design_end]
+
+        return float(equal.sum()) / len(design_bytes)
+
+    def get_min_seed(self) -> int:
+        return self.__min_seed
+
+    def get_min_confidence(self) -> float:
+        return self.__min_confidence
@@ -0,0 +1,77 @@
+from __future__ import annotations
+
+import threading
+from typing import Dict, Iterable, List
+
+import numpy as np
+
+
+class SequencePool:
+    """
+    Interned, immutable sequences. Each distinct sequence is stored once and staple tables refer to it by id, so the
+    identical normal staples of repeated tiles share one copy. Sequences are never modified in place: assigning bases
+    interns the new sequence and points the staple at it, so other tables holding the old sequence are unaffected.
+    """
+    __ids: Dict[str, int] = None  # sequence: id
+    __sequences: List[str] = None  # id: sequence
+    __lock: threading.Lock = None
+
+    def __init__(self) -> None:
+        self.__ids = dict()
+        self.__sequences = []
+        self.__lock = threading.Lock()
+
+    def intern(self, sequence: str) -> int:
+        """
+        Id of a sequence, added to the pool if it is new.
+        :param sequence: sequence
+        :return: id
+        """
+        seq_id = self.__ids.get(sequence)
+
+        if seq_id is None:
+            # tables of several jobs may intern into the same pool at once
+            with self.__lock:
+                seq_id = self.__ids.get(sequence)
+
+                if seq_id is None:
+                    seq_id = len(self.__sequences)
+                    self.__sequences.append(sequence)
+                    self.__ids[sequence] = seq_id
+
+        return seq_id
+
+    def intern_all(self, sequences: Iterable[str]) -> np.ndarray:
+        """
+        Ids of many sequences.
+        :param sequences: sequences
+        :return: int32 ids
+        """
+        return np.fromiter(map(self.intern, sequences), dtype=np.int32)
+
+    def share(self, sequence: str) -> str:
+        """
+        The pooled copy of a sequence, so that equal sequences kept in many places are one object.
+        :param sequence: sequence
+        :return: pooled sequence
+        """
+        return self.__sequences[self.intern(sequence)]
+
+    def get(self, seq_id: int) -> str:
+        return self.__sequences[seq_id]
+
+    def get_all(self, seq_ids: np.ndarray) -> List[str]:
+        sequences = self.__sequences
+        return [sequences[seq_id] for seq_id in np.asarray(seq_ids).tolist()]
+
+    def __len__(self) -> int:
+        return len(self.__sequences)
+
+    def __getstate__(self) -> Dict:
+        # locks cannot be pickled, a new one is created with the copy
+        return {"sequences": self.__sequences}
+
+    def __setstate__(self, state: Dict) -> None:
+        self.__sequences = state["sequences"]
+        self.__ids = {sequence: seq_id for seq_id, sequence in enumerate(self.__sequences)}
+        self.__lock = threading.Lock()
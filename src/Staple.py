@@ -1,70 +1,39 @@
 from __future__ import annotations
 
-from collections import defaultdict
-from typing import List, Dict, Tuple
+from typing import List, Tuple, TYPE_CHECKING
 
-import pandas as pd
+import numpy as np
+
+from src.constants import LOCATION_NAMES
+from src.coordinates import format_helix_base
+
+if TYPE_CHECKING:
+    from src.StapleTable import StapleTable
 
 
 class Staple:
     """
     Staples strengthen the scaffolds or work as overhangs to connect other origami.
-    """
-    __start_helix_idx: int = None
-    __start_base_idx: int = None
-    __end_helix_idx: int = None
-    __end_base_idx: int = None
 
-    __sequences: List[str] = None
-    __color: str = None
+    A staple is a thin view onto one row of a StapleTable, which holds the actual data.
+    """
+    __slots__ = ("__table", "__index")
 
-    # Related to overhangs
-    is_overhang: bool = False
-    __location: str = None
+    __table: StapleTable
+    __index: int
 
-    def __init__(self, staple_info: pd.Series, color_setting: Dict[str, str]) -> None:
+    def __init__(self, table: StapleTable, index: int) -> None:
         """
         Initialisation method.
-        :param staple_info: Row in csv file
-        :param color_setting: color for different staples such as overhangs, pre-determined staples.
-        :param origami_name: position of origami in the whole design
+        :param table: staple table holding the data of this staple
+        :param index: position of the staple in the table
         """
-        if len(staple_info) != 7:
-            raise Exception("Error: Failed to process staples on the origami.")
-
-        try:
-            self.__start_helix_idx = staple_info["Start"]
-            self.__start_base_idx = staple_info["Start_base"]
-            self.__end_helix_idx = staple_info["End"]
-            self.__end_base_idx = staple_info["End_base"]
-            self.__sequences = list(staple_info["Sequence"])
-            self.__color = staple_info["Color"]
-        except Exception as e:
-            raise Exception(f"Error: Incorrect data for creating a staple {e}.")
-
-        # Locate staples on the origami in the direction of left, right, top or bottom
-        if self.__color == color_setting["side_overhang"]:
-            # Side staples
-            if self.__start_base_idx > 200:
-                self.__location = "r"  # right
-            else:
-                self.__location = "l"
-        elif self.__color == color_setting["other_overhang"]:
-            # Bottom or top staples
-            if self.__start_helix_idx > 15:
-                self.__location = "b"  # bottom
-            else:
-                self.__location = "t"
-        elif self.__color == color_setting["modified_staples"]:
-            # modified inactive staples
-            self.__location = "modified"
-        else:
-            self.__location = "normal"
-
-        # End processing if the staple is a normal staple
-        if "?" in list(self.__sequences) and \
-                self.__color in [color_setting["side_overhang"], color_setting["other_overhang"]]:
-            self.is_overhang = True
+        self.__table = table
+        self.__index = index
+
+    @property
+    def is_overhang(self) -> bool:
+        return bool(self.__table.get_is_overhang()[self.__index])
 
     @staticmethod
     def extract_staples_sequences(staple_list: List[Staple]) -> List[str]:
@@ -73,7 +42,7 @@ class Staple:
         :param staple_list: list of staples
         :return: list of sequence strings
         """
-        return ["".join(staple.get_sequence()) for staple in staple_list]
+        return [staple.get_sequence() for staple in staple_list]
 
     def __str__(self):
         """
@@ -81,9 +50,11 @@ class Staple:
         :return:
         """
         space = " " * 3
-        return "{0:<2}[{1:<3}]{2}{3:<2}[{4:<3}]{5}{6}".format(self.__start_helix_idx, self.__start_base_idx, space,
-                                                              self.__end_helix_idx, self.__end_base_idx, space,
-                                                              self.__sequences)
+        start_helix_idx, end_helix_idx = self.get_helix_index()
+        start_base_idx, end_base_idx = self.get_base_index()
+        return "{0:<2}[{1:<3}]{2}{3:<2}[{4:<3}]{5}{6}".format(start_helix_idx, start_base_idx, space,
+                                                              end_helix_idx, end_base_idx, space,
+                                                              self.get_sequence())
 
     @staticmethod
     def read_staple_data(staples_list: List[Staple]) -> dict:
@@ -92,33 +63,35 @@ class Staple:
         :param staples_list: list of staples provided
         :return: dict in the form of csv file
         """
-        staples_data_dict = defaultdict(list)
-
-        for staple in staples_list:
-            start = str(staple.get_helix_index()[0]) + "[" + str(staple.get_base_index()[0]) + "]"
-            end = str(staple.get_helix_index()[1]) + "[" + str(staple.get_base_index()[1]) + "]"
-            staples_data_dict["Start"].append(start)
-            staples_data_dict["End"].append(end)
-            staples_data_dict["Sequence"].append("".join(staple.get_sequence()))
-            staples_data_dict["Length"].append(len(staple.get_sequence()))
-            staples_data_dict["Color"].append(staple.get_color())
-
-        return staples_data_dict
-
-    def get_sequence(self) -> List:
-        return self.__sequences
+        # each getter is called once per staple, and the coordinates are formatted for all staples at once
+        helix_index = np.array([staple.get_helix_index() for staple in staples_list], dtype=np.int64).reshape(-1, 2)
+        base_index = np.array([staple.get_base_index() for staple in staples_list], dtype=np.int64).reshape(-1, 2)
+        sequences = [staple.get_sequence() for staple in staples_list]
+
+        return {
+            "Start": format_helix_base(helix_index[:, 0], base_index[:, 0]).tolist(),
+            "End": format_helix_base(helix_index[:, 1], base_index[:, 1]).tolist(),
+            "Sequence": sequences,
+            "Length": [len(sequence) for sequence in sequences],
+            "Color": [staple.get_color() for staple in staples_list]
+        }
+
+    def get_sequence(self) -> str:
+        return self.__table.get_sequence(self.__index)
 
     def get_position(self) -> str:
-        return self.__location
+        return LOCATION_NAMES[self.__table.get_position()[self.__index]]
 
     def get_base_index(self) -> Tuple:
-        return self.__start_base_idx, self.__end_base_idx
+        start_base_idx, end_base_idx = self.__table.get_base_index()
+        return int(start_base_idx[self.__index]), int(end_base_idx[self.__index])
 
     def get_helix_index(self) -> Tuple:
-        return self.__start_helix_idx, self.__end_helix_idx
+        start_helix_idx, end_helix_idx = self.__table.get_helix_index()
+        return int(start_helix_idx[self.__index]), int(end_helix_idx[self.__index])
 
     def get_color(self) -> str:
-        return self.__color
+        return self.__table.get_color()[self.__index]
 
     def set_sequence(self, sequence: str) -> None:
-        self.__sequences = list(sequence)
+        self.__table.set_sequence(self.__index, sequence)
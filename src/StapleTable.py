@@ -0,0 +1,258 @@
+from __future__ import annotations
+
+from typing import Dict, List, Tuple, Union
+
+import numpy as np
+import pandas as pd
+
+from src.SequencePool import SequencePool
+from src.Staple import Staple
+from src.constants import TOP, BOTTOM, LEFT, RIGHT, MODIFIED, NORMAL, LOCATION_NAMES
+from src.coordinates import format_helix_base, narrowest_int_dtype
+
+
+class StapleTable:
+    """
+    Columnar store of staples. Helix and base indexes, location codes and colors are kept in NumPy arrays, and the
+    sequences are ids of interned sequences in a pool shared by the tables of a design.
+    """
+    __start_helix_idx: np.ndarray = None
+    __start_base_idx: np.ndarray = None
+    __end_helix_idx: np.ndarray = None
+    __end_base_idx: np.ndarray = None
+
+    __location: np.ndarray = None  # location codes, see src/constants.py
+    __is_overhang: np.ndarray = None
+    __color: np.ndarray = None
+    __row_id: np.ndarray = None  # row of the staple in the source csv
+
+    # sequence i is __pool.get(__seq_id[i])
+    __seq_id: np.ndarray = None
+    __seq_length: np.ndarray = None
+    __pool: SequencePool = None  # shared by every table taken from the same source
+
+    def __init__(self,
+                 helix_index: Tuple[np.ndarray, np.ndarray],
+                 base_index: Tuple[np.ndarray, np.ndarray],
+                 location: np.ndarray,
+                 is_overhang: np.ndarray,
+                 color: np.ndarray,
+                 row_id: np.ndarray,
+                 seq_id: np.ndarray,
+                 seq_length: np.ndarray,
+                 pool: SequencePool) -> None:
+        self.__start_helix_idx, self.__end_helix_idx = helix_index
+        self.__start_base_idx, self.__end_base_idx = base_index
+        self.__location = location
+        self.__is_overhang = is_overhang
+        self.__color = color
+        self.__row_id = row_id
+        self.__seq_id = seq_id
+        self.__seq_length = seq_length
+        self.__pool = pool
+
+    @classmethod
+    def from_dataframe(cls,
+                       csv_df: pd.DataFrame,
+                       color_setting: Dict[str, str],
+                       pool: SequencePool = None) -> StapleTable:
+        """
+        Build the table from a split csv dataframe (columns Start, Start_base, End, End_base, Sequence, Length, Color)
+        and classify every staple in one vectorized pass.
+        :param csv_df: split csv dataframe
+        :param color_setting: color for different staples such as overhangs, pre-determined staples.
+        :param pool: pool the sequences are interned in; a pool of this table only if not provided
+        :return: staple table
+        """
+        if len(csv_df.columns) != 7:
+            raise Exception("Error: Failed to process staples on the origami.")
+
+        try:
+            start_helix = csv_df["Start"].to_numpy()
+            start_base = csv_df["Start_base"].to_numpy()
+            end_helix = csv_df["End"].to_numpy()
+            end_base = csv_df["End_base"].to_numpy()
+            sequences = csv_df["Sequence"].tolist()
+            color = csv_df["Color"].to_numpy()
+        except Exception as e:
+            raise Exception(f"Error: Incorrect data for creating staples {e}.")
+
+        # Locate staples on the origami in the direction of left, right, top or bottom
+        side = color == color_setting["side_overhang"]
+        other = color == color_setting["other_overhang"]
+        modified = color == color_setting["modified_staples"]
+
+        location = np.full(len(csv_df), NORMAL, dtype=np.int8)
+        location[side] = np.where(start_base[side] > 200, RIGHT, LEFT)
+        location[other] = np.where(start_helix[other] > 15, BOTTOM, TOP)
+        location[modified] = MODIFIED
+
+        pool = pool if pool is not None else SequencePool()
+        seq_id = pool.intern_all(sequences)
+        seq_length = np.fromiter(map(len, sequences), dtype=np.int64, count=len(sequences))
+        seq_length = seq_length.astype(narrowest_int_dtype(seq_length))
+
+        # Only side and other colored staples with unassigned bases are overhangs
+        is_overhang = csv_df["Sequence"].str.contains("?", regex=False).to_numpy(dtype=bool) & (side | other)
+
+        return cls((start_helix, end_helix), (start_base, end_base), location, is_overhang, color,
+                   csv_df.index.to_numpy(), seq_id, seq_length, pool)
+
+    def take(self, indices: Union[np.ndarray, List[int]]) -> StapleTable:
+        """
+        Select staples by position. The selected table shares the sequence pool with this one.
+        :param indices: positions of the staples to keep
+        :return: staple table
+        """
+        indices = np.asarray(indices, dtype=np.int64)
+
+        return StapleTable((self.__start_helix_idx[indices], self.__end_helix_idx[indices]),
+                           (self.__start_base_idx[indices], self.__end_base_idx[indices]),
+                           self.__location[indices], self.__is_overhang[indices], self.__color[indices],
+                           self.__row_id[indices], self.__seq_id[indices], self.__seq_length[indices], self.__pool)
+
+    def split_by_location(self) -> Dict[str, StapleTable]:
+        """
+        Classify staples by their locations. Overhangs keep their own location; staples that are not overhangs are
+        either modified or normal ones. Locations are ordered by their first appearance in the table.
+        :return: dict of location and staples in this location
+        """
+        route = np.where(self.__is_overhang, self.__location,
+                         np.where(self.__location == MODIFIED, MODIFIED, NORMAL))
+
+        codes, first_seen = np.unique(route, return_index=True)
+
+        return {LOCATION_NAMES[code]: self.take(np.flatnonzero(route == code))
+                for code in codes[np.argsort(first_seen)]}
+
+    @staticmethod
+    def extract_staples_sequences(staple_table: StapleTable) -> List[str]:
+        """
+        Create a list of sequences from provided staples.
+        :param staple_table: staple table
+        :return: list of sequence strings
+        """
+        return staple_table.get_sequences()
+
+    def read_staple_data(self) -> dict:
+        """
+        Convert split helix and base indexes back to the original format helix_index[base_index], formatted for the
+        whole table at once.
+        :return: dict in the form of csv file
+        """
+        return {
+            "Start": format_helix_base(self.__start_helix_idx, self.__start_base_idx),
+            "End": format_helix_base(self.__end_helix_idx, self.__end_base_idx),
+            "Sequence": self.get_sequences(),
+            "Length": self.__seq_length,
+            "Color": self.__color
+        }
+
+    def update_digest(self, digest) -> None:
+        """
+        Feed everything base assignment reads from this table into a hash object.
+        :param digest: hashlib hash object
+        :return: None
+        """
+        for arr in (self.__start_helix_idx, self.__start_base_idx, self.__end_helix_idx, self.__end_base_idx,
+                    self.__location, self.__row_id, self.__seq_length):
+            digest.update(np.ascontiguousarray(arr, dtype=np.int64).tobytes())
+
+        digest.update("".join(self.get_sequences()).encode("ascii"))
+
+    def __len__(self) -> int:
+        return len(self.__location)
+
+    def __getitem__(self, index: int) -> Staple:
+        if index < 0:
+            index += len(self)
+
+        if not 0 <= index < len(self):
+            raise IndexError("Error: Staple index out of range.")
+
+        return Staple(self, index)
+
+    def __iter__(self):
+        return (Staple(self, index) for index in range(len(self)))
+
+    def rebind(self, pool: SequencePool) -> None:
+        """
+        Intern the sequences of this table in another pool, e.g. after the table is received from a worker process.
+        :param pool: sequence pool
+        :return: None
+        """
+        if pool is not self.__pool:
+            self.__seq_id = pool.intern_all(self.get_sequences())
+            self.__pool = pool
+
+    def __getstate__(self) -> Dict:
+        # only the sequences of this table are sent to another process, not the whole pool
+        state = self.__dict__.copy()
+        state["_StapleTable__pool"] = None
+        state["sequences"] = self.get_sequences()
+
+        return state
+
+    def __setstate__(self, state: Dict) -> None:
+        sequences = state.pop("sequences")
+        self.__dict__.update(state)
+        self.__pool = SequencePool()
+        self.__seq_id = self.__pool.intern_all(sequences)
+
+    def get_sequence(self, index: int) -> str:
+        return self.__pool.get(self.__seq_id[index])
+
+    def get_sequences(self) -> List[str]:
+        return self.__pool.get_all(self.__seq_id)
+
+    def get_pool(self) -> SequencePool:
+        return self.__pool
+
+    def get_position(self) -> np.ndarray:
+        return self.__location
+
+    def get_base_index(self) -> Tuple[np.ndarray, np.ndarray]:
+        return self.__start_base_idx, self.__end_base_idx
+
+    def get_helix_index(self) -> Tuple[np.ndarray, np.ndarray]:
+        return self.__start_helix_idx, self.__end_helix_idx
+
+    def get_color(self) -> np.ndarray:
+        return self.__color
+
+    def get_row_id(self) -> np.ndarray:
+        return self.__row_id
+
+    def get_is_overhang(self) -> np.ndarray:
+        return self.__is_overhang
+
+    def get_length(self) -> np.ndarray:
+        return self.__seq_length
+
+    def set_sequences(self, sequences: List[str]) -> None:
+        """
+        Overwrite the sequences of all staples in this table.
+        :param sequences: new sequences in the order of the staples
+        :return: None
+        """
+        if len(sequences) != len(self):
+            raise Exception("Error: Number of sequences does not match the number of staples.")
+
+        if not np.array_equal(np.fromiter(map(len, sequences), dtype=np.int64, count=len(sequences)),
+                              self.__seq_length):
+            raise Exception("Error: Assigned sequence has a different length from the staple.")
+
+        self.__seq_id = self.__pool.intern_all(sequences)
+
+    def set_sequence(self, index: int, sequence: str) -> None:
+        """
+        Point one staple at a new interned sequence; the old sequence stays as it is for other tables holding it.
+        Assigned bases only replace unassigned ones, so the length of the sequence never changes.
+        :param index: position of the staple in this table
+        :param sequence: new sequence
+        :return: None
+        """
+        if len(sequence) != self.__seq_length[index]:
+            raise Exception("Error: Assigned sequence has a different length from the staple.")
+
+        self.__seq_id[index] = self.__pool.intern(sequence)
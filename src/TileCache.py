@@ -0,0 +1,186 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from src.sequence_kernels import pack_sequences, unpack_sequences
+
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Bump when the parsers or the layout of cached arrays change, so that old entries are never read
+TILE_CACHE_VERSION = 1
+
+DEFAULT_CACHE_DIR = os.path.join(".cache", "tiles")
+DEFAULT_MAX_BYTES = 512 * 1024 * 1024
+
+# split columns of the parsed tile stored as integer arrays
+_INT_COLUMNS = ["Start", "Start_base", "End", "End_base", "Length"]
+
+
+class TileCache:
+    """
+    Parsed origami tiles cached on disk as npz files, keyed by a hash of the tile file, the color setting and the
+    parser version. Entries are evicted from the least recently used one when the cache grows over its size limit.
+    """
+    __cache_dir: str = DEFAULT_CACHE_DIR
+    __color_setting: Dict[str, str] = None
+    __max_bytes: int = DEFAULT_MAX_BYTES
+
+    def __init__(self,
+                 color_setting: Dict[str, str],
+                 cache_dir: str = DEFAULT_CACHE_DIR,
+                 max_bytes: int = DEFAULT_MAX_BYTES) -> None:
+        self.__color_setting = color_setting
+        self.__cache_dir = cache_dir
+        self.__max_bytes = max_bytes
+
+    def key(self, tile_path: str, scaffold_sequence: Optional[str] = None) -> str:
+        """
+        Hash everything the parsed tile depends on.
+        :param tile_path: path of the csv or Cadnano 2 json file
+        :param scaffold_sequence: scaffold sequence applied to Cadnano 2 json designs
+        :return: hex digest
+        """
+        digest = hashlib.sha256()
+        digest.update(f"{TILE_CACHE_VERSION}".encode("ascii"))
+        digest.update(json.dumps(self.__color_setting, sort_keys=True).encode("utf-8"))
+        digest.update((scaffold_sequence or "").encode("ascii"))
+
+        with open(tile_path, "rb") as f:
+            for chunk in iter(lambda: f.read(1 << 20), b""):
+                digest.update(chunk)
+
+        return digest.hexdigest()
+
+    def load(self, key: str) -> Optional[Tuple[pd.DataFrame, pd.DataFrame, Optional[np.ndarray]]]:
+        """
+        Load a parsed tile.
+        :param key: key of the tile
+        :return: parsed dataframe, copy of the original csv and scaffold path, or None if not cached
+        """
+        entry_path = self.__entry_path(key)
+
+        if not os.path.exists(entry_path):
+            return None
+
+        try:
+            with np.load(entry_path, allow_pickle=False) as data:
+                arrays = {name: data[name] for name in data.files}
+        except Exception as e:
+            # a broken entry is parsed again and overwritten
+            logger.warning(f"Ignore broken tile cache entry {entry_path} with {e}")
+            return None
+
+        # mark as recently used
+        os.utime(entry_path)
+
+        sequences = unpack_sequences(arrays["sequence_buffer"], arrays["sequence_offsets"])
+        colors = pd.Categorical.from_codes(arrays["color_codes"],
+                                           categories=[color.decode("ascii") for color in arrays["color_categories"]])
+
+        csv_df = pd.DataFrame({name: arrays[name] for name in _INT_COLUMNS[:4]})
+        csv_df["Sequence"] = pd.Series(sequences)
+        csv_df["Length"] = arrays["Length"]
+        csv_df["Color"] = pd.Series(colors)
+
+        csv_df_copy = pd.DataFrame({
+            "Start": pd.Series(unpack_sequences(arrays["raw_start_buffer"], arrays["raw_start_offsets"])),
+            "End": pd.Series(unpack_sequences(arrays["raw_end_buffer"], arrays["raw_end_offsets"])),
+            "Sequence": pd.Series(sequences),
+            "Length": arrays["raw_length"],
+            "Color": pd.Series(colors.copy())
+        })
+
+        scaffold_path = arrays["scaffold_path"] if "scaffold_path" in arrays else None
+
+        return csv_df, csv_df_copy, scaffold_path
+
+    def store(self,
+              key: str,
+              csv_df: pd.DataFrame,
+              csv_df_copy: pd.DataFrame,
+              scaffold_path: Optional[np.ndarray] = None) -> None:
+        """
+        Store a parsed tile and evict old entries if the cache is too large.
+        :param key: key of the tile
+        :param csv_df: parsed dataframe with split helix and base columns
+        :param csv_df_copy: copy of the original csv
+        :param scaffold_path: scaffold path of Cadnano 2 json designs
+        :return: None
+        """
+        entry_path = self.__entry_path(key)
+        temp_path = f"{entry_path}.{os.getpid()}.tmp"
+
+        try:
+            colors = pd.Categorical(csv_df["Color"])
+            arrays = {name: csv_df[name].to_numpy() for name in _INT_COLUMNS}
+
+            arrays["sequence_buffer"], arrays["sequence_offsets"] = pack_sequences(csv_df["Sequence"].tolist())
+            arrays["color_codes"] = colors.codes
+            arrays["color_categories"] = np.array([str(color).encode("ascii") for color in colors.categories],
+                                                  dtype="S")
+            arrays["raw_start_buffer"], arrays["raw_start_offsets"] = pack_sequences(
+                csv_df_copy["Start"].astype(str).tolist())
+            arrays["raw_end_buffer"], arrays["raw_end_offsets"] = pack_sequences(
+                csv_df_copy["End"].astype(str).tolist())
+            arrays["raw_length"] = csv_df_copy["Length"].to_numpy()
+
+            if scaffold_path is not None:
+                arrays["scaffold_path"] = scaffold_path
+
+            os.makedirs(self.__cache_dir, exist_ok=True)
+
+            with open(temp_path, "wb") as f:
+                np.savez(f, **arrays)
+            os.replace(temp_path, entry_path)
+        except Exception as e:
+            # caching is best effort and never fails the run
+            logger.warning(f"Cannot write tile cache entry {entry_path} with {e}")
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            return
+
+        self.__evict()
+
+    def __evict(self) -> None:
+        """
+        Remove least recently used entries until the cache fits in its size limit.
+        :return: None
+        """
+        entries: List[Tuple[float, int, str]] = []
+
+        for entry in os.scandir(self.__cache_dir):
+            if entry.name.endswith(".npz"):
+                try:
+                    stat = entry.stat()
+                except FileNotFoundError:
+                    continue
+
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+
+        total_bytes = sum(size for _, size, _ in entries)
+
+        for _, size, path in sorted(entries):
+            if total_bytes <= self.__max_bytes:
+                break
+
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                # evicted by another process
+                pass
+
+            total_bytes -= size
+
+    def __entry_path(self, key: str) -> str:
+        return os.path.join(self.__cache_dir, f"{key}.npz")
+
+    def get_cache_dir(self) -> str:
+        return self.__cache_dir
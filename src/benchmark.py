@@ -0,0 +1,221 @@
+import argparse
+import datetime
+import os
+import subprocess
+import tempfile
+from typing import Dict, List, Tuple
+
+import pandas as pd
+
+from src.BatchRunner import BatchRunner
+from src.ExtendedDNAOrigami import ExtendedDNAOrigami
+from src.Generator import Generator
+from src.Profiler import Profiler, profile_stage
+from src.synthetic_design import generate_design, grid_size
+
+import logging
+
+from src.utils import config_logging
+
+config_logging()
+logger = logging.getLogger(__name__)
+
+# Timed stages, in the order they run
+BENCHMARK_STAGES = ["load_design", "extract", "assign_bases", "export"]
+
+# Columns describing each benchmarked design, followed by the seconds of each stage and the total
+BENCHMARK_COLUMNS = ["Label", "Date", "Size", "Origami", "Helices", "Overhang Density", "Workers", "Staples",
+                     "Overhangs"]
+
+
+def version_label() -> str:
+    """
+    Short hash of the checked out git commit, to tell results of different versions apart.
+    :return: label, unknown outside a git repository
+    """
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except Exception:
+        return "unknown"
+
+
+def benchmark_design(config_path: str, save_path: str, workers: int = 1, repeat: int = 1) -> Dict:
+    """
+    Time each stage of a run on one design: parsing the tiles, extracting staples, assigning bases and exporting the
+    csv copies. Tiles are parsed every time rather than read from the tile cache.
+    :param config_path: configuration file of the design
+    :param save_path: folder the results are exported to
+    :param workers: number of worker processes
+    :param repeat: number of runs, the fastest time of each stage is kept
+    :return: fastest seconds of each stage and counts of the last run
+    """
+    stage_times = {stage: float("inf") for stage in BENCHMARK_STAGES}
+    counts = dict()
+
+    for run_idx in range(repeat):
+        profiler = Profiler(trace_memory=False)
+
+        with profile_stage(profiler, "load_design"):
+            extended_origami = ExtendedDNAOrigami.load_config(config_path, workers=workers, use_cache=False)
+
+        assigner = BatchRunner.assign_design(extended_origami, 42, workers=workers, profiler=profiler)
+        generator = Generator.load_data(assigner, extended_origami)
+        export_args = argparse.Namespace(save_path=save_path, save_name=f"run_{run_idx}", format="csv",
+                                         workers=workers)
+
+        with profile_stage(profiler, "export"):
+            generator.export_bases_in_original_csv(export_args)
+
+        for stage, stage_report in profiler.report()["stages"].items():
+            stage_times[stage] = min(stage_times[stage], stage_report["time"])
+
+        counts = dict(profiler.get_counts(), origami=len(extended_origami.get_origami_position()))
+
+        generator.release()
+        assigner.release()
+        extended_origami.release()
+
+    return {"times": stage_times, "counts": counts}
+
+
+def run_benchmarks(sizes: List[Tuple[int, int]],
+                   helices: int = 24,
+                   overhang_density: float = 0.5,
+                   shift: int = 2,
+                   workers: int = 1,
+                   repeat: int = 3,
+                   label: str = None,
+                   design_path: str = None) -> pd.DataFrame:
+    """
+    Generate a synthetic design of each grid size and time its stages.
+    :param sizes: grid sizes (N, M)
+    :param helices: number of helices of each origami
+    :param overhang_density: fraction of the slots with an overhang, between 0 and 1
+    :param shift: number of empty helices above origami with top overhangs
+    :param workers: number of worker processes
+    :param repeat: number of runs of each design, the fastest time of each stage is kept
+    :param label: label of the version benchmarked; the git commit if not provided
+    :param design_path: folder the designs and exports are kept in; a temporary folder if not provided
+    :return: one row per grid size
+    """
+    label = label if label is not None else version_label()
+    date = datetime.datetime.now().isoformat(timespec="seconds")
+    rows = []
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        root_path = design_path if design_path is not None else temp_dir
+
+        for size_x, size_y in sizes:
+            size_path = os.path.join(root_path, f"{size_x}x{size_y}")
+            config_path = generate_design(os.path.join(size_path, "design"), size_x, size_y, helices=helices,
+                                          overhang_density=overhang_density, shift=shift)
+            os.makedirs(os.path.join(size_path, "results"), exist_ok=True)
+
+            result = benchmark_design(config_path, os.path.join(size_path, "results"), workers, repeat)
+
+            rows.append({"Label": label, "Date": date, "Size": f"{size_x}x{size_y}",
+                         "Origami": result["counts"]["origami"], "Helices": helices,
+                         "Overhang Density": overhang_density, "Workers": workers,
+                         "Staples": result["counts"].get("staples", 0),
+                         "Overhangs": result["counts"].get("overhangs", 0),
+                         **result["times"], "total": sum(result["times"].values())})
+
+            logger.info(f"Benchmarked {size_x} x {size_y} origami in {rows[-1]['total']:.3f} s")
+
+    return pd.DataFrame(rows, columns=BENCHMARK_COLUMNS + BENCHMARK_STAGES + ["total"])
+
+
+def record_results(results_df: pd.DataFrame, results_path: str) -> pd.DataFrame:
+    """
+    Append benchmark results to the results of earlier versions.
+    :param results_df: new results
+    :param results_path: csv file of all results
+    :return: all results
+    """
+    if os.path.exists(results_path):
+        results_df = pd.concat([pd.read_csv(results_path), results_df], ignore_index=True)
+
+    results_df.to_csv(results_path, index=False)
+
+    return results_df
+
+
+def compare_results(results_df: pd.DataFrame, baseline: str, label: str) -> pd.DataFrame:
+    """
+    Stage times of one version relative to another on the designs benchmarked by both, from their latest results.
+    :param results_df: all results
+    :param baseline: label of the version compared against
+    :param label: label of the compared version
+    :return: ratio of the seconds of each stage, below 1 where the compared version is faster
+    """
+    settings = ["Size", "Helices", "Overhang Density", "Workers"]
+    stage_columns = BENCHMARK_STAGES + ["total"]
+
+    latest = {version: results_df[results_df["Label"] == version].drop_duplicates(settings, keep="last")
+              .set_index(settings)[stage_columns] for version in [baseline, label]}
+
+    if latest[baseline].empty or latest[label].empty:
+        raise Exception(f"Error: No results of {baseline if latest[baseline].empty else label} to compare.")
+
+    return (latest[label] / latest[baseline]).dropna().reset_index()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+
+    parser.add_argument("--sizes",
+                        type=grid_size,
+                        nargs="+",
+                        default=[(2, 2), (5, 5), (10, 10), (20, 20)],
+                        help="Grid sizes of the synthetic designs in the form NxM")
+    parser.add_argument("--helices",
+                        type=int,
+                        default=24,
+                        help="Number of helices of each origami")
+    parser.add_argument("--overhang_density",
+                        type=float,
+                        default=0.5,
+                        help="Fraction of the slots at the edges of each origami with an overhang")
+    parser.add_argument("--shift",
+                        type=int,
+                        default=2,
+                        help="Number of empty helices above origami with top overhangs")
+    parser.add_argument("--workers",
+                        type=int,
+                        default=1,
+                        help="Number of worker processes")
+    parser.add_argument("--repeat",
+                        type=int,
+                        default=3,
+                        help="Number of runs of each design, the fastest time of each stage is kept")
+    parser.add_argument("--label",
+                        type=str,
+                        default=None,
+                        help="Label of the benchmarked version; the current git commit if not given")
+    parser.add_argument("--results",
+                        type=str,
+                        default="benchmark_results.csv",
+                        help="Csv file the results are appended to")
+    parser.add_argument("--compare",
+                        type=str,
+                        default=None,
+                        metavar="BASELINE",
+                        help="Label of earlier results to compare the stage times with")
+    parser.add_argument("--design_path",
+                        type=str,
+                        default=None,
+                        help="Keep the synthetic designs and exports in this folder")
+
+    args = parser.parse_args()
+
+    results_df = run_benchmarks(args.sizes, helices=args.helices, overhang_density=args.overhang_density,
+                                shift=args.shift, workers=args.workers, repeat=args.repeat, label=args.label,
+                                design_path=args.design_path)
+    all_results_df = record_results(results_df, args.results)
+
+    logger.info(f"Benchmark results saved to {args.results} \n{results_df.to_string(index=False)}")
+
+    if args.compare is not None:
+        logger.info(f"Seconds relative to {args.compare} \n"
+                    f"{compare_results(all_results_df, args.compare, results_df['Label'].iloc[0]).to_string()}")
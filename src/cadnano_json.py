@@ -0,0 +1,201 @@
+import json
+from typing import Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from src.coordinates import narrowest_int_dtype
+from src.sequence_kernels import reverse_complement
+
+# Cadnano 2 draws staples without a colour entry in grey
+CADNANO_DEFAULT_COLOR = "#888888"
+
+_CHUNK_SIZE = 1 << 16
+
+
+class _Helix:
+    """
+    Strands of one helix, kept instead of the decoded json object.
+    """
+    __slots__ = ("scaf", "stap", "count", "colors")
+
+    def __init__(self, vstrand: Dict) -> None:
+        # [prev_helix, prev_base, next_helix, next_base] at each base
+        self.scaf: List[List[int]] = vstrand["scaf"]
+        self.stap: List[List[int]] = vstrand["stap"]
+
+        # number of nucleotides at each base: 0 for skips, more than 1 for loops
+        n_bases = len(self.scaf)
+        count = np.ones(n_bases, dtype=np.int64)
+
+        if vstrand.get("loop"):
+            count += np.asarray(vstrand["loop"], dtype=np.int64)[:n_bases]
+        if vstrand.get("skip"):
+            count += np.asarray(vstrand["skip"], dtype=np.int64)[:n_bases]
+
+        self.count: List[int] = count.tolist()
+
+        # 5' base of a staple: colour
+        self.colors: Dict[int, str] = {int(base): f"#{int(color) & 0xFFFFFF:06x}"
+                                       for base, color in vstrand.get("stap_colors", [])}
+
+
+def iter_vstrands(json_path: str, chunk_size: int = _CHUNK_SIZE) -> Iterator[Dict]:
+    """
+    Decode the helices of a Cadnano 2 design one at a time, reading the file in chunks. Only one helix is held as a
+    json object at any time.
+    :param json_path: path of the Cadnano 2 design
+    :param chunk_size: number of characters read at once
+    :return: iterator of vstrand dicts
+    """
+    decoder = json.JSONDecoder()
+
+    with open(json_path, "r") as f:
+        buffer = ""
+
+        # skip to the start of the vstrands array
+        while True:
+            key_pos = buffer.find('"vstrands"')
+            array_pos = buffer.find("[", key_pos) if key_pos >= 0 else -1
+
+            if array_pos >= 0:
+                buffer = buffer[array_pos + 1:]
+                break
+
+            chunk = f.read(chunk_size)
+
+            if not chunk:
+                raise Exception(f"Error: No vstrands found in Cadnano design {json_path}")
+
+            buffer += chunk
+
+        while True:
+            buffer = buffer.lstrip().lstrip(",").lstrip()
+
+            if buffer.startswith("]"):
+                return
+
+            try:
+                if not buffer:
+                    raise json.JSONDecodeError("Empty buffer", buffer, 0)
+
+                vstrand, end = decoder.raw_decode(buffer)
+            except json.JSONDecodeError:
+                # helix cut at the end of the chunk
+                chunk = f.read(chunk_size)
+
+                if not chunk:
+                    raise Exception(f"Error: Incomplete vstrands in Cadnano design {json_path}")
+
+                buffer += chunk
+                continue
+
+            buffer = buffer[end:]
+
+            yield vstrand
+
+
+def _five_prime_ends(helix_dict: Dict[int, _Helix], strand: str) -> List[Tuple[int, int]]:
+    """
+    Find 5' ends of all strands of one type, sorted by helix and base.
+    :param helix_dict: helix number: helix
+    :param strand: scaf or stap
+    :return: list of (helix, base)
+    """
+    ends = []
+
+    for num, helix in helix_dict.items():
+        for base, (prev_helix, _, next_helix, _) in enumerate(getattr(helix, strand)):
+            if prev_helix == -1 and next_helix != -1:
+                ends.append((num, base))
+
+    return sorted(ends)
+
+
+def _trace(helix_dict: Dict[int, _Helix],
+           strand: str,
+           five_prime: Tuple[int, int],
+           max_length: int) -> List[Tuple[int, int]]:
+    """
+    Follow a strand from its 5' end to its 3' end.
+    :param helix_dict: helix number: helix
+    :param strand: scaf or stap
+    :param five_prime: (helix, base) of the 5' end
+    :param max_length: number of bases in the design, which no strand can exceed
+    :return: list of (helix, base) from 5' to 3'
+    """
+    path = []
+    num, base = five_prime
+
+    while num != -1:
+        path.append((num, base))
+
+        if len(path) > max_length:
+            raise Exception(f"Error: Strand starting at {five_prime[0]}[{five_prime[1]}] does not end")
+
+        _, _, num, base = getattr(helix_dict[num], strand)[base]
+
+    return path
+
+
+def read_cadnano_json(json_path: str, scaffold_sequence: Optional[str] = None) -> Tuple[pd.DataFrame, np.ndarray]:
+    """
+    Read staples from a Cadnano 2 design in the layout of DNAOrigami after splitting Start and End, i.e. columns Start,
+    Start_base, End, End_base, Sequence, Length and Color. Staple bases are complementary to the scaffold sequence
+    threaded from the 5' end of the scaffold, and "?" where there is no scaffold, as in the csv exported by Cadnano.
+    :param json_path: path of the Cadnano 2 design
+    :param scaffold_sequence: scaffold sequence from its 5' end; all staple bases are "?" if not provided
+    :return: staples sorted by their 5' ends, and (helix, base) of each scaffold nucleotide from the 5' end
+    """
+    helix_dict = {int(vstrand["num"]): _Helix(vstrand) for vstrand in iter_vstrands(json_path)}
+    max_length = sum(len(helix.scaf) for helix in helix_dict.values())
+
+    # Thread the scaffold sequence, continuing over scaffold strands in order of their 5' ends
+    scaffold_sequence = "" if scaffold_sequence is None else scaffold_sequence.strip().upper()
+    scaffold_bases: Dict[Tuple[int, int], str] = dict()
+    scaffold_path = []
+    cursor = 0
+
+    scaffold_ends = _five_prime_ends(helix_dict, "scaf")
+
+    if not scaffold_ends and any(next_helix != -1 for helix in helix_dict.values()
+                                 for _, _, next_helix, _ in helix.scaf):
+        raise Exception(f"Error: Scaffold in Cadnano design {json_path} is circular and has no 5' end")
+
+    for five_prime in scaffold_ends:
+        for num, base in _trace(helix_dict, "scaf", five_prime, max_length):
+            count = helix_dict[num].count[base]
+            scaffold_bases[(num, base)] = scaffold_sequence[cursor: cursor + count].ljust(count, "?")
+            scaffold_path.extend([(num, base)] * count)  # one entry per nucleotide, repeated for loops
+            cursor += count
+
+    # Staples
+    start_helix, start_base, end_helix, end_base, sequences, colors = [], [], [], [], [], []
+
+    for five_prime in _five_prime_ends(helix_dict, "stap"):
+        path = _trace(helix_dict, "stap", five_prime, max_length)
+
+        # staple bases pair with the scaffold nucleotides at the same positions in the opposite direction
+        sequences.append("".join(reverse_complement(scaffold_bases[position]) if position in scaffold_bases
+                                 else "?" * helix_dict[position[0]].count[position[1]] for position in path))
+        start_helix.append(path[0][0])
+        start_base.append(path[0][1])
+        end_helix.append(path[-1][0])
+        end_base.append(path[-1][1])
+        colors.append(helix_dict[five_prime[0]].colors.get(five_prime[1], CADNANO_DEFAULT_COLOR))
+
+    columns = dict()
+
+    for name, values in [("Start", start_helix), ("Start_base", start_base), ("End", end_helix),
+                         ("End_base", end_base)]:
+        values = np.asarray(values, dtype=np.int64)
+        columns[name] = values.astype(narrowest_int_dtype(values))
+
+    lengths = np.fromiter(map(len, sequences), dtype=np.int64, count=len(sequences))
+
+    csv_df = pd.DataFrame(columns)
+    csv_df["Sequence"] = pd.Series(sequences)
+    csv_df["Length"] = lengths.astype(narrowest_int_dtype(lengths))
+    csv_df["Color"] = pd.Series(colors, dtype="category")
+
+    return csv_df, np.asarray(scaffold_path, dtype=np.int64).reshape(-1, 2)
@@ -59,6 +59,11 @@ HELIX_COMPLEMENTARY_BASE_RIGHT_DICT = {
     23: "AAAGGCCGGAACGATT"
 }
 
+# Base indexes of the scaffold edges covered by the tables above; overhangs bind the scaffold from its edge inwards.
+# Table LEFT lists bases 23 -> 8 and table RIGHT lists bases 295 -> 280, both as 16-nt windows.
+SCAFFOLD_LEFT_EDGE = 8
+SCAFFOLD_RIGHT_EDGE = 295
+
 """
         Type 1: Start and end are both and right-hand-side and out of the scaffold
         --------------------------------
@@ -112,3 +117,14 @@ COMPLEMENTARY_MAP = {
     "G": "C",
     "C": "G",
 }
+
+# Staple location codes used by the columnar staple table
+TOP = 0
+BOTTOM = 1
+LEFT = 2
+RIGHT = 3
+MODIFIED = 4
+NORMAL = 5
+
+LOCATION_NAMES = ("t", "b", "l", "r", "modified", "normal")
+LOCATION_CODES = {name: code for code, name in enumerate(LOCATION_NAMES)}
@@ -0,0 +1,123 @@
+from typing import Tuple
+
+import numpy as np
+
+# Signed integer types tried from the narrowest one; signed so that helix shifts never wrap around
+_INT_DTYPES = (np.int8, np.int16, np.int32, np.int64)
+
+# Longest digit run that still fits in int64
+_MAX_DIGITS = 18
+
+# Largest number of (helix, base) codes formatted through a dense lookup table instead of sorting
+_DENSE_CODE_LIMIT = 1 << 20
+
+
+def narrowest_int_dtype(values: np.ndarray) -> np.dtype:
+    """
+    Find the narrowest signed integer type holding all the values.
+    :param values: integer array
+    :return: numpy dtype
+    """
+    if len(values) == 0:
+        return np.dtype(_INT_DTYPES[0])
+
+    low, high = values.min(), values.max()
+
+    for dtype in _INT_DTYPES:
+        info = np.iinfo(dtype)
+        if info.min <= low and high <= info.max:
+            return np.dtype(dtype)
+
+    raise Exception(f"Error: Values between {low} and {high} cannot be stored as integers.")
+
+
+def parse_helix_base(values: np.ndarray, column_name: str = "") -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Split helix and base indexes in the form of helix_idx[base_idx] for a whole column at once. Strings are viewed as
+    a matrix of bytes so that the digits are checked and summed up by array operations instead of per-row regex.
+    :param values: column Start or End
+    :param column_name: name of the column used in error messages
+    :return: helix indexes and base indexes in their narrowest integer types
+    """
+    try:
+        raw = np.asarray(values, dtype="S")
+    except UnicodeEncodeError:
+        bad_rows = [row for row, value in enumerate(values) if not str(value).isascii()]
+        raise Exception(f"Error: Malformed {column_name} values in rows {bad_rows}")
+
+    n_rows = len(raw)
+    width = max(raw.dtype.itemsize, 1)
+    chars = np.frombuffer(raw.tobytes(), dtype=np.uint8).reshape(n_rows, width) if n_rows \
+        else np.zeros((0, width), dtype=np.uint8)
+
+    is_open = chars == ord("[")
+    is_close = chars == ord("]")
+    open_pos = is_open.argmax(axis=1)
+    close_pos = is_close.argmax(axis=1)
+    lengths = (chars != 0).sum(axis=1)
+
+    # exactly one helix_idx[base_idx] pattern with non-empty digit runs on both sides of "["
+    valid = (is_open.sum(axis=1) == 1) & (is_close.sum(axis=1) == 1) & (close_pos == lengths - 1) & \
+            (open_pos > 0) & (close_pos - open_pos > 1) & (open_pos <= _MAX_DIGITS) & \
+            (close_pos - open_pos - 1 <= _MAX_DIGITS)
+
+    # Horner's scheme column by column: few columns, each one handled for all rows at once
+    helix_arr = np.zeros(n_rows, dtype=np.int64)
+    base_arr = np.zeros(n_rows, dtype=np.int64)
+
+    for col in range(width):
+        digit = chars[:, col].astype(np.int64) - ord("0")
+        is_digit = (digit >= 0) & (digit <= 9)
+        in_helix = col < open_pos
+        in_base = (col > open_pos) & (col < close_pos)
+
+        valid &= ~(in_helix | in_base) | is_digit
+        helix_arr = np.where(in_helix, helix_arr * 10 + digit, helix_arr)
+        base_arr = np.where(in_base, base_arr * 10 + digit, base_arr)
+
+    if not valid.all():
+        bad_rows = np.flatnonzero(~valid).tolist()
+        raise Exception(f"Error: Malformed {column_name} values in rows {bad_rows}, expected helix_idx[base_idx] "
+                        f"but got {[values[row] for row in bad_rows[:10]]}")
+
+    return helix_arr.astype(narrowest_int_dtype(helix_arr)), base_arr.astype(narrowest_int_dtype(base_arr))
+
+
+def format_helix_base(helix_arr: np.ndarray, base_arr: np.ndarray) -> np.ndarray:
+    """
+    Join helix and base indexes in the form of helix_idx[base_idx], the inverse of parse_helix_base. Staples of a
+    design share few distinct coordinates, so each distinct (helix, base) is formatted once and the strings are
+    gathered for all rows at once.
+    :param helix_arr: helix indexes
+    :param base_arr: base indexes
+    :return: object array of strings
+    """
+    helix_arr = np.asarray(helix_arr, dtype=np.int64)
+    base_arr = np.asarray(base_arr, dtype=np.int64)
+
+    if len(helix_arr) == 0:
+        return np.zeros(0, dtype=object)
+
+    # one integer code per coordinate
+    helix_min, base_min = helix_arr.min(), base_arr.min()
+    base_span = int(base_arr.max() - base_min) + 1
+    codes = (helix_arr - helix_min) * base_span + (base_arr - base_min)
+    code_count = int(codes.max()) + 1
+
+    if code_count <= max(4 * len(codes), _DENSE_CODE_LIMIT):
+        # dense lookup table of the codes in use, no sorting
+        in_use = np.zeros(code_count, dtype=bool)
+        in_use[codes] = True
+        distinct_codes = np.flatnonzero(in_use)
+
+        slots = np.zeros(code_count, dtype=np.int64)
+        slots[distinct_codes] = np.arange(len(distinct_codes))
+        inverse = slots[codes]
+    else:
+        distinct_codes, inverse = np.unique(codes, return_inverse=True)
+
+    labels = np.array([f"{helix}[{base}]" for helix, base in zip((distinct_codes // base_span + helix_min).tolist(),
+                                                                 (distinct_codes % base_span + base_min).tolist())],
+                      dtype=object)
+
+    return labels[inverse.ravel()]
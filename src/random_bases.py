@@ -0,0 +1,86 @@
+from typing import List, Tuple
+
+import numpy as np
+
+from src.constants import COMPLEMENTARY_MAP, LOCATION_CODES
+
+_BASES = np.frombuffer("".join(COMPLEMENTARY_MAP.keys()).encode("ascii"), dtype=np.uint8)
+
+_GOLDEN_GAMMA = np.uint64(0x9E3779B97F4A7C15)
+
+
+def _mix(h: np.ndarray) -> np.ndarray:
+    """
+    SplitMix64 finaliser, applied element-wise. uint64 arithmetic wraps around on arrays.
+    :param h: uint64 array
+    :return: uint64 array
+    """
+    h = (h ^ (h >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+    h = (h ^ (h >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+
+    return h ^ (h >> np.uint64(31))
+
+
+def _as_uint64(values, size: int) -> np.ndarray:
+    return np.broadcast_to(np.asarray(values, dtype=np.int64), (size,)).view(np.uint64)
+
+
+def overhang_seeds(run_seed: int,
+                   origami_pos: Tuple[int, int],
+                   location: str,
+                   base_index: Tuple[np.ndarray, np.ndarray],
+                   helix_index: Tuple[np.ndarray, np.ndarray]) -> np.ndarray:
+    """
+    Derive one seed per overhang from the run seed and the identity of the overhang, i.e. its origami, location, base
+    index and helix index. The seed of an overhang never depends on which other overhangs are generated or in which
+    order.
+    :param run_seed: seed of the run
+    :param origami_pos: position of the origami
+    :param location: location of the overhangs
+    :param base_index: start and end base indexes of the overhangs
+    :param helix_index: start and end helix indexes of the overhangs, telling apart overhangs on the same bases
+    :return: uint64 seeds
+    """
+    n_overhangs = len(base_index[0])
+    seeds = _mix(np.full(n_overhangs, run_seed & 0xFFFFFFFFFFFFFFFF, dtype=np.uint64))
+
+    for field in (origami_pos[0], origami_pos[-1], LOCATION_CODES[location], base_index[0], base_index[1],
+                  helix_index[0], helix_index[1]):
+        seeds = _mix(seeds ^ (_as_uint64(field, n_overhangs) + _GOLDEN_GAMMA))
+
+    return seeds
+
+
+def random_overhang_bases(seeds: np.ndarray, lengths: np.ndarray) -> List[str]:
+    """
+    Draw random bases for many overhangs in one vectorized call. Base j of an overhang is a counter-based hash of its
+    seed and j, so the bases are identical however the overhangs are batched, ordered or distributed over workers.
+    :param seeds: seed of each overhang
+    :param lengths: number of bases of each overhang
+    :return: random bases of each overhang
+    """
+    lengths = np.asarray(lengths, dtype=np.int64)
+    offsets = np.concatenate(([0], np.cumsum(lengths)))
+
+    overhang_ids = np.repeat(np.arange(len(lengths)), lengths)
+    counters = (np.arange(offsets[-1], dtype=np.int64) - offsets[overhang_ids] + 1).view(np.uint64)
+
+    # the two highest bits of the hash select one of four bases
+    hashed = _mix(seeds[overhang_ids] + counters * _GOLDEN_GAMMA)
+    bases = _BASES[(hashed >> np.uint64(62)).astype(np.intp)].tobytes().decode("ascii")
+
+    return [bases[offsets[i]: offsets[i + 1]] for i in range(len(lengths))]
+
+
+def attempt_seeds(seed: np.uint64, attempts: np.ndarray) -> np.ndarray:
+    """
+    Seeds of further attempts for one overhang, for redrawing bases rejected by constraints. Attempt 0 is the seed of
+    the overhang itself, so a first draw that passes gives the same bases as an unconstrained draw.
+    :param seed: seed of the overhang
+    :param attempts: attempt numbers
+    :return: uint64 seeds
+    """
+    attempts = np.asarray(attempts, dtype=np.int64).view(np.uint64)
+    seeds = np.full(len(attempts), seed, dtype=np.uint64)
+
+    return np.where(attempts == 0, seeds, _mix(seeds ^ (attempts * _GOLDEN_GAMMA)))
@@ -0,0 +1,117 @@
+from typing import List, Tuple
+
+import numpy as np
+
+from src.constants import COMPLEMENTARY_MAP
+
+# Characters other than bases (e.g. unassigned "?") are kept as they are
+_COMPLEMENT_TABLE = str.maketrans(COMPLEMENTARY_MAP)
+
+_COMPLEMENT_LUT = np.arange(256, dtype=np.uint8)
+for _base, _paired_base in COMPLEMENTARY_MAP.items():
+    _COMPLEMENT_LUT[ord(_base)] = ord(_paired_base)
+
+
+def complement(sequence: str) -> str:
+    return sequence.translate(_COMPLEMENT_TABLE)
+
+
+def reverse(sequence: str) -> str:
+    return sequence[::-1]
+
+
+def reverse_complement(sequence: str) -> str:
+    return sequence.translate(_COMPLEMENT_TABLE)[::-1]
+
+
+def complement_bytes(sequence_bytes: np.ndarray) -> np.ndarray:
+    """
+    Complement an array of ASCII bases.
+    :param sequence_bytes: uint8 array
+    :return: uint8 array
+    """
+    return _COMPLEMENT_LUT[sequence_bytes]
+
+
+def pack_sequences(sequences: List[str]) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Concatenate sequences into one byte buffer.
+    :param sequences: list of sequences
+    :return: uint8 buffer and offsets of the sequences (one more than the number of sequences)
+    """
+    lengths = np.fromiter(map(len, sequences), dtype=np.int64, count=len(sequences))
+    offsets = np.zeros(len(sequences) + 1, dtype=np.int64)
+    np.cumsum(lengths, out=offsets[1:])
+
+    return np.frombuffer("".join(sequences).encode("ascii"), dtype=np.uint8), offsets
+
+
+def unpack_sequences(buffer: np.ndarray, offsets: np.ndarray) -> List[str]:
+    """
+    Split a byte buffer back into sequences.
+    :param buffer: uint8 buffer
+    :param offsets: offsets of the sequences
+    :return: list of sequences
+    """
+    joined = buffer.tobytes().decode("ascii")
+
+    return [joined[start: end] for start, end in zip(offsets[:-1].tolist(), offsets[1:].tolist())]
+
+
+def reverse_bytes(buffer: np.ndarray, offsets: np.ndarray) -> np.ndarray:
+    """
+    Reverse every sequence in a byte buffer in place of its own slice.
+    :param buffer: uint8 buffer
+    :param offsets: offsets of the sequences
+    :return: uint8 buffer
+    """
+    lengths = np.diff(offsets)
+    starts = np.repeat(offsets[:-1], lengths)
+    ends = np.repeat(offsets[1:], lengths)
+
+    # position p of a sequence [start, end) moves to end - 1 - (p - start)
+    return buffer[starts + ends - 1 - np.arange(len(buffer))]
+
+
+def complement_batch(sequences: List[str]) -> List[str]:
+    buffer, offsets = pack_sequences(sequences)
+    return unpack_sequences(complement_bytes(buffer), offsets)
+
+
+def reverse_batch(sequences: List[str]) -> List[str]:
+    buffer, offsets = pack_sequences(sequences)
+    return unpack_sequences(reverse_bytes(buffer, offsets), offsets)
+
+
+def reverse_complement_batch(sequences: List[str]) -> List[str]:
+    buffer, offsets = pack_sequences(sequences)
+    return unpack_sequences(complement_bytes(reverse_bytes(buffer, offsets)), offsets)
+
+
+def mismatched_rows(sequences: List[str], expected_sequences: List[str]) -> np.ndarray:
+    """
+    Compare two lists of sequences row by row in one pass over their byte buffers.
+    :param sequences: list of sequences
+    :param expected_sequences: list of expected sequences of the same size
+    :return: boolean array, True where the sequences differ
+    """
+    if len(sequences) != len(expected_sequences):
+        raise Exception("Error: Cannot compare lists of sequences of different sizes.")
+
+    buffer, offsets = pack_sequences(sequences)
+    expected_buffer, expected_offsets = pack_sequences(expected_sequences)
+
+    lengths = np.diff(offsets)
+    mismatched = lengths != np.diff(expected_offsets)
+
+    # bytes of the rows with equal lengths, aligned in both buffers
+    same_length = ~mismatched
+    compared_lengths = lengths[same_length]
+    row_of_byte = np.repeat(np.arange(len(lengths))[same_length], compared_lengths)
+    byte_in_row = np.arange(compared_lengths.sum()) - np.repeat(np.cumsum(compared_lengths) - compared_lengths,
+                                                                compared_lengths)
+
+    differs = buffer[offsets[row_of_byte] + byte_in_row] != expected_buffer[expected_offsets[row_of_byte] + byte_in_row]
+    mismatched[np.unique(row_of_byte[differs])] = True
+
+    return mismatched
@@ -0,0 +1,289 @@
+import argparse
+import json
+import os
+from typing import Dict, List, Tuple
+
+import numpy as np
+import pandas as pd
+
+from src.constants import SCAFFOLD_LEFT_EDGE, SCAFFOLD_RIGHT_EDGE
+
+import logging
+
+from src.utils import config_logging
+
+config_logging()
+logger = logging.getLogger(__name__)
+
+# Colors of the pre-determined design, as in demo_config.JSON
+SYNTHETIC_COLORS = {
+    "data_bit": "#00f900",
+    "other_overhang": "#00fdff",
+    "side_overhang": "#942192",
+    "default_staple": "#000000",
+    "modified_staples": "#ff0000"
+}
+
+# Bases of a normal staple, and distance between top or bottom overhangs along the helices
+STAPLE_LENGTH = 32
+
+# Bases of the top and bottom overhangs outside the unassigned bases
+TOP_BOTTOM_BODY_LENGTH = 8
+
+# Top overhangs start at most at this helix and bottom overhangs after it, see StapleTable.from_dataframe
+TOP_BOTTOM_HELIX_LIMIT = 15
+
+# Helices the assigner moves up to read the scaffold for side overhangs of origami with top overhangs
+ASSIGNER_HELIX_SHIFT = 2
+
+_BASES = np.frombuffer(b"ACGT", dtype=np.uint8)
+
+
+def random_sequences(rng: np.random.Generator, lengths: List[int]) -> List[str]:
+    """
+    Uniformly random sequences.
+    :param rng: random generator
+    :param lengths: length of each sequence
+    :return: list of sequences
+    """
+    buffer = _BASES[rng.integers(0, 4, size=int(sum(lengths)))].tobytes().decode("ascii")
+    offsets = np.concatenate([[0], np.cumsum(lengths)]).tolist()
+
+    return [buffer[start: end] for start, end in zip(offsets[:-1], offsets[1:])]
+
+
+def overhang_count(slots: int, overhang_density: float) -> int:
+    """
+    Number of overhangs placed in the available slots, at least one unless the density is 0.
+    :param slots: number of slots
+    :param overhang_density: fraction of the slots with an overhang, between 0 and 1
+    :return: number of overhangs
+    """
+    if overhang_density <= 0 or slots == 0:
+        return 0
+
+    return min(slots, max(1, int(round(overhang_density * slots))))
+
+
+def spread(slots: List[int], count: int) -> List[int]:
+    """
+    Slots evenly spread over the available ones.
+    :param slots: available slots in order
+    :param count: number of slots taken
+    :return: taken slots in order
+    """
+    if count == 0:
+        return []
+
+    return [slots[idx] for idx in np.linspace(0, len(slots) - 1, count).round().astype(int).tolist()]
+
+
+def top_bottom_slots() -> List[int]:
+    """
+    Base indexes of the top and bottom overhangs of a tile with all slots taken.
+    :return: base indexes
+    """
+    return list(range(SCAFFOLD_LEFT_EDGE + STAPLE_LENGTH, SCAFFOLD_RIGHT_EDGE - STAPLE_LENGTH, STAPLE_LENGTH))
+
+
+def helix_offset(neighbours: Dict[str, bool], overhang_density: float, shift: int) -> int:
+    """
+    First helix of the origami, moved down by the shift if it has top overhangs.
+    :param neighbours: t, b and r: whether there is an origami in this direction
+    :param overhang_density: fraction of the slots with an overhang, between 0 and 1
+    :param shift: number of empty helices above the origami with top overhangs
+    :return: index of the first helix
+    """
+    has_top = neighbours.get("t", False) and overhang_count(len(top_bottom_slots()), overhang_density) > 0
+
+    return shift if has_top else 0
+
+
+def synthetic_tile(neighbours: Dict[str, bool],
+                   rng: np.random.Generator,
+                   helices: int = 24,
+                   overhang_density: float = 0.5,
+                   shift: int = 2,
+                   overhang_length: int = 16) -> pd.DataFrame:
+    """
+    Staples of one synthetic tile in the layout of the pre-determined origami: normal staples cover the scaffold of
+    every helix, right overhangs bind the scaffold of the right neighbour, and top overhangs pair with the bottom
+    overhangs of the origami above. Helices of origami with top overhangs start at the shift.
+    :param neighbours: t, b and r: whether there is an origami in this direction
+    :param rng: random generator of the sequences
+    :param helices: number of helices of the origami
+    :param overhang_density: fraction of the slots with an overhang, between 0 and 1
+    :param shift: number of empty helices above the origami with top overhangs
+    :param overhang_length: number of unassigned bases of every overhang
+    :return: dataframe with columns Start, End, Sequence, Length and Color
+    """
+    top_slots = top_bottom_slots()
+    top_bottom_count = overhang_count(len(top_slots), overhang_density)
+    offset = helix_offset(neighbours, overhang_density, shift)
+    rows = []  # (start, end, sequence length, unassigned bases at the start or end, color)
+
+    # normal staples along each helix
+    for helix in range(offset, offset + helices):
+        for base in range(SCAFFOLD_LEFT_EDGE, SCAFFOLD_RIGHT_EDGE + 1, STAPLE_LENGTH):
+            length = min(STAPLE_LENGTH, SCAFFOLD_RIGHT_EDGE + 1 - base)
+            rows.append((f"{helix}[{base + length - 1}]", f"{helix}[{base}]", length, 0,
+                         SYNTHETIC_COLORS["default_staple"]))
+
+    if neighbours.get("r", False):
+        # out of the scaffold at the right edge, paired helices as in the pre-determined origami
+        for helix in spread(list(range(offset, offset + helices - 1)), overhang_count(helices - 1, overhang_density)):
+            rows.append((f"{helix}[{SCAFFOLD_RIGHT_EDGE + overhang_length}]", f"{helix + 1}[{SCAFFOLD_RIGHT_EDGE - 1}]",
+                         STAPLE_LENGTH - 1, overhang_length, SYNTHETIC_COLORS["side_overhang"]))
+
+    if neighbours.get("t", False):
+        # out of the origami into the empty helices above
+        for base in spread(top_slots, top_bottom_count):
+            rows.append((f"{offset}[{base}]", f"{offset - 1}[{base + TOP_BOTTOM_BODY_LENGTH}]",
+                         TOP_BOTTOM_BODY_LENGTH, overhang_length, SYNTHETIC_COLORS["other_overhang"]))
+
+    if neighbours.get("b", False):
+        # out of the origami into the helices below, listed the same way as the top overhangs they pair with
+        for base in spread(top_slots, top_bottom_count):
+            rows.append((f"{offset + helices}[{base + TOP_BOTTOM_BODY_LENGTH}]", f"{offset + helices - 2}[{base}]",
+                         3 * TOP_BOTTOM_BODY_LENGTH, -overhang_length, SYNTHETIC_COLORS["other_overhang"]))
+
+    sequences = random_sequences(rng, [length for _, _, length, _, _ in rows])
+
+    # unassigned bases after the bases of the staple if positive and before them if negative
+    sequences = [sequence + "?" * unassigned if unassigned >= 0 else "?" * -unassigned + sequence
+                 for sequence, (_, _, _, unassigned, _) in zip(sequences, rows)]
+
+    return pd.DataFrame({
+        "Start": [start for start, _, _, _, _ in rows],
+        "End": [end for _, end, _, _, _ in rows],
+        "Sequence": sequences,
+        "Length": [len(sequence) for sequence in sequences],
+        "Color": [color for _, _, _, _, color in rows]
+    })
+
+
+def generate_design(save_path: str,
+                    size_x: int,
+                    size_y: int,
+                    helices: int = 24,
+                    overhang_density: float = 0.5,
+                    shift: int = 2,
+                    overhang_length: int = 16,
+                    seed: int = 0) -> str:
+    """
+    Write a synthetic design of size_x by size_y tiles: one csv per tile, a scaffold sequence and path covering all
+    helices, and the configuration file to run it.
+    :param save_path: folder of the design
+    :param size_x: number of tiles along x
+    :param size_y: number of tiles along y
+    :param helices: number of helices of each origami, at least 16 so that bottom overhangs are told from top ones
+    :param overhang_density: fraction of the slots with an overhang, between 0 and 1
+    :param shift: number of empty helices above origami with top overhangs, between 2 and 15
+    :param overhang_length: number of unassigned bases of every overhang
+    :param seed: seed of the random sequences
+    :return: configuration file path
+    """
+    if helices <= TOP_BOTTOM_HELIX_LIMIT:
+        raise Exception(f"Error: Synthetic origami need more than {TOP_BOTTOM_HELIX_LIMIT} helices.")
+    if not ASSIGNER_HELIX_SHIFT <= shift <= TOP_BOTTOM_HELIX_LIMIT:
+        raise Exception(f"Error: Shift of synthetic origami must be between {ASSIGNER_HELIX_SHIFT} and "
+                        f"{TOP_BOTTOM_HELIX_LIMIT}.")
+    if not 0 <= overhang_density <= 1:
+        raise Exception("Error: Overhang density must be between 0 and 1.")
+
+    csv_root_path = os.path.join(save_path, "tiles")
+    os.makedirs(csv_root_path, exist_ok=True)
+
+    rng = np.random.default_rng(seed)
+    positions = [(x, y) for y in range(size_y) for x in range(size_x)]
+    origami_data = dict()
+
+    for x, y in positions:
+        neighbours = {"t": y + 1 < size_y, "b": y > 0, "r": x + 1 < size_x}
+        tile_df = synthetic_tile(neighbours, rng, helices, overhang_density, shift, overhang_length)
+        file_name = f"tile_({x},{y}).csv"
+        tile_df.to_csv(os.path.join(csv_root_path, file_name), index=False)
+
+        origami_data[f"tile_{x}_{y}"] = {"path": file_name, "x": x, "y": y,
+                                         "shift": helix_offset(neighbours, overhang_density, shift)}
+
+    # scaffold threaded through every helix the side overhangs can bind, from the left edge to the right edge
+    scaffold_helices = helices + shift
+    scaffold_bases = SCAFFOLD_RIGHT_EDGE - SCAFFOLD_LEFT_EDGE + 1
+    scaffold_sequence_path = os.path.join(save_path, "scaffold.txt")
+    scaffold_path_path = os.path.join(save_path, "scaffold_path.csv")
+
+    with open(scaffold_sequence_path, "w") as f:
+        f.write(random_sequences(rng, [scaffold_helices * scaffold_bases])[0])
+
+    pd.DataFrame({"helix": np.repeat(np.arange(scaffold_helices), scaffold_bases),
+                  "base": np.tile(np.arange(SCAFFOLD_LEFT_EDGE, SCAFFOLD_RIGHT_EDGE + 1), scaffold_helices)}) \
+        .to_csv(scaffold_path_path, index=False)
+
+    config_path = os.path.join(save_path, f"synthetic_{size_x}x{size_y}.JSON")
+
+    with open(config_path, "w") as f:
+        json.dump({"size_x": size_x,
+                   "size_y": size_y,
+                   "csv_root_path": os.path.abspath(csv_root_path),
+                   "DNA_origami": origami_data,
+                   "colors": SYNTHETIC_COLORS,
+                   "scaffold": {"sequence": os.path.abspath(scaffold_sequence_path),
+                                "path": os.path.abspath(scaffold_path_path),
+                                "cache_dir": os.path.abspath(os.path.join(save_path, ".cache"))}}, f, indent=4)
+
+    logger.info(f"Synthetic design of {size_x} x {size_y} origami with {helices} helices saved to {config_path}")
+
+    return config_path
+
+
+def grid_size(size: str) -> Tuple[int, int]:
+    """
+    Parse a grid size such as 20x20.
+    :param size: size in the form NxM
+    :return: (N, M)
+    """
+    try:
+        size_x, size_y = (int(value) for value in size.lower().split("x"))
+    except Exception:
+        raise argparse.ArgumentTypeError(f"Grid size {size} is not in the form NxM")
+
+    return size_x, size_y
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+
+    parser.add_argument("--size",
+                        type=grid_size,
+                        default=(4, 4),
+                        help="Number of tiles in the form NxM")
+    parser.add_argument("--save_path",
+                        type=str,
+                        default="synthetic",
+                        help="Folder of the tile csv files, scaffold files and configuration file")
+    parser.add_argument("--helices",
+                        type=int,
+                        default=24,
+                        help="Number of helices of each origami")
+    parser.add_argument("--overhang_density",
+                        type=float,
+                        default=0.5,
+                        help="Fraction of the slots at the edges of each origami with an overhang")
+    parser.add_argument("--shift",
+                        type=int,
+                        default=2,
+                        help="Number of empty helices above origami with top overhangs")
+    parser.add_argument("--overhang_length",
+                        type=int,
+                        default=16,
+                        help="Number of unassigned bases of every overhang")
+    parser.add_argument("--seed",
+                        type=int,
+                        default=0,
+                        help="Seed of the random sequences")
+
+    args = parser.parse_args()
+
+    generate_design(args.save_path, *args.size, helices=args.helices, overhang_density=args.overhang_density,
+                    shift=args.shift, overhang_length=args.overhang_length, seed=args.seed)
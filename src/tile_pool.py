@@ -0,0 +1,69 @@
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Tuple
+
+from src.DNAOrigami import DNAOrigami
+from src.Extractor import Extractor
+from src.Profiler import Profiler, timed_call
+from src.StapleTable import StapleTable
+from src.TileCache import TileCache
+
+
+def load_origami(name: str,
+                 origami_data: Dict,
+                 csv_root: str,
+                 color_setting: Dict[str, str],
+                 scaffold_sequence: str = None,
+                 tile_cache: TileCache = None) -> Tuple[DNAOrigami, Dict[str, StapleTable]]:
+    """
+    Parse, validate and extract one origami. Runs in a worker process, so the results are sent back as dataframes and
+    staple tables, both of them columnar.
+    :param name: origami name
+    :param origami_data: origami data in the configuration file
+    :param csv_root: root path of csv files
+    :param color_setting: color for different staples such as overhangs, pre-determined staples.
+    :param scaffold_sequence: scaffold sequence applied to Cadnano 2 json designs
+    :param tile_cache: cache of parsed tiles
+    :return: DNA origami and its staples by location
+    """
+    origami_chip = DNAOrigami(name, origami_data, csv_root, scaffold_sequence, tile_cache)
+
+    return origami_chip, Extractor.extract_origami(origami_chip, color_setting)
+
+
+def load_origami_in_pool(origami_data: Dict[str, Dict],
+                         csv_root: str,
+                         color_setting: Dict[str, str],
+                         workers: int,
+                         scaffold_sequence: str = None,
+                         tile_cache: TileCache = None,
+                         profiler: Profiler = None) -> List[Tuple[DNAOrigami, Dict[str, StapleTable]]]:
+    """
+    Load and extract all origami in a process pool.
+    :param origami_data: dict of origami name and its data in the configuration file
+    :param csv_root: root path of csv files
+    :param color_setting: color for different staples such as overhangs, pre-determined staples.
+    :param workers: number of worker processes
+    :param scaffold_sequence: scaffold sequence applied to Cadnano 2 json designs
+    :param tile_cache: cache of parsed tiles
+    :param profiler: profiler timing each origami in its worker process
+    :return: DNA origami and their staples, in the same order as in the configuration file
+    """
+    with ProcessPoolExecutor(max_workers=min(workers, max(len(origami_data), 1))) as executor:
+        if profiler is None:
+            futures = [executor.submit(load_origami, name, data, csv_root, color_setting, scaffold_sequence,
+                                       tile_cache)
+                       for name, data in origami_data.items()]
+
+            return [future.result() for future in futures]
+
+        futures = [executor.submit(timed_call, load_origami, name, data, csv_root, color_setting, scaffold_sequence,
+                                   tile_cache)
+                   for name, data in origami_data.items()]
+        results = []
+
+        for future in futures:
+            result, start, duration, pid = future.result()
+            profiler.add_tile("load_design", result[0].position, start, duration, pid)
+            results.append(result)
+
+        return results
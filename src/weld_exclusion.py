@@ -1,18 +1,24 @@
 import argparse
-import ast
 import glob
 import json
 import os
 from collections import defaultdict
-from typing import Dict, List
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterator, List, Optional, Tuple
 
 import pandas as pd
 
+from src.SeedIndex import SeedIndex
+
 import logging
 
 logger = logging.getLogger(__name__)
 
 
+# Columns of order files used for the exclusion
+ORDER_COLUMNS = ["Bases", "Sequence", "Well Position"]
+
+
 def main(args: argparse.Namespace):
     """
     Provided inactive well positions, the newly added overhangs (and modified staples) should be filtered out.
@@ -24,76 +30,193 @@ def main(args: argparse.Namespace):
         config = json.load(f)
         color_setting = config["colors"]
 
-    # load order csv
-    order_csv = pd.read_csv(args.well_path, delimiter=",", usecols=["Bases", "Sequence", "Well Position"])
-    order_csv["Sequence"] = ["".join(s.split(" ")) for s in order_csv["Sequence"]]
-    # order_csv.to_csv("new_coa.csv", index=False)
-
     # load design csv files and find overhangs
+    sequence_position = load_design_sequences(args.designs_path, color_setting, args.modified)
+
+    # index of design sequences for matching order sequences with added bases, shared by all plates
+    seed_index = SeedIndex(sequence_position, min_seed=args.min_seed, min_confidence=args.min_confidence)
+
+    if args.orders is not None:
+        # many plates of one design batch
+        exclude_plates(find_order_files(args.orders), sequence_position, seed_index, args.save_path,
+                       chunk_size=args.chunk_size, workers=args.workers)
+        return
+
+    # create a new order csv to record wells that should be excluded
+    order_csv = exclude_plate(args.well_path, sequence_position, seed_index, chunk_size=args.chunk_size)
+    order_csv.to_csv(os.path.join(args.save_path, "test_well.csv"), index=False)
+
+
+def load_design_sequences(designs_path: str, color_setting: Dict[str, str], modified: bool) -> Dict[str, List[str]]:
+    """
+    Sequences of overhang staples (and modified staples) in the design without their unassigned bases.
+    :param designs_path: folder of design csv files named with the origami position
+    :param color_setting: color for different staples
+    :param modified: whether modified staples are included
+    :return: sequence: origami positions holding it
+    """
     sequence_position = defaultdict(list)  # for searching
 
-    for csv_path in glob.glob(os.path.join(args.designs_path, "*.csv")):
+    for csv_path in sorted(glob.glob(os.path.join(designs_path, "*.csv"))):
         csv_file_name = csv_path.split("/")[-1]
         csv_name = csv_file_name.split(".")[0]
         design_csv = pd.read_csv(csv_path, delimiter=",", usecols=["Sequence", "Length", "Color"])
 
         # non-modified: added overhangs and modified staples
-        # find_non_modified_condition = ~[
-        #     design_csv["Sequence"].str.contains("?") & design_csv["Color"] != color_setting["modified_staples"]]
         common_condition = design_csv["Color"] != color_setting["side_overhang"]
+        has_unassigned = design_csv["Sequence"].str.contains("?", regex=False)
 
-        if args.modified:
+        if modified:
             # staples excluding side overhangs and including other overhangs or modified ones
-            find_required_staples_condition = common_condition & ((design_csv["Sequence"].str.contains("\?")) | (
-                    design_csv["Color"] == color_setting["modified_staples"]))
+            find_required_staples_condition = common_condition & (
+                    has_unassigned | (design_csv["Color"] == color_setting["modified_staples"]))
         else:
             # staples excluding side overhangs and including just side overhangs
-            find_required_staples_condition = common_condition & design_csv["Sequence"].str.contains("\?")
+            find_required_staples_condition = common_condition & has_unassigned
 
-        sequence_filtered = design_csv[find_required_staples_condition]["Sequence"].tolist()
-        sequence_filtered_assigned_part = ["".join(s.split("?")) for s in sequence_filtered]
+        sequence_filtered_assigned_part = design_csv.loc[find_required_staples_condition, "Sequence"] \
+            .str.replace("?", "", regex=False).tolist()
+
+        start = csv_name.find('(')
+        end = csv_name.find(')', start)
+        pos = csv_name[start:end + 1]
 
         for sequence in sequence_filtered_assigned_part:
-            start = csv_name.find('(')
-            end = csv_name.find(')', start)
-            pos = csv_name[start:end + 1]
             sequence_position[sequence].append(pos)
 
-    # search the well positions that should be replaced
-    location = []
+    return sequence_position
 
-    for idx, row in order_csv.iterrows():
-        # overhang extends from the existing inactive staple without modifying
-        the_origami = has_replaced_well(row["Sequence"], sequence_position)
 
-        if the_origami:
-            location.append(", ".join(the_origami))
-        else:
+def find_order_files(orders: str) -> List[str]:
+    """
+    Order files of many plates.
+    :param orders: folder of csv order files or glob pattern
+    :return: sorted order file paths
+    """
+    order_paths = sorted(glob.glob(os.path.join(orders, "*.csv")) if os.path.isdir(orders) else glob.glob(orders))
+
+    if not order_paths:
+        raise Exception(f"Error: No order files found in {orders}.")
+
+    return order_paths
+
+
+def read_order_file(order_path: str, chunk_size: int = 4096) -> Iterator[pd.DataFrame]:
+    """
+    Read an order file in chunks, with white spaces removed from the sequences.
+    :param order_path: csv order file path
+    :param chunk_size: number of rows per chunk
+    :return: chunks of the order file
+    """
+    for order_chunk in pd.read_csv(order_path, delimiter=",", usecols=ORDER_COLUMNS, chunksize=chunk_size):
+        order_chunk["Sequence"] = order_chunk["Sequence"].astype(str).str.replace(r"\s+", "", regex=True)
+
+        yield order_chunk
+
+
+def exclude_plate(order_path: str,
+                  sequence_position: Dict[str, List[str]],
+                  seed_index: SeedIndex,
+                  chunk_size: int = 4096) -> pd.DataFrame:
+    """
+    Find the wells of one plate holding staples replaced in the design.
+    :param order_path: csv order file path
+    :param sequence_position: design sequence: origami positions holding it
+    :param seed_index: seed index of the design sequences
+    :param chunk_size: number of rows read at once
+    :return: order rows with the Exclusion origami and the Confidence of the match
+    """
+    order_chunks = []
+
+    for order_chunk in read_order_file(order_path, chunk_size):
+        # search the well positions that should be replaced
+        location = []
+        confidence = []
+
+        for order_sequence in order_chunk["Sequence"].tolist():
+            # overhang extends from the existing inactive staple without modifying
+            the_origami, match_confidence = has_replaced_well(order_sequence, sequence_position, seed_index)
+
             # TODO: another feature to confirm whether the target staple actually is one staple that was modified
-            location.append("")
-            pass
+            location.append(", ".join(the_origami) if the_origami else "")
+            confidence.append(match_confidence)
 
-    # create a new order csv to record wells that should be excluded
-    order_csv["Exclusion"] = location
-    order_csv.to_csv("../results/test_well.csv", index=False)
+        order_chunk["Exclusion"] = location
+        order_chunk["Confidence"] = confidence
+        order_chunks.append(order_chunk)
+
+    return pd.concat(order_chunks, ignore_index=True) if order_chunks \
+        else pd.DataFrame(columns=ORDER_COLUMNS + ["Exclusion", "Confidence"])
+
+
+def exclude_plates(order_paths: List[str],
+                   sequence_position: Dict[str, List[str]],
+                   seed_index: SeedIndex,
+                   save_path: str,
+                   chunk_size: int = 4096,
+                   workers: int = 1) -> pd.DataFrame:
+    """
+    Match the order files of many plates concurrently against one design and write an exclusion report per plate and
+    a summary of all plates.
+    :param order_paths: csv order file paths
+    :param sequence_position: design sequence: origami positions holding it
+    :param seed_index: seed index of the design sequences
+    :param save_path: folder of the reports
+    :param chunk_size: number of rows read at once
+    :param workers: number of plates processed at the same time
+    :return: summary with the number of wells, excluded wells and the mean confidence of each plate
+    """
+    os.makedirs(save_path, exist_ok=True)
 
-    pass
+    def exclude_and_save(order_path: str) -> Dict:
+        plate_name = os.path.splitext(os.path.basename(order_path))[0]
+        order_csv = exclude_plate(order_path, sequence_position, seed_index, chunk_size)
+        order_csv.to_csv(os.path.join(save_path, f"{plate_name}_exclusion.csv"), index=False)
 
+        excluded = order_csv["Exclusion"] != ""
+        logger.info(f"Plate {plate_name}: {int(excluded.sum())} of {len(order_csv)} wells excluded")
 
-def has_replaced_well(target_sequence: str, sequence_pool: Dict[str, List[str]]):
+        return {
+            "Plate": plate_name,
+            "Wells": len(order_csv),
+            "Excluded": int(excluded.sum()),
+            "Unmatched": int((~excluded).sum()),
+            "Mean Confidence": float(order_csv.loc[excluded, "Confidence"].mean()) if excluded.any() else 0.0
+        }
+
+    with ThreadPoolExecutor(max_workers=max(1, min(workers, len(order_paths)))) as executor:
+        summary = pd.DataFrame(list(executor.map(exclude_and_save, order_paths)))
+
+    summary.to_csv(os.path.join(save_path, "summary.csv"), index=False)
+
+    return summary
+
+
+def has_replaced_well(target_sequence: str,
+                      sequence_pool: Dict[str, List[str]],
+                      seed_index: SeedIndex = None) -> Tuple[Optional[List[str]], float]:
     # TODO: At the moment, we do not replace the staples modified at the top and bottom part of the origami
     """
-    FIXME:
-        original staples will not have the exactly same sequence as the overhangs so have to find a method to
-        compare target sequence and overhang sequence. Bases cannot be chosen too few otherwise the matching
-        will be prone to error produced by coincidence.
-        For overhangs, this comparison is only required to be conducted on several bases at the beginning.`
+    Find the origami holding the design sequence of an order sequence. Order sequences contain the assigned overhang
+    bases as well, so they are matched through seeds of at least the minimum seed length shared with the design
+    sequences and verified base by base; too short seeds would match by coincidence.
+    :param target_sequence: order sequence
+    :param sequence_pool: design sequence: origami positions holding it
+    :param seed_index: seed index of the design sequences; only identical sequences are matched if not provided
+    :return: origami positions, or None if not matched, and the confidence of the match
     """
     if target_sequence in sequence_pool:
-        return sequence_pool[target_sequence]
-    else:
+        return sequence_pool[target_sequence], 1.0
+
+    match = seed_index.match(target_sequence) if seed_index is not None else None
+
+    if match is None:
         logger.warning(f"Staple with sequence {target_sequence} cannot match with the raw inactive staples.")
-        return None
+        return None, 0.0
+
+    positions, confidence, _ = match
+
+    return positions, confidence
 
 
 if __name__ == "__main__":
@@ -101,6 +224,22 @@ if __name__ == "__main__":
     parser.add_argument("--well_path",
                         type=str,
                         default="../sequence_files/coa_copy.csv")
+    parser.add_argument("--orders",
+                        type=str,
+                        default=None,
+                        help="Folder or glob pattern of order files of many plates, matched against the same design")
+    parser.add_argument("--save_path",
+                        type=str,
+                        default="../results",
+                        help="Folder of the exclusion reports")
+    parser.add_argument("--chunk_size",
+                        type=int,
+                        default=4096,
+                        help="Number of order rows read at once")
+    parser.add_argument("--workers",
+                        type=int,
+                        default=1,
+                        help="Number of plates processed at the same time")
     parser.add_argument("--designs_path",
                         type=str,
                         default="../sequence_files/design_v2_1")
@@ -109,6 +248,14 @@ if __name__ == "__main__":
                         default="../config_v2.JSON")
     parser.add_argument("--modified",
                         action="store_true")
+    parser.add_argument("--min_seed",
+                        type=int,
+                        default=12,
+                        help="Length of exact seeds an order sequence has to share with a design sequence")
+    parser.add_argument("--min_confidence",
+                        type=float,
+                        default=0.8,
+                        help="Smallest fraction of a design sequence matched by an order sequence")
 
     args = parser.parse_args()
 
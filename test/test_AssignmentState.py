@@ -0,0 +1,39 @@
+import os
+import tempfile
+import unittest
+
+from src.AssignmentState import AssignmentState
+
+
+class MyTestCase(unittest.TestCase):
+    processed_loc_staples = {"b": ["AC??", "GGTT"], "r": ["CCAA"]}
+    loc_overhang_sequence_dict = {"b": {12: "TTGA", 4: "GACT"}, "r": {7: "CCAA"}}
+
+    def test_round_trip(self):
+        with tempfile.TemporaryDirectory() as state_dir:
+            state_path = os.path.join(state_dir, "state", "design.json")
+
+            state = AssignmentState.load(state_path)
+            self.assertIsNone(state.lookup((0, -1), "key"))
+
+            state.record((0, -1), "key", self.processed_loc_staples, self.loc_overhang_sequence_dict)
+            state.set_seed(7)
+            state.save()
+
+            loaded_state = AssignmentState.load(state_path)
+            processed_loc_staples, loc_overhang_sequence_dict = loaded_state.lookup((0, -1), "key")
+
+            self.assertEqual(processed_loc_staples, self.processed_loc_staples)
+            self.assertEqual(loc_overhang_sequence_dict, self.loc_overhang_sequence_dict)
+            # order of overhangs is kept for one to one pairing
+            self.assertEqual(list(loc_overhang_sequence_dict["b"]), [12, 4])
+            self.assertEqual(loaded_state.get_seed(), 7)
+
+            # changed inputs and removed origami are not reused
+            self.assertIsNone(loaded_state.lookup((0, -1), "changed key"))
+            loaded_state.retain([(0, 0)])
+            self.assertIsNone(loaded_state.lookup((0, -1), "key"))
+
+
+if __name__ == '__main__':
+    unittest.main()
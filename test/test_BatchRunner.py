@@ -0,0 +1,146 @@
+import json
+import os
+import shutil
+import tempfile
+import unittest
+
+from src.Assigner import Assigner
+from src.BatchRunner import BatchRunner
+from src.ExtendedDNAOrigami import ExtendedDNAOrigami
+from src.Extractor import Extractor
+
+
+class MyTestCase(unittest.TestCase):
+    def setUp(self):
+        with open("../demo_config.JSON", "r") as f:
+            config_data = json.load(f)
+
+        config_data["csv_root_path"] = os.path.abspath("../sequence_files/design_v2_1/")
+
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.config_paths = []
+
+        # the same tiles placed in two designs, one with the origami listed in reverse order
+        for name, origami in [("design", config_data["DNA_origami"]),
+                              ("reversed", dict(reversed(list(config_data["DNA_origami"].items()))))]:
+            config_path = os.path.join(self.temp_dir.name, f"{name}.JSON")
+
+            with open(config_path, "w") as f:
+                json.dump({**config_data, "DNA_origami": origami}, f)
+
+            self.config_paths.append(config_path)
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def test_shared_tiles(self):
+        runner = BatchRunner(workers=2, use_cache=False)
+        results = runner.run(self.config_paths, seeds=[42, 7])
+
+        self.assertEqual([(result.config_path, result.seed) for result in results],
+                         [(config_path, seed) for config_path in self.config_paths for seed in [42, 7]])
+        self.assertEqual(len(runner.get_tiles()), 4)
+
+        # same design and seed give the same bases however jobs are scheduled
+        for first, second in [(results[0], results[2]), (results[1], results[3])]:
+            first_csv, second_csv = first.get_assigned_csv(), second.get_assigned_csv()
+            self.assertTrue(all(first_csv[pos].equals(second_csv[pos]) for pos in first_csv))
+
+        self.assertNotEqual(results[0].get_origami_bases_assigned()[(0, 0)],
+                            results[1].get_origami_bases_assigned()[(0, 0)])
+
+        # forks do not write assigned bases into the shared tiles
+        self.assertTrue(all("?" in "".join(tile.csv_df_copy["Sequence"]) for tile in runner.get_tiles().values()))
+
+    def test_edited_tile(self):
+        # the design read from a copy of its tiles, one of them edited between two runs
+        csv_root = shutil.copytree("../sequence_files/design_v2_1/", os.path.join(self.temp_dir.name, "tiles"))
+
+        with open(self.config_paths[0], "r") as f:
+            config_data = json.load(f)
+
+        config_path = os.path.join(self.temp_dir.name, "copied.JSON")
+        with open(config_path, "w") as f:
+            json.dump({**config_data, "csv_root_path": csv_root}, f)
+
+        runner = BatchRunner(use_cache=False)
+        first = runner.run([config_path])[0]
+
+        tile_path = os.path.join(csv_root, config_data["DNA_origami"]["staple_tile_v2_TL"]["path"])
+        tile_stat = os.stat(tile_path)
+        with open(tile_path, "r") as f:
+            tile_csv = f.read()
+        with open(tile_path, "w") as f:
+            f.write(tile_csv.replace("GAATACCAAGATTCATCAGTTGACCGCCTGG", "GAATACCAAGATTCATCAGTTGACCGCCTGC"))
+        # same size as before the edit, the modification time is moved on for file systems with coarse times
+        os.utime(tile_path, ns=(tile_stat.st_atime_ns, tile_stat.st_mtime_ns + 1))
+
+        second = runner.run([config_path])[0]
+
+        self.assertEqual(len(runner.get_tiles()), 5)
+        self.assertIn("GAATACCAAGATTCATCAGTTGACCGCCTGG", first.get_assigned_csv()[(0, 0)]["Sequence"].tolist())
+        self.assertIn("GAATACCAAGATTCATCAGTTGACCGCCTGC", second.get_assigned_csv()[(0, 0)]["Sequence"].tolist())
+
+    def test_instance_state(self):
+        # a single-origami design assigned after the full design with the same assigner
+        with open(self.config_paths[0], "r") as f:
+            config_data = json.load(f)
+
+        first_name = next(iter(config_data["DNA_origami"]))
+        single_path = os.path.join(self.temp_dir.name, "single.JSON")
+        with open(single_path, "w") as f:
+            json.dump({**config_data, "size_x": 1, "size_y": 1,
+                       "DNA_origami": {first_name: {**config_data["DNA_origami"][first_name], "x": 0, "y": 0}}}, f)
+
+        assigner = Assigner()
+
+        for config_path, origami_count in [(self.config_paths[0], 4), (single_path, 1)]:
+            extended_origami = ExtendedDNAOrigami.load_config(config_path, use_cache=False)
+            assigner.assign_bases(Extractor.extract(extended_origami), extended_origami.get_origami_position(),
+                                  seed=42, grid_index=extended_origami.get_grid_index(),
+                                  scaffold_map=extended_origami.get_scaffold_map())
+
+            # nothing left over from the previous design
+            self.assertEqual(len(assigner.get_origami_bases_assigned()), origami_count)
+            self.assertEqual(len(assigner.get_input_origami_staples()), origami_count)
+
+        # other assigners never see the results
+        self.assertEqual(Assigner().get_origami_bases_assigned(), dict())
+
+        assigner.release()
+        extended_origami.release()
+        self.assertEqual(assigner.get_finished_origami_staples(), dict())
+        self.assertEqual(extended_origami.get_origami_position(), dict())
+
+    def test_release(self):
+        runner = BatchRunner(use_cache=False)
+        result = runner.run(self.config_paths[:1])[0]
+
+        result.release()
+        runner.release()
+        self.assertEqual(result.get_origami_bases_assigned(), dict())
+        self.assertEqual(len(runner.get_tiles()), 0)
+
+    def test_verify(self):
+        extended_origami = ExtendedDNAOrigami.load_config(self.config_paths[0], use_cache=False)
+        assigner = BatchRunner.assign_design(extended_origami, 42, verify="full")
+
+        with self.assertRaises(Exception):
+            BatchRunner.assign_design(extended_origami, 42, verify="slow")
+
+        # corrupt one overhang of two origami, all are reported at once from both sides of their pairs
+        bases_assigned = assigner.get_origami_bases_assigned()
+        for origami_pos in list(bases_assigned)[:2]:
+            overhangs = next(overhangs for overhangs in bases_assigned[origami_pos].values() if overhangs)
+            row_id = next(iter(overhangs))
+            overhangs[row_id] = "?" * len(overhangs[row_id])
+
+        with self.assertRaisesRegex(Exception, "4 violations") as context:
+            assigner._Assigner__correctness_check(set(bases_assigned))
+
+        # each violation names the corrupted bases
+        self.assertEqual(str(context.exception).count("Assigned bases: ?"), 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
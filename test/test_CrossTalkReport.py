@@ -0,0 +1,82 @@
+import json
+import os
+import random
+import tempfile
+import unittest
+
+import numpy as np
+
+from src.BatchRunner import BatchRunner
+from src.CrossTalkReport import CrossTalkReport, max_complementary_runs, pack_2bit, reverse_complement_2bit
+from src.ExtendedDNAOrigami import ExtendedDNAOrigami
+from src.sequence_kernels import reverse_complement
+
+
+def naive_run(sequence: str, other: str) -> int:
+    paired = reverse_complement(other)
+    best = 0
+
+    for i in range(len(sequence)):
+        for j in range(len(paired)):
+            run = 0
+            while i + run < len(sequence) and j + run < len(paired) and sequence[i + run] == paired[j + run] \
+                    and sequence[i + run] in "ACGT":
+                run += 1
+            best = max(best, run)
+
+    return best
+
+
+class MyTestCase(unittest.TestCase):
+    def test_max_complementary_runs(self):
+        rng = random.Random(0)
+        sequences = ["".join(rng.choice("ACGT?") for _ in range(rng.randint(1, 32))) for _ in range(40)]
+        sequences += ["ACGTTGCA", "TGCAACGT", "AAAA", "TTTT"]
+
+        words, valid = pack_2bit(sequences)
+        rc_words, rc_valid = reverse_complement_2bit(words, valid, np.array([len(s) for s in sequences]))
+        runs = max_complementary_runs(words, valid, rc_words, rc_valid)
+
+        self.assertEqual(runs.tolist(), [[naive_run(sequence, other) for other in sequences]
+                                         for sequence in sequences])
+
+    def test_too_long(self):
+        with self.assertRaises(Exception):
+            pack_2bit(["A" * 33])
+
+    def test_report(self):
+        with open("../demo_config.JSON", "r") as f:
+            config_data = json.load(f)
+
+        config_data["csv_root_path"] = os.path.abspath("../sequence_files/design_v2_1/")
+
+        with tempfile.TemporaryDirectory() as temp_dir:
+            config_path = os.path.join(temp_dir, "design.JSON")
+            with open(config_path, "w") as f:
+                json.dump(config_data, f)
+
+            extended_origami = ExtendedDNAOrigami.load_config(config_path, use_cache=False)
+
+        assigner = BatchRunner.assign_design(extended_origami, 42)
+        report = CrossTalkReport.load_data(assigner, extended_origami)
+        sequences = report.get_sequences()
+
+        # designed partners pair over their whole length and are left out of the report
+        self.assertTrue(report.get_partners())
+        for i, j in report.get_partners():
+            self.assertEqual(naive_run(sequences[i], sequences[j]), len(sequences[i]))
+
+        report_df = report.analyse(min_run=4)
+        self.assertEqual(report_df["Run"].tolist(), sorted(report_df["Run"].tolist(), reverse=True))
+        self.assertTrue((report_df["Run"] >= 4).all())
+        self.assertTrue((report_df["Run"] < 16).all())
+
+        for _, row in report_df.head(20).iterrows():
+            self.assertEqual(naive_run(row["Sequence_1"], row["Sequence_2"]), row["Run"])
+
+        self.assertTrue(report_df.equals(report.analyse(min_run=4, workers=2)))
+        self.assertEqual(len(report.analyse(min_run=4, top=5)), 5)
+
+
+if __name__ == '__main__':
+    unittest.main()
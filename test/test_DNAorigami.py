@@ -1,7 +1,11 @@
 import argparse
 import unittest
 
+import numpy as np
+import pandas as pd
+
 from src.DNAOrigami import DNAOrigami
+from src.coordinates import format_helix_base, parse_helix_base
 from utils import csv_loader
 
 
@@ -20,6 +24,50 @@ class MyTestCase(unittest.TestCase):
         self.assertEqual(self.reader_test.get_csv_df().iloc[0, 1], 255)
         self.assertEqual(self.reader_test.get_csv_df().iloc[0, 3], 248)
 
+    def test_compact_dtypes(self):
+        csv_df = self.reader_test.get_csv_df()
+        self.assertEqual(csv_df["Start"].dtype, np.int8)
+        self.assertEqual(csv_df["Start_base"].dtype, np.int16)
+        self.assertEqual(csv_df["Color"].dtype, "category")
+
+    def test_malformed_coordinates(self):
+        with self.assertRaises(Exception) as context:
+            parse_helix_base(np.array(["3[4]", "3[4", "x[1]"], dtype=object), "Start")
+
+        self.assertIn("rows [1, 2]", str(context.exception))
+
+    def test_format_coordinates(self):
+        raw_df = pd.read_csv("../sequence_files/staple_tile_TL_v2.csv")
+        csv_df = self.reader_test.get_csv_df()
+
+        # inverse of the split, for every row at once
+        self.assertEqual(format_helix_base(csv_df["Start"], csv_df["Start_base"]).tolist(), raw_df["Start"].tolist())
+        self.assertEqual(format_helix_base(csv_df["End"], csv_df["End_base"]).tolist(), raw_df["End"].tolist())
+
+        # negative indexes and codes too sparse for the dense lookup
+        self.assertEqual(format_helix_base(np.array([-2, 5, 5, 10 ** 9]), np.array([7, 0, 0, 3])).tolist(),
+                         ["-2[7]", "5[0]", "5[0]", "1000000000[3]"])
+        self.assertEqual(len(format_helix_base(np.zeros(0), np.zeros(0))), 0)
+
+    def test_cadnano_json(self):
+        data = {"path": "../sequence_files/cadnano_test.json", "x": 0, "y": 0, "shift": 0}
+        origami = DNAOrigami("test", data, scaffold_sequence="AAAACCCCGGGGTTTTACGT")
+        csv_df = origami.get_csv_df()
+
+        # same layout as a split csv, with a loop on helix 0 and a skip on helix 1
+        self.assertEqual(list(csv_df.columns), ["Start", "Start_base", "End", "End_base", "Sequence", "Length",
+                                                "Color"])
+        self.assertEqual(csv_df["Sequence"].tolist(), ["??CGGG", "AAAAGTTTT", "CCC"])
+        self.assertEqual(csv_df["Length"].tolist(), [6, 9, 3])
+        self.assertEqual(csv_df["Color"].tolist(), ["#942192", "#888888", "#888888"])
+        self.assertEqual(origami.csv_df_copy["Start"].tolist(), ["0[11]", "1[2]", "1[6]"])
+        self.assertEqual(origami.csv_df_copy["End"].tolist(), ["0[6]", "0[2]", "1[9]"])
+        self.assertEqual(len(origami.scaffold_path), 16)
+
+        # no scaffold sequence applied
+        with self.assertRaises(Exception):
+            DNAOrigami("test", data)
+
 
 if __name__ == '__main__':
     unittest.main()
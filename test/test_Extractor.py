@@ -1,4 +1,7 @@
 import unittest
+
+import pandas as pd
+
 from src.ExtendedDNAOrigami import ExtendedDNAOrigami
 from src.Extractor import Extractor
 from test.utils import args_generator
@@ -29,6 +32,14 @@ class MyTestCase(unittest.TestCase):
         self.assertEqual(results[(0, -1)]["t"][0].get_base_index(), (9, 24), "ERROR: Incorrect sorting results")
         self.assertEqual(results[(0, -1)]["t"][-1].get_base_index(), (271, 279), "ERROR: Incorrect sorting results")
 
+    def test_sort_ties_on_helix(self):
+        # two bottom overhangs share the outer base index 8 and are ordered by their helix index
+        group = pd.DataFrame({"Start": [24, 22, 23], "Start_base": [8, 8, 40], "End": [22, 20, 21],
+                              "End_base": [23, 23, 55]})
+
+        self.assertEqual(Extractor.staple_sort_order(group, 0).tolist(), [1, 0, 2])
+        self.assertEqual(Extractor.sort_staples_for_output(group, 0)["Start"].tolist(), [22, 24, 23])
+
 
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,57 @@
+import itertools
+import unittest
+
+import numpy as np
+
+from src.OverhangGenerator import OverhangGenerator, kmer_hashes
+from src.random_bases import overhang_seeds, random_overhang_bases
+from src.sequence_kernels import reverse_complement
+
+
+class MyTestCase(unittest.TestCase):
+    base_index = (np.arange(23, 23 + 32 * 20, 32), np.arange(8, 8 + 32 * 20, 32))
+    helix_index = (np.full(20, 18), np.full(20, 16))
+
+    def test_kmer_hashes(self):
+        # k-mers with unassigned bases are skipped
+        self.assertEqual(len(kmer_hashes("ACGTA??ACGTA", 4)), 4)
+        self.assertEqual(kmer_hashes("ACGT", 4).tolist(), kmer_hashes("TTACGT", 4)[-1:].tolist())
+
+    def test_constraints(self):
+        generator = OverhangGenerator(gc_range=(0.4, 0.6), max_homopolymer=2, min_hamming=6, k=8)
+        design_sequence = "ACGTTGCAAGCTTCGATCGGATCCA"
+        generator.add_sequences([design_sequence])
+
+        seeds = overhang_seeds(42, (0, 0), "b", self.base_index, self.helix_index)
+        overhangs = generator.generate(seeds, [16] * 20)
+
+        for overhang in overhangs:
+            self.assertTrue(0.4 <= sum(base in "GC" for base in overhang) / 16 <= 0.6)
+            self.assertTrue(all(overhang[i: i + 3] != overhang[i] * 3 for i in range(14)))
+
+            # no 8-mer shared with the design on either strand
+            self.assertFalse(set(kmer_hashes(overhang, 8).tolist()) &
+                             set(kmer_hashes(design_sequence + "|" + reverse_complement(design_sequence), 8).tolist()))
+
+        for overhang, other in itertools.combinations(overhangs, 2):
+            self.assertGreaterEqual(sum(base != other_base for base, other_base in zip(overhang, other)), 6)
+
+        # same seeds give the same overhangs
+        generator = OverhangGenerator(gc_range=(0.4, 0.6), max_homopolymer=2, min_hamming=6, k=8)
+        generator.add_sequences([design_sequence])
+        self.assertEqual(generator.generate(seeds, [16] * 20), overhangs)
+
+    def test_first_draw_kept(self):
+        # without active constraints the first draw of each overhang is the unconstrained one
+        seeds = overhang_seeds(42, (0, 0), "b", self.base_index, self.helix_index)
+        self.assertEqual(OverhangGenerator(k=31).generate(seeds, [16] * 20), random_overhang_bases(seeds, [16] * 20))
+
+    def test_impossible_constraints(self):
+        generator = OverhangGenerator(gc_range=(1.0, 1.0), max_homopolymer=1, max_attempts=100)
+
+        with self.assertRaises(Exception):
+            generator.generate(overhang_seeds(42, (0, 0), "b", self.base_index, self.helix_index), [16] * 20)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,82 @@
+import json
+import os
+import tempfile
+import unittest
+
+from src.BatchRunner import BatchRunner
+from src.ExtendedDNAOrigami import ExtendedDNAOrigami
+from src.Profiler import Profiler, timed_call
+
+
+class MyTestCase(unittest.TestCase):
+    def test_stages_and_tiles(self):
+        profiler = Profiler()
+
+        try:
+            with profiler.stage("first"):
+                with profiler.tile("first", (0, 0)):
+                    data = [0] * 100000
+
+            with profiler.stage("second"):
+                result, start, duration, pid = timed_call(sum, data)
+                profiler.add_tile("second", (0, -1), start, duration, pid)
+                profiler.count("staples", 3)
+                profiler.count("staples", 2)
+        finally:
+            profiler.stop()
+
+        report = profiler.report()
+
+        self.assertEqual(result, 0)
+        self.assertEqual(list(report["stages"]), ["first", "second"])
+        self.assertEqual(report["tiles"], {"first": {"(0, 0)": report["tiles"]["first"]["(0, 0)"]},
+                                           "second": {"(0, -1)": duration}})
+        self.assertEqual(report["counts"], {"staples": 5})
+        # the list of the first stage is traced
+        self.assertGreaterEqual(report["stages"]["first"]["peak_memory"], 100000 * 8)
+        self.assertEqual(report["peak_memory"], max(stage["peak_memory"] for stage in report["stages"].values()))
+
+        trace_events = profiler.chrome_trace()["traceEvents"]
+        self.assertEqual([event["name"] for event in trace_events],
+                         ["first (0, 0)", "first", "second (0, -1)", "second"])
+        self.assertTrue(all(event["ph"] == "X" and event["dur"] >= 0 for event in trace_events))
+
+    def test_profile_design(self):
+        with open("../demo_config.JSON", "r") as f:
+            config_data = json.load(f)
+
+        config_data["csv_root_path"] = os.path.abspath("../sequence_files/design_v2_1/")
+        profiler = Profiler(trace_memory=False)
+
+        with tempfile.TemporaryDirectory() as temp_dir:
+            config_path = os.path.join(temp_dir, "design.JSON")
+
+            with open(config_path, "w") as f:
+                json.dump(config_data, f)
+
+            with profiler.stage("load_design"):
+                extended_origami = ExtendedDNAOrigami.load_config(config_path, use_cache=False, profiler=profiler)
+
+        BatchRunner.assign_design(extended_origami, 42, profiler=profiler)
+        report = profiler.report()
+
+        self.assertEqual(list(report["stages"]), ["load_design", "extract", "assign_bases"])
+        self.assertEqual(report["stages"]["load_design"]["tiles"], 4)
+        self.assertEqual(report["stages"]["assign_bases"]["tiles"], 4)
+        self.assertNotIn("peak_memory", report)
+        self.assertEqual(report["counts"]["overhangs"], 48)
+        self.assertEqual(report["counts"]["staples"],
+                         sum(len(origami.get_csv_df()) for origami in extended_origami.get_origami_position().values()))
+
+        with tempfile.TemporaryDirectory() as temp_dir:
+            report_path, trace_path = os.path.join(temp_dir, "profile.json"), os.path.join(temp_dir, "trace.json")
+            profiler.save(report_path, trace_path)
+
+            with open(report_path, "r") as f:
+                self.assertEqual(json.load(f)["counts"], report["counts"])
+            with open(trace_path, "r") as f:
+                self.assertEqual(len(json.load(f)["traceEvents"]), len(profiler.get_events()))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,87 @@
+import gzip
+import os
+import tempfile
+import unittest
+
+import pandas as pd
+
+from src.ResultWriter import ResultWriter, read_npz_table
+
+
+class MyTestCase(unittest.TestCase):
+    tables = {
+        (0, 0): pd.DataFrame({"Start": ["1[32]", "3[31]"], "End": ["2[40]", "0[16]"], "Sequence": ["ACGT", "??GG"],
+                              "Length": [4, 4], "Color": ["#00fdff", "#942192"]}),
+        (1, 0): pd.DataFrame({"Start": ["5[8]"], "End": ["4[15]"], "Sequence": ["TTTTCCCC"], "Length": [8],
+                              "Color": ["#000000"]})
+    }
+
+    def write(self, save_folder_path: str, export_format: str, workers: int = 2):
+        writer = ResultWriter(save_folder_path, export_format=export_format, workers=workers)
+
+        return writer.write_tables({origami_pos: (f"tile_{origami_pos}", lambda table=table: table.copy())
+                                    for origami_pos, table in self.tables.items()}, "all")
+
+    def test_formats(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            for export_format, read in [("csv", pd.read_csv),
+                                        ("csv.gz", lambda path: pd.read_csv(path, compression="gzip")),
+                                        ("npz", read_npz_table)]:
+                file_paths = self.write(temp_dir, export_format)
+                self.assertEqual(len(file_paths), 2)
+
+                for (origami_pos, table), file_path in zip(self.tables.items(), file_paths):
+                    self.assertTrue(file_path.endswith(f"tile_{origami_pos}.{export_format}"))
+                    pd.testing.assert_frame_equal(read(file_path), table, check_dtype=False)
+
+            # csv and gzip-compressed csv hold the same bytes
+            with gzip.open(os.path.join(temp_dir, "tile_(0, 0).csv.gz"), "rb") as f:
+                with open(os.path.join(temp_dir, "tile_(0, 0).csv"), "rb") as g:
+                    self.assertEqual(f.read(), g.read())
+
+    def test_combined(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            file_paths = self.write(temp_dir, "combined")
+            self.assertEqual(file_paths, [os.path.join(temp_dir, "all.csv")])
+
+            combined_df = pd.read_csv(file_paths[0])
+            self.assertEqual(combined_df["Tile"].tolist(), ["(0, 0)", "(0, 0)", "(1, 0)"])
+            pd.testing.assert_frame_equal(combined_df.drop(columns="Tile"),
+                                          pd.concat(self.tables.values(), ignore_index=True), check_dtype=False)
+
+    def test_combined_window(self):
+        # more origami than tables formatted at once are appended in order
+        tables = {(x, 0): (f"tile_{x}", lambda x=x: self.tables[(1, 0)].assign(Length=x)) for x in range(9)}
+
+        with tempfile.TemporaryDirectory() as temp_dir:
+            file_path = ResultWriter(temp_dir, export_format="combined", workers=2).write_tables(tables, "all")[0]
+
+            combined_df = pd.read_csv(file_path)
+            self.assertEqual(combined_df["Tile"].tolist(), [str((x, 0)) for x in range(9)])
+            self.assertEqual(combined_df["Length"].tolist(), list(range(9)))
+
+    def test_atomic(self):
+        def broken_table():
+            raise Exception("Error: interrupted")
+
+        with tempfile.TemporaryDirectory() as temp_dir:
+            writer = ResultWriter(temp_dir, export_format="csv")
+            file_path = writer.write_tables({(0, 0): ("tile", lambda: self.tables[(0, 0)])}, "all")[0]
+
+            with self.assertRaises(Exception):
+                writer.write_tables({(0, 0): ("tile", broken_table)}, "all")
+
+            with self.assertRaises(Exception):
+                ResultWriter(temp_dir, export_format="combined").write_tables(
+                    {(0, 0): ("tile", lambda: self.tables[(0, 0)]), (1, 0): ("tile", broken_table)}, "all")
+
+            # the complete file is kept and nothing partial is left behind
+            self.assertEqual(sorted(os.listdir(temp_dir)), ["tile.csv"])
+            pd.testing.assert_frame_equal(pd.read_csv(file_path), self.tables[(0, 0)], check_dtype=False)
+
+        with self.assertRaises(Exception):
+            ResultWriter(".", export_format="xlsx")
+
+
+if __name__ == '__main__':
+    unittest.main()
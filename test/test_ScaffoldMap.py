@@ -0,0 +1,50 @@
+import os
+import tempfile
+import unittest
+
+import numpy as np
+
+from src.ScaffoldMap import ScaffoldMap
+from src.constants import HELIX_COMPLEMENTARY_BASE_LEFT_DICT, HELIX_COMPLEMENTARY_BASE_RIGHT_DICT
+from src.sequence_kernels import complement
+
+
+class MyTestCase(unittest.TestCase):
+    def test_windows_match_constants(self):
+        scaffold_map = ScaffoldMap.from_windows()
+        helices = np.array([0, 5, 23])
+
+        self.assertEqual(scaffold_map.window(helices, "l", 16),
+                         [HELIX_COMPLEMENTARY_BASE_LEFT_DICT[h][::-1] for h in helices.tolist()])
+        self.assertEqual(scaffold_map.window(helices, "r", 16),
+                         [HELIX_COMPLEMENTARY_BASE_RIGHT_DICT[h][::-1] for h in helices.tolist()])
+
+        # shorter windows are sliced from the same edge
+        self.assertEqual(scaffold_map.window(helices, "l", 8),
+                         [HELIX_COMPLEMENTARY_BASE_LEFT_DICT[h][::-1][:8] for h in helices.tolist()])
+
+        with self.assertRaises(Exception):
+            scaffold_map.window(np.array([24]), "l", 16)
+
+    def test_thread_scaffold(self):
+        # scaffold runs along helix 0 from base 0 to 5, then back along helix 1
+        scaffold_sequence = "ATGCCGTTAAGC"
+        scaffold_path = [(0, b) for b in range(6)] + [(1, b) for b in range(5, -1, -1)]
+
+        with tempfile.TemporaryDirectory() as cache_dir:
+            scaffold_map = ScaffoldMap.from_scaffold(scaffold_sequence, scaffold_path, 0, 5, cache_dir)
+
+            self.assertEqual(scaffold_map.window(np.array([0]), "l", 6), [complement("ATGCCG")])
+            self.assertEqual(scaffold_map.window(np.array([1]), "r", 3), [complement("ATT")])
+            self.assertEqual(len(os.listdir(cache_dir)), 1)
+
+            # loaded from the cache
+            cached_map = ScaffoldMap.from_scaffold(scaffold_sequence, scaffold_path, 0, 5, cache_dir)
+            self.assertTrue(np.array_equal(cached_map.get_bases(), scaffold_map.get_bases()))
+
+        with self.assertRaises(Exception):
+            ScaffoldMap.from_scaffold("ATG", scaffold_path, 0, 5)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,33 @@
+import unittest
+
+from src.GridIndex import GridIndex
+from src.Scheduler import Scheduler
+
+
+class MyTestCase(unittest.TestCase):
+
+    def test_wavefronts(self):
+        scheduler = Scheduler.from_positions([(0, -1), (1, -1), (0, 0), (1, 0), (0, -2)])
+
+        self.assertEqual(scheduler.get_waves(), [[(0, 0), (1, 0)], [(0, -1), (1, -1)], [(0, -2)]])
+        self.assertEqual(scheduler.get_dependencies((0, -1)), [(0, 0)])
+        self.assertEqual(scheduler.get_dependencies((1, 0)), [])
+
+    def test_independent_of_order(self):
+        positions = [(0, 0), (0, -1), (1, 0), (1, -1)]
+
+        self.assertEqual(Scheduler.from_positions(positions).get_waves(),
+                         Scheduler.from_positions(positions[::-1]).get_waves())
+
+    def test_grid_neighbours(self):
+        grid_index = GridIndex.from_positions([(0, 0), (0, -1), (1, 0), (1, -1)], (2, 2))
+
+        self.assertEqual(grid_index.neighbours((0, 0)), {"b": (0, -1), "r": (1, 0)})
+        self.assertIsNone(grid_index.neighbour((1, -1), "b"))
+
+        with self.assertRaises(Exception):
+            GridIndex.from_positions([(0, 0), (0, -2)], (1, 2))
+
+
+if __name__ == '__main__':
+    unittest.main()
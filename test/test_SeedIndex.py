@@ -0,0 +1,55 @@
+import random
+import unittest
+
+from src.SeedIndex import SeedIndex, seed_hashes
+from src.weld_exclusion import has_replaced_well
+
+rng = random.Random(0)
+
+
+class MyTestCase(unittest.TestCase):
+    sequence_position = {"".join(rng.choice("ACGT") for _ in range(32)): [f"({idx}, 0)"] for idx in range(200)}
+    design_sequences = list(sequence_position.keys())
+    seed_index = SeedIndex(sequence_position, min_seed=12, min_confidence=0.8)
+
+    def test_seed_hashes(self):
+        seed_hash, seed_offset = seed_hashes("ACGTAC?ACGTAC", 4)
+
+        # seeds over unassigned bases are skipped
+        self.assertEqual(seed_offset.tolist(), [0, 1, 2, 7, 8, 9])
+        self.assertEqual(seed_hash[0], seed_hash[3])
+
+    def test_match_with_added_bases(self):
+        design_sequence = self.design_sequences[7]
+
+        # assigned overhang bases before or after the design sequence
+        for order_sequence in ["TTGACCAT" + design_sequence, design_sequence + "GGCATTAG"]:
+            positions, confidence, matched_sequence = self.seed_index.match(order_sequence)
+
+            self.assertEqual(matched_sequence, design_sequence)
+            self.assertEqual(positions, ["(7, 0)"])
+            self.assertEqual(confidence, 1.0)
+
+        # a substitution lowers the confidence but still matches
+        mutated = design_sequence[:20] + ("A" if design_sequence[20] != "A" else "C") + design_sequence[21:]
+        positions, confidence, _ = self.seed_index.match("TTGA" + mutated)
+        self.assertEqual(positions, ["(7, 0)"])
+        self.assertAlmostEqual(confidence, 31 / 32)
+
+    def test_no_match(self):
+        self.assertIsNone(self.seed_index.match("ACGT" * 10))
+
+        # a seed shorter than the minimum seed length is not a match
+        self.assertIsNone(self.seed_index.match(self.design_sequences[3][:11]))
+
+    def test_has_replaced_well(self):
+        design_sequence = self.design_sequences[11]
+
+        self.assertEqual(has_replaced_well(design_sequence, self.sequence_position), (["(11, 0)"], 1.0))
+        self.assertEqual(has_replaced_well("CC" + design_sequence, self.sequence_position), (None, 0.0))
+        self.assertEqual(has_replaced_well("CC" + design_sequence, self.sequence_position, self.seed_index),
+                         (["(11, 0)"], 1.0))
+
+
+if __name__ == '__main__':
+    unittest.main()
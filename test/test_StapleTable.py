@@ -0,0 +1,90 @@
+import pickle
+import unittest
+
+from src.SequencePool import SequencePool
+from src.Staple import Staple
+from src.StapleTable import StapleTable
+from utils import csv_loader
+
+color_setting = {
+    "data_bit": "#00f900",
+    "other_overhang": "#00fdff",
+    "side_overhang": "#942192",
+    "default_staple": "#000000",
+    "modified_staples": "#ff0000"
+}
+
+
+class MyTestCase(unittest.TestCase):
+    table_test = StapleTable.from_dataframe(csv_loader("../sequence_files/staple_tile_TL_v2.csv").get_csv_df(),
+                                            color_setting)
+
+    def test_location_split(self):
+        location_staples = self.table_test.split_by_location()
+
+        self.assertEqual(len(location_staples["r"]), 6, "Error: Should be 6 staples added at RHS")
+        self.assertEqual(len(location_staples["b"]), 9, "Error: Bottom added staples are 9")
+        self.assertTrue(all(staple.is_overhang for staple in location_staples["b"]))
+
+    def test_row_id(self):
+        csv_df = csv_loader("../sequence_files/staple_tile_TL_v2.csv").get_csv_df()
+        bottom_staples = self.table_test.split_by_location()["b"]
+
+        self.assertEqual(csv_df.loc[bottom_staples.get_row_id(), "Sequence"].tolist(), bottom_staples.get_sequences())
+
+    def test_shared_buffer(self):
+        right_staples = self.table_test.split_by_location()["r"]
+        staple = right_staples[0]
+        sequence = staple.get_sequence()
+
+        staple.set_sequence(sequence.replace("?", "A"))
+        self.assertEqual(right_staples.get_sequence(0), sequence.replace("?", "A"))
+
+        staple.set_sequence(sequence)
+        with self.assertRaises(Exception):
+            staple.set_sequence(sequence + "A")
+
+    def test_read_staple_data(self):
+        staple_data = self.table_test.read_staple_data()
+        csv_df = csv_loader("../sequence_files/staple_tile_TL_v2.csv").get_csv_df()
+
+        self.assertEqual(staple_data["Start"][0], f"{csv_df.loc[0, 'Start']}[{csv_df.loc[0, 'Start_base']}]")
+
+        # staples read one by one give the same data
+        for column, values in Staple.read_staple_data(list(self.table_test)).items():
+            self.assertEqual(list(staple_data[column]), values)
+
+    def test_interned_sequences(self):
+        csv_df = csv_loader("../sequence_files/staple_tile_TL_v2.csv").get_csv_df()
+        pool = SequencePool()
+        table = StapleTable.from_dataframe(csv_df, color_setting, pool)
+        other_table = StapleTable.from_dataframe(csv_df, color_setting, pool)
+
+        # identical staples of both tables are stored once
+        self.assertEqual(len(pool), len(set(csv_df["Sequence"])))
+        self.assertTrue(all(sequence is other_sequence for sequence, other_sequence in
+                            zip(table.get_sequences(), other_table.get_sequences())))
+
+        # assigning bases never changes the sequence held by another table
+        sequence = table.get_sequence(0)
+        table.set_sequence(0, "A" * len(sequence))
+        self.assertEqual(other_table.get_sequence(0), sequence)
+
+        with self.assertRaises(AttributeError):
+            table[0].extra = None
+
+    def test_pickle(self):
+        bottom_staples = self.table_test.split_by_location()["b"]
+        received = pickle.loads(pickle.dumps(bottom_staples))
+
+        self.assertEqual(received.get_sequences(), bottom_staples.get_sequences())
+        self.assertEqual(len(received.get_pool()), len(set(bottom_staples.get_sequences())))
+
+        pool = SequencePool()
+        received.rebind(pool)
+        self.assertIs(received.get_pool(), pool)
+        self.assertEqual(received.get_sequences(), bottom_staples.get_sequences())
+
+
+if __name__ == '__main__':
+    unittest.main()
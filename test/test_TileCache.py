@@ -0,0 +1,43 @@
+import os
+import tempfile
+import unittest
+
+import pandas as pd
+
+from src.DNAOrigami import DNAOrigami
+from src.TileCache import TileCache
+
+COLORS = {"side_overhang": "#942192", "other_overhang": "#00fdff", "modified_staples": "#ff0000"}
+
+
+class MyTestCase(unittest.TestCase):
+    data = {"path": "../sequence_files/staple_tile_TL_v2.csv", "x": 0, "y": 0, "shift": 0}
+
+    def test_warm_start(self):
+        with tempfile.TemporaryDirectory() as cache_dir:
+            tile_cache = TileCache(COLORS, cache_dir)
+            cold = DNAOrigami("test", self.data, tile_cache=tile_cache)
+            self.assertEqual(len(os.listdir(cache_dir)), 1)
+
+            warm = DNAOrigami("test", self.data, tile_cache=tile_cache)
+            pd.testing.assert_frame_equal(warm.get_csv_df(), cold.get_csv_df())
+            pd.testing.assert_frame_equal(warm.csv_df_copy, cold.csv_df_copy)
+
+            # another color setting is another entry
+            DNAOrigami("test", self.data, tile_cache=TileCache({**COLORS, "side_overhang": "#000000"}, cache_dir))
+            self.assertEqual(len(os.listdir(cache_dir)), 2)
+
+    def test_lru_eviction(self):
+        with tempfile.TemporaryDirectory() as cache_dir:
+            DNAOrigami("test", self.data, tile_cache=TileCache(COLORS, cache_dir))
+            entry_size = os.path.getsize(os.path.join(cache_dir, os.listdir(cache_dir)[0]))
+
+            # room for one entry only, so the older one is evicted
+            tile_cache = TileCache({**COLORS, "side_overhang": "#000000"}, cache_dir, max_bytes=entry_size + 1)
+            DNAOrigami("test", self.data, tile_cache=tile_cache)
+
+            self.assertEqual(os.listdir(cache_dir), [f"{tile_cache.key(self.data['path'])}.npz"])
+
+
+if __name__ == '__main__':
+    unittest.main()
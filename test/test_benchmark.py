@@ -0,0 +1,34 @@
+import os
+import tempfile
+import unittest
+
+from src.benchmark import BENCHMARK_STAGES, compare_results, record_results, run_benchmarks
+
+
+class MyTestCase(unittest.TestCase):
+    def test_benchmark(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            results_df = run_benchmarks([(2, 1), (2, 2)], repeat=1, label="first",
+                                        design_path=os.path.join(temp_dir, "designs"))
+
+            self.assertEqual(results_df["Size"].tolist(), ["2x1", "2x2"])
+            self.assertEqual(results_df["Origami"].tolist(), [2, 4])
+            self.assertTrue((results_df[BENCHMARK_STAGES] >= 0).all().all())
+            self.assertTrue((results_df["Overhangs"] > 0).all())
+
+            results_path = os.path.join(temp_dir, "results.csv")
+            record_results(results_df, results_path)
+            second_df = results_df.assign(Label="second", total=results_df["total"] * 2)
+            all_results_df = record_results(second_df, results_path)
+
+            self.assertEqual(len(all_results_df), 4)
+            ratio_df = compare_results(all_results_df, "first", "second")
+            self.assertEqual(ratio_df["Size"].tolist(), ["2x1", "2x2"])
+            self.assertTrue(ratio_df["total"].round(6).eq(2.0).all())
+
+            with self.assertRaises(Exception):
+                compare_results(all_results_df, "first", "third")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,37 @@
+import unittest
+
+import numpy as np
+
+from src.random_bases import overhang_seeds, random_overhang_bases
+
+
+class MyTestCase(unittest.TestCase):
+    base_index = (np.array([23, 55, 87]), np.array([8, 40, 72]))
+    helix_index = (np.array([18, 18, 18]), np.array([16, 16, 16]))
+
+    def test_order_independent(self):
+        seeds = overhang_seeds(42, (0, 0), "b", self.base_index, self.helix_index)
+        all_bases = random_overhang_bases(seeds, [16, 16, 16])
+
+        # generating a single overhang on its own gives the same bases
+        self.assertEqual(random_overhang_bases(seeds[2:], [16]), all_bases[2:])
+        self.assertEqual(random_overhang_bases(seeds[::-1], [16, 16, 16]), all_bases[::-1])
+        self.assertTrue(all(set(bases) <= set("ACGT") for bases in all_bases))
+
+    def test_seed_streams(self):
+        seeds = overhang_seeds(42, (0, 0), "b", self.base_index, self.helix_index)
+
+        self.assertEqual(len(set(seeds.tolist())), 3)
+        self.assertFalse(np.array_equal(seeds, overhang_seeds(42, (0, -1), "b", self.base_index, self.helix_index)))
+        self.assertFalse(np.array_equal(seeds, overhang_seeds(43, (0, 0), "b", self.base_index, self.helix_index)))
+
+    def test_tied_overhangs(self):
+        # overhangs on the same bases of different helices draw from their own streams
+        seeds = overhang_seeds(42, (0, 1), "b", (np.array([8, 8]), np.array([23, 23])),
+                               (np.array([18, 19]), np.array([16, 17])))
+
+        self.assertNotEqual(seeds[0], seeds[1])
+
+
+if __name__ == '__main__':
+    unittest.main()
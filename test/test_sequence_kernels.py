@@ -0,0 +1,29 @@
+import unittest
+
+from src.sequence_kernels import complement, reverse_complement, complement_batch, reverse_batch, \
+    reverse_complement_batch, mismatched_rows
+
+
+class MyTestCase(unittest.TestCase):
+    sequences = ["GCAACTGTTGGGAAGG", "", "ACGT????TT"]
+
+    def test_single_sequence(self):
+        self.assertEqual(complement("ACGT?"), "TGCA?")
+        self.assertEqual(reverse_complement("AACG"), "CGTT")
+
+    def test_batch_matches_single(self):
+        self.assertEqual(complement_batch(self.sequences), [complement(s) for s in self.sequences])
+        self.assertEqual(reverse_batch(self.sequences), [s[::-1] for s in self.sequences])
+        self.assertEqual(reverse_complement_batch(self.sequences), [reverse_complement(s) for s in self.sequences])
+
+    def test_mismatched_rows(self):
+        expected = ["ACGT", "ACGT", "", "TTTT", "GG"]
+        self.assertEqual(mismatched_rows(["ACGT", "ACGA", "", "TTT", "GG"], expected).tolist(),
+                         [False, True, False, True, False])
+
+        with self.assertRaises(Exception):
+            mismatched_rows(["A"], [])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,92 @@
+import json
+import os
+import tempfile
+import unittest
+
+import numpy as np
+import pandas as pd
+
+from src.BatchRunner import BatchRunner
+from src.ExtendedDNAOrigami import ExtendedDNAOrigami
+from src.Extractor import Extractor
+from src.synthetic_design import generate_design, synthetic_tile, SYNTHETIC_COLORS
+
+
+class MyTestCase(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def test_tile_layout(self):
+        rng = np.random.default_rng(0)
+        tile_df = synthetic_tile({"t": True, "b": True, "r": True}, rng, helices=20, overhang_density=1.0, shift=3)
+
+        self.assertEqual(list(tile_df.columns), ["Start", "End", "Sequence", "Length", "Color"])
+        self.assertTrue((tile_df["Sequence"].str.len() == tile_df["Length"]).all())
+
+        overhangs = tile_df[tile_df["Sequence"].str.contains("?", regex=False)]
+        self.assertTrue((overhangs["Sequence"].str.count("\\?") == 16).all())
+        self.assertEqual((overhangs["Color"] == SYNTHETIC_COLORS["side_overhang"]).sum(), 19)
+        # helices start below the empty helices for top overhangs
+        self.assertEqual(tile_df["Start"].iloc[0], "3[39]")
+
+    def test_design_assigned(self):
+        config_path = generate_design(self.temp_dir.name, 3, 2, helices=18, overhang_density=0.5, seed=1)
+
+        with open(config_path, "r") as f:
+            config_data = json.load(f)
+
+        self.assertEqual(len(config_data["DNA_origami"]), 6)
+        self.assertTrue(all(os.path.exists(os.path.join(config_data["csv_root_path"], origami["path"]))
+                            for origami in config_data["DNA_origami"].values()))
+
+        extended_origami = ExtendedDNAOrigami.load_config(config_path, use_cache=False)
+        location_staples = Extractor.extract(extended_origami)
+
+        # top overhangs pair with as many bottom overhangs of the origami above
+        self.assertEqual(len(location_staples[(0, 0)]["t"]), len(location_staples[(0, 1)]["b"]))
+        self.assertNotIn("r", location_staples[(2, 0)])
+
+        # every overhang is assigned and verified against the scaffold or its partner
+        assigner = BatchRunner.assign_design(extended_origami, 42, verify="full")
+        self.assertTrue(all("?" not in sequence for origami in extended_origami.get_origami_position().values()
+                            for sequence in origami.csv_df_copy["Sequence"]))
+        self.assertEqual(len(assigner.get_origami_bases_assigned()), 6)
+
+    def test_invalid_design(self):
+        with self.assertRaises(Exception):
+            generate_design(self.temp_dir.name, 2, 2, helices=12)
+        with self.assertRaises(Exception):
+            generate_design(self.temp_dir.name, 2, 2, shift=1)
+
+    def test_tied_bottom_overhangs(self):
+        config_path = generate_design(self.temp_dir.name, 1, 2, helices=18, overhang_density=0.5, seed=1)
+
+        with open(config_path, "r") as f:
+            config_data = json.load(f)
+
+        # move the second bottom overhang of the upper origami one helix down onto the bases of the first one
+        tile_path = os.path.join(config_data["csv_root_path"], config_data["DNA_origami"]["tile_0_1"]["path"])
+        tile_df = pd.read_csv(tile_path)
+        bottom_rows = tile_df.index[tile_df["Start"].str.startswith("18[")].tolist()
+        first_start, first_end = tile_df.loc[bottom_rows[0], ["Start", "End"]]
+        tile_df.loc[bottom_rows[1], ["Start", "End"]] = [first_start.replace("18[", "19["),
+                                                         first_end.replace("16[", "17[")]
+        tile_df.to_csv(tile_path, index=False)
+
+        extended_origami = ExtendedDNAOrigami.load_config(config_path, use_cache=False)
+        assigner = BatchRunner.assign_design(extended_origami, 42, verify="full")
+
+        # every bottom overhang keeps its own bases and pairs with its own top overhang
+        bottom_bases = assigner.get_origami_bases_assigned()[(0, 1)]["b"]
+        top_bases = assigner.get_origami_bases_assigned()[(0, 0)]["t"]
+        self.assertEqual(len(bottom_bases), len(bottom_rows))
+        self.assertEqual(len(top_bases), len(bottom_rows))
+        self.assertTrue(all("?" not in sequence for origami in extended_origami.get_origami_position().values()
+                            for sequence in origami.csv_df_copy["Sequence"]))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,78 @@
+import json
+import os
+import random
+import tempfile
+import unittest
+
+import pandas as pd
+
+from src.SeedIndex import SeedIndex
+from src.weld_exclusion import exclude_plates, find_order_files, load_design_sequences, read_order_file
+
+
+class MyTestCase(unittest.TestCase):
+    def setUp(self):
+        with open("../config_v2.JSON", "r") as f:
+            self.color_setting = json.load(f)["colors"]
+
+        self.sequence_position = load_design_sequences("../sequence_files/design_v2_1", self.color_setting, False)
+        self.seed_index = SeedIndex(self.sequence_position)
+        self.temp_dir = tempfile.TemporaryDirectory()
+
+        # two plates ordering design staples with assigned overhang bases, split by white spaces as by vendors
+        rng = random.Random(0)
+        # parts shorter than the seed length cannot be told apart from coincidence
+        design_sequences = [sequence for sequence in self.sequence_position if len(sequence) >= 16]
+        self.order_dir = os.path.join(self.temp_dir.name, "orders")
+        os.makedirs(self.order_dir)
+
+        for plate in range(2):
+            sequences = ["".join(rng.choice("ACGT") for _ in range(8)) + sequence
+                         for sequence in design_sequences[plate::2]] + ["ACGT" * 8]
+            pd.DataFrame({
+                "Well Position": [f"A{idx + 1}" for idx in range(len(sequences))],
+                "Sequence": [" ".join(sequence[i: i + 5] for i in range(0, len(sequence), 5)) for sequence in sequences],
+                "Bases": [len(sequence) for sequence in sequences]
+            }).to_csv(os.path.join(self.order_dir, f"plate_{plate}.csv"), index=False)
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def test_design_sequences(self):
+        self.assertTrue(self.sequence_position)
+        self.assertTrue(all("?" not in sequence for sequence in self.sequence_position))
+        self.assertTrue(all(position.startswith("(") for positions in self.sequence_position.values()
+                            for position in positions))
+
+    def test_read_in_chunks(self):
+        order_chunks = list(read_order_file(os.path.join(self.order_dir, "plate_0.csv"), chunk_size=3))
+
+        self.assertGreater(len(order_chunks), 1)
+        self.assertTrue(all(" " not in sequence for order_chunk in order_chunks
+                            for sequence in order_chunk["Sequence"]))
+
+    def test_plates(self):
+        save_path = os.path.join(self.temp_dir.name, "reports")
+        order_paths = find_order_files(self.order_dir)
+        self.assertEqual(order_paths, sorted(find_order_files(os.path.join(self.order_dir, "plate_*.csv"))))
+
+        summary = exclude_plates(order_paths, self.sequence_position, self.seed_index, save_path, chunk_size=4,
+                                 workers=2)
+
+        self.assertEqual(summary["Plate"].tolist(), ["plate_0", "plate_1"])
+        self.assertEqual((summary["Wells"] - summary["Excluded"]).tolist(), [1, 1])
+        self.assertEqual(summary["Unmatched"].tolist(), [1, 1])
+        self.assertEqual(sorted(os.listdir(save_path)),
+                         ["plate_0_exclusion.csv", "plate_1_exclusion.csv", "summary.csv"])
+
+        report = pd.read_csv(os.path.join(save_path, "plate_0_exclusion.csv"), keep_default_na=False)
+        self.assertEqual(len(report), summary.loc[0, "Wells"])
+        self.assertTrue((report["Confidence"][:-1] == 1.0).all())
+        self.assertEqual(report["Exclusion"].iloc[-1], "")
+
+        with self.assertRaises(Exception):
+            find_order_files(os.path.join(self.temp_dir.name, "missing"))
+
+
+if __name__ == '__main__':
+    unittest.main()